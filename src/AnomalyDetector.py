@@ -0,0 +1,175 @@
+from typing import Dict, Optional, Set
+import numpy as np
+import pandas as pd
+
+from CategoryStore import CategoryStore
+
+LEVELS = ("merchant", "category")
+FLAGGED_COLUMNS = ["Date", "Details", "Category", "Amount", "typical", "score", "level"]
+
+
+def _empty_stats() -> pd.DataFrame:
+    return pd.DataFrame(
+        {"n": pd.Series(dtype=np.int64), "mean": pd.Series(dtype=float), "m2": pd.Series(dtype=float)},
+        index=pd.Index([], dtype=object, name="key"),
+    )
+
+
+def merge_stats(current: pd.DataFrame, batch: pd.DataFrame) -> pd.DataFrame:
+    """Combine two (n, mean, m2) tables key by key (Chan et al.'s parallel form of Welford's update)."""
+    prior = current.reindex(batch.index)
+    n_a = prior["n"].fillna(0).to_numpy(dtype=float)
+    mean_a = prior["mean"].fillna(0.0).to_numpy(dtype=float)
+    m2_a = prior["m2"].fillna(0.0).to_numpy(dtype=float)
+    n_b = batch["n"].to_numpy(dtype=float)
+    mean_b = batch["mean"].to_numpy(dtype=float)
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    merged = pd.DataFrame(
+        {
+            "n": n.astype(np.int64),
+            "mean": mean_a + delta * n_b / n,
+            "m2": m2_a + batch["m2"].to_numpy(dtype=float) + delta * delta * n_a * n_b / n,
+        },
+        index=batch.index,
+    )
+    touched = np.zeros(len(current), dtype=bool)
+    positions = current.index.get_indexer(batch.index)
+    touched[positions[positions >= 0]] = True
+    untouched = current[~touched]
+    return pd.concat([untouched, merged]) if not untouched.empty else merged
+
+
+class AnomalyDetector:
+    """Flags expenses that are unusually large for their merchant or category.
+
+    Running count, mean and sum of squared deviations are kept per
+    merchant (``CategoryStore.normalize_detail(Details)``) and per category.
+    Each batch of new debits is scored against the statistics of everything
+    folded in before it, then merged into them, so scoring a new month costs
+    O(new rows + keys it touches) and history is never rescanned. Category
+    statistics use the category a row had when it was folded in.
+    """
+
+    def __init__(self, threshold: float = 3.0, min_history: int = 5, id_col: str = "tx_id"):
+        self.threshold = threshold
+        self.min_history = min_history
+        self.id_col = id_col
+        self.stats: Dict[str, pd.DataFrame] = {level: _empty_stats() for level in LEVELS}
+        self.flagged = pd.DataFrame(columns=FLAGGED_COLUMNS, index=pd.Index([], dtype=object, name=id_col))
+        self.version = 0
+        self._seen: Set[str] = set()
+        self._partitions: Dict[str, list] = {}
+
+    def score(self, df: pd.DataFrame) -> pd.DataFrame:
+        """z-scores of ``df``'s amounts against the current statistics, without updating them.
+
+        ``score`` is the larger of the merchant and category z-scores that
+        have at least ``min_history`` earlier transactions behind them.
+        """
+        keys = self._keys(df)
+        amounts = pd.to_numeric(df["Amount"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+        z, typical = {}, {}
+        for level in LEVELS:
+            stats = self.stats[level].reindex(keys[level])
+            n = stats["n"].fillna(0).to_numpy(dtype=float)
+            mean = stats["mean"].to_numpy(dtype=float)
+            variance = np.divide(stats["m2"].to_numpy(dtype=float), n - 1, out=np.zeros(len(n)), where=n > 1)
+            std = np.sqrt(np.nan_to_num(variance))
+            z[level] = np.divide(amounts - mean, std, out=np.full(len(n), np.nan), where=(n >= self.min_history) & (std > 0))
+            typical[level] = mean
+        by_category = np.nan_to_num(z["category"], nan=-np.inf) > np.nan_to_num(z["merchant"], nan=-np.inf)
+        return pd.DataFrame(
+            {
+                "z_merchant": z["merchant"],
+                "z_category": z["category"],
+                "score": np.fmax(z["merchant"], z["category"]),
+                "level": np.where(by_category, "category", "merchant"),
+                "typical": np.where(by_category, typical["category"], typical["merchant"]),
+            },
+            index=df.index,
+        )
+
+    def update(self, df: Optional[pd.DataFrame]) -> pd.DataFrame:
+        """Score the unseen debits of ``df``, fold them into the statistics and return the newly flagged ones."""
+        if df is None or df.empty or self.id_col not in df.columns:
+            return self.flagged.iloc[:0]
+        ids = df[self.id_col].astype(str).to_numpy(dtype=object)
+        fresh = np.fromiter((tx_id not in self._seen for tx_id in ids), dtype=bool, count=len(ids))
+        fresh &= ~pd.Index(ids).duplicated()
+        if "Debit/Credit" in df.columns:
+            is_debit = df["Debit/Credit"].to_numpy(dtype=object) == "Debit"
+            self._seen.update(ids[fresh & ~is_debit])
+            fresh &= is_debit
+        batch = df[fresh]
+        if batch.empty:
+            return self.flagged.iloc[:0]
+        self._seen.update(ids[fresh])
+        scores = self.score(batch)
+        self._fold(batch)
+        outliers = (scores["score"] >= self.threshold).to_numpy()
+        new = pd.DataFrame(
+            {
+                "Date": batch["Date"].to_numpy()[outliers],
+                "Details": batch["Details"].to_numpy(dtype=object)[outliers],
+                "Category": batch["Category"].to_numpy(dtype=object)[outliers] if "Category" in batch.columns else None,
+                "Amount": pd.to_numeric(batch["Amount"], errors="coerce").to_numpy(dtype=float)[outliers],
+                "typical": scores["typical"].to_numpy()[outliers],
+                "score": scores["score"].to_numpy()[outliers],
+                "level": scores["level"].to_numpy(dtype=object)[outliers],
+            },
+            index=pd.Index(ids[fresh][outliers], dtype=object, name=self.id_col),
+        )
+        if not new.empty:
+            self.flagged = pd.concat([self.flagged, new]) if not self.flagged.empty else new
+        self.version += 1
+        return new
+
+    def refresh(self, ledger, store=None) -> int:
+        """Score and fold the ledger partitions written since the last refresh, oldest month first.
+
+        Ledger rows carry no category, so they are categorized with ``store`` when given.
+        """
+        flagged = 0
+        columns = [self.id_col, "Date", "Details", "Amount", "Debit/Credit"]
+        for month, *stat in ledger.version():
+            if self._partitions.get(month) == stat:
+                continue
+            part = ledger.partition(month, columns=columns)
+            if store is not None and not part.empty:
+                part["Category"] = store.categorize(part["Details"], "categories")
+            flagged += len(self.update(part))
+            self._partitions[month] = stat
+        return flagged
+
+    def flagged_in(self, df: Optional[pd.DataFrame]) -> pd.DataFrame:
+        """Flagged transactions present in ``df``, most unusual first."""
+        if df is None or df.empty or self.flagged.empty or self.id_col not in df.columns:
+            return self.flagged.iloc[:0]
+        ids = df[self.id_col].astype(str).to_numpy(dtype=object)
+        present = self.flagged.index.isin(ids)
+        return self.flagged[present].sort_values("score", ascending=False)
+
+    def _keys(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        raw = df["Details"].fillna("").astype(object)
+        merchants = {d: CategoryStore.normalize_detail(d) for d in pd.unique(raw)}
+        category = df["Category"] if "Category" in df.columns else pd.Series("", index=df.index)
+        category = category.fillna("").astype(object)
+        categories = {c: CategoryStore.normalize_category(c) for c in pd.unique(category)}
+        return {
+            "merchant": raw.map(merchants).to_numpy(dtype=object),
+            "category": category.map(categories).to_numpy(dtype=object),
+        }
+
+    def _fold(self, batch: pd.DataFrame) -> None:
+        keys = self._keys(batch)
+        amounts = pd.to_numeric(batch["Amount"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+        for level in LEVELS:
+            grouped = pd.Series(amounts).groupby(pd.Index(keys[level], dtype=object, name="key"))
+            n = grouped.size()
+            mean = grouped.mean()
+            m2 = grouped.var(ddof=0).fillna(0.0) * n
+            self.stats[level] = merge_stats(
+                self.stats[level],
+                pd.DataFrame({"n": n, "mean": mean, "m2": m2}),
+            )
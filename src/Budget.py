@@ -1,35 +1,153 @@
 from dataclasses import dataclass, field
 from datetime import date
 from datetime import datetime, date
+from functools import cached_property
 from typing import Iterable, Literal
 from dataclasses import asdict
+import numpy as np
 import pandas as pd
 
+from TagIndex import TagIndex
+
+def split_tags(raw_tags) -> list[str]:
+    if isinstance(raw_tags, str):
+        return [t.strip().lower() for t in raw_tags.split(",") if t.strip()]
+    if isinstance(raw_tags, (list, tuple, np.ndarray)):
+        return [str(t).strip().lower() for t in raw_tags if str(t).strip()]
+    return []
+
+class TransactionColumns:
+    """Column arrays of a transactions frame, prepared once and shared by every budget matched against it."""
+
+    def __init__(self, frame: pd.DataFrame, tag_index=None, id_col: str = "tx_id"):
+        self.frame = frame
+        self.size = len(frame)
+        # With a TagIndex, tags are looked up by tx_id instead of parsed from the "tags" column.
+        self.tag_index = tag_index if tag_index is not None and id_col in frame.columns else None
+        self.id_col = id_col
+        self._tag_masks: dict[frozenset[str], np.ndarray] = {}
+
+    @cached_property
+    def dates(self) -> np.ndarray:
+        if "Date" not in self.frame.columns:
+            return np.full(self.size, np.datetime64("NaT"), dtype="datetime64[D]")
+        parsed = pd.to_datetime(self.frame["Date"], errors="coerce")
+        return parsed.to_numpy(dtype="datetime64[D]")
+
+    @cached_property
+    def _categories(self) -> tuple[np.ndarray, dict[str, int]]:
+        if "Category" not in self.frame.columns:
+            return np.full(self.size, -1, dtype=np.intp), {}
+        codes, uniques = pd.factorize(self.frame["Category"].fillna("").astype(str).str.lower())
+        return codes, {c: i for i, c in enumerate(uniques)}
+
+    @cached_property
+    def tag_pairs(self) -> tuple[np.ndarray, np.ndarray, dict[str, int]]:
+        """Exploded tags as (row position, tag code) pairs plus the tag -> code lookup."""
+        if self.tag_index is not None:
+            return self._indexed_tag_pairs()
+        if "tags" not in self.frame.columns:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.intp), {}
+        raw = pd.Series(self.frame["tags"].to_numpy(), index=np.arange(self.size)).explode().dropna()
+        raw_codes, raw_uniques = pd.factorize(raw.astype(str))
+        split = [split_tags(value) for value in raw_uniques]
+        counts = np.array([len(tags) for tags in split], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        flat_codes, uniques = pd.factorize(pd.Series([t for tags in split for t in tags], dtype=object))
+        per_row = counts[raw_codes]
+        starts = np.repeat(np.cumsum(per_row) - per_row, per_row)
+        flat_index = np.repeat(offsets[raw_codes], per_row) + np.arange(per_row.sum()) - starts
+        positions = np.repeat(raw.index.to_numpy(dtype=np.int64), per_row)
+        return positions, flat_codes[flat_index], {t: i for i, t in enumerate(uniques)}
+
+    def _indexed_tag_pairs(self) -> tuple[np.ndarray, np.ndarray, dict[str, int]]:
+        lookup = {t: i for i, t in enumerate(self.tag_index.tags)}
+        tx_ids = [tx_id for tag in lookup for tx_id in self.tag_index.tx_ids_with(tag)]
+        codes = np.repeat(np.arange(len(lookup)), [self.tag_index.count(tag) for tag in lookup])
+        pairs = pd.DataFrame({"tx_id": pd.Series(tx_ids, dtype=object), "code": codes})
+        rows = pd.DataFrame({"tx_id": self.frame[self.id_col].astype(str).to_numpy(dtype=object), "position": np.arange(self.size)})
+        joined = rows.merge(pairs, on="tx_id", sort=False)
+        return joined["position"].to_numpy(dtype=np.int64), joined["code"].to_numpy(dtype=np.intp), lookup
+
+    def category_is(self, category: str) -> np.ndarray:
+        codes, lookup = self._categories
+        code = lookup.get(category)
+        if code is None:
+            return np.zeros(self.size, dtype=bool)
+        return codes == code
+
+    def has_any_tag(self, tags: Iterable[str]) -> np.ndarray:
+        key = frozenset(tags)
+        if key not in self._tag_masks and self.tag_index is not None:
+            tx_ids = self.tag_index.tx_ids_with_any(key)
+            ids = self.frame[self.id_col].astype(str)
+            self._tag_masks[key] = ids.isin(tx_ids).to_numpy() if tx_ids else np.zeros(self.size, dtype=bool)
+        if key not in self._tag_masks:
+            positions, codes, lookup = self.tag_pairs
+            wanted = [lookup[t] for t in key if t in lookup]
+            mask = np.zeros(self.size, dtype=bool)
+            if wanted:
+                mask[positions[np.isin(codes, wanted)]] = True
+            self._tag_masks[key] = mask
+        return self._tag_masks[key]
+
+    def in_range(self, start, end) -> np.ndarray:
+        start = np.datetime64(pd.Timestamp(start).date(), "D")
+        end = np.datetime64(pd.Timestamp(end).date(), "D")
+        return (self.dates >= start) & (self.dates <= end)
+
+@dataclass(frozen=True)
+class CompiledLine:
+    category: str
+    include_tags: frozenset[str]
+    exclude_tags: frozenset[str]
+
+    def matches(self, category: str, tags: Iterable[str]) -> bool:
+        if self.exclude_tags and any(t in self.exclude_tags for t in tags):
+            return False
+        if self.include_tags and any(t in self.include_tags for t in tags):
+            return True
+        if self.category:
+            return category == self.category
+        return True
+
+    def mask(self, columns: TransactionColumns) -> np.ndarray:
+        if self.category:
+            matched = columns.category_is(self.category)
+        else:
+            matched = np.ones(columns.size, dtype=bool)
+        if self.include_tags:
+            matched |= columns.has_any_tag(self.include_tags)
+        if self.exclude_tags:
+            matched &= ~columns.has_any_tag(self.exclude_tags)
+        return matched
+
 @dataclass
 class BudgetLine:
     category: str = ""
     include_tags: tuple[str, ...] = ()
     exclude_tags: tuple[str, ...] = ()
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in ("category", "include_tags", "exclude_tags"):
+            self.__dict__.pop("_compiled", None)
+
+    @property
+    def compiled(self) -> CompiledLine:
+        if "_compiled" not in self.__dict__:
+            self.__dict__["_compiled"] = CompiledLine(
+                category=(self.category or "").lower(),
+                include_tags=frozenset(str(t).lower() for t in (self.include_tags or [])),
+                exclude_tags=frozenset(str(t).lower() for t in (self.exclude_tags or [])),
+            )
+        return self.__dict__["_compiled"]
+
     def matches(self, row: pd.Series) -> bool:
-        tx_category = row.get("Category", "").lower()
-        raw_tags = row.get("tags", ())
-        if isinstance(raw_tags, str):
-            tx_tags = [t.strip().lower() for t in raw_tags.split(",") if t.strip()]
-        elif isinstance(raw_tags, (list, tuple)):
-            tx_tags = [str(t).strip().lower() for t in raw_tags if str(t).strip()]
-        else:
-            tx_tags = []
-        exclude_lower = {str(t).lower() for t in (self.exclude_tags or [])}
-        include_lower = {str(t).lower() for t in (self.include_tags or [])}
+        return self.compiled.matches(row.get("Category", "").lower(), split_tags(row.get("tags", ())))
 
-        if exclude_lower and any(t in exclude_lower for t in tx_tags):
-            return False
-        if include_lower and any(t in include_lower for t in tx_tags):
-            return True
-        if self.category:
-            return tx_category == self.category.lower()
-        return True
+    def mask(self, columns: TransactionColumns) -> np.ndarray:
+        return self.compiled.mask(columns)
 
 @dataclass
 class Budget:
@@ -40,68 +158,146 @@ class Budget:
     budget_lines: list[BudgetLine] = field(default_factory=list)
     transactions: pd.DataFrame = field(default_factory=lambda: pd.DataFrame())
     tx_ids: list[str] = field(default_factory=list)
+    # Set by BudgetManager so totals resolve tags by tx_id, like its matching does.
+    tag_index: TagIndex | None = field(default=None, repr=False, compare=False)
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in ("transactions", "budget_lines", "limit", "start_date", "end_date", "tag_index"):
+            self.__dict__.pop("_cached_aggregates", None)
+        if name in ("transactions", "budget_lines", "limit", "start_date", "end_date"):
+            self.__dict__["_revision"] = self.revision + 1
+
+    @property
+    def revision(self) -> int:
+        """Bumped whenever the budget's definition or transactions change."""
+        return self.__dict__.get("_revision", 0)
     
     def add_line(self, line: BudgetLine) -> None:
         self.budget_lines.append(line)
-    def add_transaction(self, row: pd.Series) -> None:
-        tx_date = row.get("Date")
-        if isinstance(tx_date, pd.Timestamp):
-            tx_date = tx_date.date()
-        elif isinstance(tx_date, datetime):
-            tx_date = tx_date.date()
-        elif isinstance(tx_date, date):
-            pass
-        elif isinstance(tx_date, str):
-            try:
-                tx_date = datetime.strptime(tx_date, "%Y-%m-%d").date()
-            except ValueError:
-                print(f"Skipping row due to invalid date")
-                return
+        self.__dict__.pop("_cached_aggregates", None)
+        self.__dict__["_revision"] = self.revision + 1
+    def match(self, data: pd.DataFrame | TransactionColumns) -> np.ndarray:
+        columns = data if isinstance(data, TransactionColumns) else TransactionColumns(data)
+        lines = np.zeros(columns.size, dtype=bool)
+        for line in self.budget_lines:
+            lines |= line.mask(columns)
+        if not lines.any():
+            return lines
+        return lines & columns.in_range(self.start_date, self.end_date)
+    def evaluate(self, data: pd.DataFrame | TransactionColumns) -> None:
+        columns = data if isinstance(data, TransactionColumns) else TransactionColumns(data)
+        self.transactions = columns.frame[self.match(columns)].reset_index(drop=True)
+        if "tx_id" in self.transactions.columns:
+            self.tx_ids = self.transactions["tx_id"].astype(str).tolist()
+    def add_transactions(self, data: pd.DataFrame | TransactionColumns) -> pd.DataFrame:
+        """Append the matching rows of ``data`` and return them; cached totals are updated, not recomputed."""
+        columns = data if isinstance(data, TransactionColumns) else TransactionColumns(data)
+        matched = columns.frame[self.match(columns)]
+        if matched.empty:
+            return matched
+        key = tuple(line.compiled for line in self.budget_lines)
+        cached = self.__dict__.get("_cached_aggregates")
+        if self.transactions.empty:
+            self.transactions = matched.reset_index(drop=True)
         else:
-            print(f"Skipping row due to invalid date")
+            self.transactions = pd.concat([self.transactions, matched], ignore_index=True)
+        if "tx_id" in matched.columns:
+            self.tx_ids = list(self.tx_ids) + matched["tx_id"].astype(str).tolist()
+        if cached is not None and cached[0] == key:
+            aggregates = self._merge_aggregates(cached[1], self._compute_aggregates(matched))
+            self.__dict__["_cached_aggregates"] = (key, aggregates)
+        return matched
+    def remove_transactions(self, tx_ids: Iterable[str]) -> None:
+        if self.transactions.empty or "tx_id" not in self.transactions.columns:
             return
-        row_match = self.assign_line(row)
-        if not row_match:
+        keep = ~self.transactions["tx_id"].astype(str).isin(list(tx_ids)).to_numpy()
+        if keep.all():
             return
-        if row_match:
-            print(row)
-        start = self.start_date if isinstance(self.start_date, date) else self.start_date.date()
-        end = self.end_date if isinstance(self.end_date, date) else self.end_date.date()
-        
-        if start <= tx_date <= end:
-            if self.transactions.empty:
-                self.transactions = pd.DataFrame([row])
-            else:
-                self.transactions = pd.concat(
-                    [self.transactions, 
-                    pd.DataFrame([row])], 
-                    ignore_index=True
-                )
+        self.transactions = self.transactions[keep].reset_index(drop=True)
+        self.tx_ids = self.transactions["tx_id"].astype(str).tolist()
+    def add_transaction(self, row: pd.Series) -> None:
+        self.add_transactions(pd.DataFrame([row]))
     def assign_line(self, row: pd.Series) -> BudgetLine | None:
         for line in self.budget_lines:
             if line.matches(row):
                 return line
         return None
+    def assign_lines(self, data: pd.DataFrame | TransactionColumns) -> np.ndarray:
+        """Index of the first matching line for every row, or -1 when no line matches."""
+        columns = data if isinstance(data, TransactionColumns) else TransactionColumns(data)
+        assigned = np.full(columns.size, -1, dtype=np.intp)
+        for i, line in enumerate(self.budget_lines):
+            unassigned = assigned < 0
+            if not unassigned.any():
+                break
+            assigned[unassigned & line.mask(columns)] = i
+        return assigned
     def total_spent(self) -> float: #transactions is all of them and no filter
-        return self.transactions["Amount"].sum() if not self.transactions.empty else 0.0
+        return self._aggregates()["total_spent"]
     def per_category_spent(self) -> dict[str, float]:
-        spent: dict[str, float] = {}
-        for _, row in self.transactions.iterrows():
-            line = self.assign_line(row)
-            if not line:
-                continue
-            spent[line.category] = spent.get(line.category, 0.0) + row["Amount"]
-        return spent
+        return dict(self._aggregates()["per_category_spent"])
     def per_tag_spent(self) -> dict[str, float]:
-        spent: dict[str, float] = {}
-        for _, row in self.transactions.iterrows():
-            line = self.assign_line(row)
-            if not line:
-                continue
-            tags = row.get("tags", ())
-            for tag in tags:
-                spent[tag] = spent.get(tag, 0.0) + row["Amount"]
-        return spent
+        return dict(self._aggregates()["per_tag_spent"])
+    def _aggregates(self) -> dict:
+        """Totals of the current transactions, computed in one pass and kept until the inputs change."""
+        key = tuple(line.compiled for line in self.budget_lines)
+        cached = self.__dict__.get("_cached_aggregates")
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        aggregates = self._compute_aggregates(self.transactions)
+        self.__dict__["_cached_aggregates"] = (key, aggregates)
+        return aggregates
+    def _compute_aggregates(self, frame: pd.DataFrame) -> dict:
+        per_category: dict[str, float] = {}
+        per_tag: dict[str, float] = {}
+        total = 0.0
+        if not frame.empty:
+            columns = TransactionColumns(frame, tag_index=self.tag_index)
+            amounts = frame["Amount"].to_numpy(dtype=float)
+            total = float(amounts.sum())
+            assigned = self.assign_lines(columns)
+            matched = assigned >= 0
+            n_lines = len(self.budget_lines)
+            counts = np.bincount(assigned[matched], minlength=n_lines)
+            totals = np.bincount(assigned[matched], weights=amounts[matched], minlength=n_lines)
+            for line, count, line_total in zip(self.budget_lines, counts, totals):
+                if count:
+                    per_category[line.category] = per_category.get(line.category, 0.0) + float(line_total)
+            positions, codes, lookup = columns.tag_pairs
+            tagged = matched[positions]
+            tag_totals = np.bincount(codes[tagged], weights=amounts[positions[tagged]], minlength=len(lookup))
+            tag_counts = np.bincount(codes[tagged], minlength=len(lookup))
+            per_tag = {tag: float(tag_totals[code]) for tag, code in lookup.items() if tag_counts[code]}
+        return {
+            "total_spent": total,
+            "per_category_spent": per_category,
+            "per_tag_spent": per_tag,
+        }
+    @staticmethod
+    def _merge_aggregates(current: dict, delta: dict) -> dict:
+        merged = {"total_spent": current["total_spent"] + delta["total_spent"]}
+        for key in ("per_category_spent", "per_tag_spent"):
+            combined = dict(current[key])
+            for name, amount in delta[key].items():
+                combined[name] = combined.get(name, 0.0) + amount
+            merged[key] = combined
+        return merged
+    def spend_by_day(self) -> tuple[np.ndarray, np.ndarray]:
+        """(days as datetime64[D], amounts) of the current transactions, kept until they change."""
+        cached = self.__dict__.get("_cached_days")
+        if cached is not None and cached[0] == self.revision:
+            return cached[1]
+        frame = self.transactions
+        if frame.empty or "Date" not in frame.columns:
+            result = (np.empty(0, dtype="datetime64[D]"), np.empty(0, dtype=float))
+        else:
+            days = pd.to_datetime(frame["Date"], errors="coerce").to_numpy(dtype="datetime64[D]")
+            amounts = pd.to_numeric(frame["Amount"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+            valid = ~np.isnat(days)
+            result = (days[valid], amounts[valid])
+        self.__dict__["_cached_days"] = (self.revision, result)
+        return result
     def get_transactions(self) -> pd.DataFrame:
         return self.transactions
     def get_num_transactions(self) -> int:
@@ -118,15 +314,16 @@ class Budget:
         return data
 
     def summary(self) -> dict:
-        total = self.total_spent()
+        aggregates = self._aggregates()
+        total = aggregates["total_spent"]
         remaining = self.limit - total
         return {
             "limit": self.limit,
             "total_spent": total,
             "remaining": remaining,
             "is_exceeded": total > self.limit,
-            "per_category_spent": self.per_category_spent(),
-            "per_tag_spent": self.per_tag_spent()
+            "per_category_spent": dict(aggregates["per_category_spent"]),
+            "per_tag_spent": dict(aggregates["per_tag_spent"]),
         }
     @classmethod
     def from_dict(cls, d: dict) -> "Budget":
@@ -1,31 +1,166 @@
 from dataclasses import dataclass, field
 from datetime import date
-from typing import Dict
+from typing import Dict, Iterable, List, Optional, Set
 import json
 import os
+import numpy as np
 import pandas as pd
 
-from Budget import Budget
+from Budget import Budget, TransactionColumns
+from SqliteStorage import SqliteStorage
+from TagIndex import TagIndex
+from tx_ids import make_tx_ids
 
 DEFAULT_BUDGETS_PATH = os.path.join(os.path.dirname(__file__), "budgets.json")
 
+
+def forecast_budgets(
+        starts: np.ndarray,
+        ends: np.ndarray,
+        limits: np.ndarray,
+        codes: np.ndarray,
+        days: np.ndarray,
+        amounts: np.ndarray,
+        as_of: date,
+) -> Dict[str, np.ndarray]:
+    """Burn-rate projections for many budgets at once.
+
+    ``starts``/``ends``/``limits`` have one entry per budget; ``codes``,
+    ``days`` and ``amounts`` have one entry per transaction, ``codes``
+    giving the budget it belongs to. Spending is rolled up into a
+    budgets x days matrix and every projection is read off its cumulative
+    sum, so the cost does not grow with a Python loop over budgets.
+    """
+    starts = np.asarray(starts, dtype="datetime64[D]")
+    ends = np.asarray(ends, dtype="datetime64[D]")
+    limits = np.asarray(limits, dtype=float)
+    n = len(starts)
+    if n == 0:
+        empty = np.empty(0)
+        return {"spent_to_date": empty, "daily_burn": empty, "projected_spend": empty,
+                "exhaustion_date": np.empty(0, dtype="datetime64[D]")}
+    period = np.maximum((ends - starts).astype(np.int64) + 1, 1)
+    elapsed = np.clip((np.datetime64(as_of, "D") - starts).astype(np.int64) + 1, 0, period)
+    width = int(period.max())
+
+    offsets = (np.asarray(days, dtype="datetime64[D]") - starts[codes]).astype(np.int64)
+    in_period = (offsets >= 0) & (offsets < period[codes])
+    flat = codes[in_period] * width + offsets[in_period]
+    daily = np.bincount(flat, weights=np.asarray(amounts, dtype=float)[in_period], minlength=n * width)
+    cumulative = daily.reshape(n, width).cumsum(axis=1)
+
+    rows = np.arange(n)
+    spent = np.where(elapsed > 0, cumulative[rows, np.maximum(elapsed - 1, 0)], 0.0)
+    burn = np.divide(spent, elapsed, out=np.zeros(n), where=elapsed > 0)
+    projected = spent + burn * (period - elapsed)
+
+    # Day the limit was already crossed, else the day the current burn rate reaches it.
+    crossed = (cumulative >= limits[:, None]) & (np.arange(width) < elapsed[:, None]) & (limits[:, None] > 0)
+    crossed_at = np.where(crossed.any(axis=1), crossed.argmax(axis=1), -1)
+    remaining = np.maximum(limits - spent, 0.0)
+    days_left = np.ceil(np.divide(remaining, burn, out=np.full(n, np.inf), where=burn > 0))
+    reached_at = np.where(np.isfinite(days_left), elapsed - 1 + days_left, np.inf)
+    exhaustion = np.where(crossed_at >= 0, crossed_at, reached_at)
+    exhausts = (limits > 0) & (exhaustion < period)
+    exhaustion_date = np.full(n, np.datetime64("NaT"), dtype="datetime64[D]")
+    exhaustion_date[exhausts] = starts[exhausts] + exhaustion[exhausts].astype(np.int64)
+    return {
+        "spent_to_date": spent,
+        "daily_burn": burn,
+        "projected_spend": projected,
+        "exhaustion_date": exhaustion_date,
+    }
+
+class TransactionIndex:
+    """tx_id -> row position over one master frame, built once and shared by every budget."""
+
+    def __init__(self, frame: pd.DataFrame, id_col: str = "tx_id"):
+        self.frame = frame
+        self.id_col = id_col
+        ids = frame[id_col].astype(str).to_numpy(dtype=object)
+        first = ~pd.Series(ids).duplicated().to_numpy()
+        self.ids = ids
+        self.index = pd.Index(ids[first], dtype=object)
+        self.positions = np.flatnonzero(first)
+
+    def positions_of(self, tx_ids: Iterable[str]) -> np.ndarray:
+        found = self.index.get_indexer(pd.Index(np.asarray(list(tx_ids), dtype=object), dtype=object))
+        return np.sort(self.positions[found[found >= 0]])
+
+    def take(self, positions: np.ndarray) -> pd.DataFrame:
+        return self.frame.take(positions).reset_index(drop=True)
+
 @dataclass
 class BudgetManager:
     budgets: Dict[str, Budget] = field(default_factory=dict)
+    _index: Optional[TransactionIndex] = field(default=None, init=False, repr=False)
+    _synced: Set[str] = field(default_factory=set, init=False, repr=False)
+    _seen_ids: Set[str] = field(default_factory=set, init=False, repr=False)
+    _last_synced: Optional[pd.DataFrame] = field(default=None, init=False, repr=False)
+    _revision: int = field(default=0, init=False, repr=False)
+    _forecast: Optional[tuple] = field(default=None, init=False, repr=False)
+    # Optional TagIndex (CategoryStore.tags); when set, tag lines resolve through it by tx_id.
+    tag_index: Optional[TagIndex] = field(default=None, repr=False)
+    # Optional SqliteStorage; without one budgets live in a JSON file.
+    storage: Optional[SqliteStorage] = field(default=None, repr=False)
     def get_budget(self, name: str) ->  Budget:
         return self.budgets[name]
     def get_budgets(self) -> Dict[str, Budget]:
         return self.budgets
     def add_or_update_budget(self, budget: Budget):
+        budget.tag_index = self.tag_index
         self.budgets[budget.name] = budget
+        self._synced.discard(budget.name)
+        self._revision += 1
+    def version(self) -> tuple:
+        """Changes whenever a budget is added, replaced, removed or its transactions change."""
+        return self._revision, tuple((name, id(b), b.revision) for name, b in self.budgets.items())
+    def forecast(self, as_of: Optional[date] = None) -> Dict[str, dict]:
+        """Spent to date, daily burn rate, projected end-of-period spend and projected
+        exhaustion date (None if the limit holds) per budget, as of ``as_of`` (today).
+
+        Computed for all budgets together and reused until a budget or the day changes.
+        """
+        as_of = as_of or date.today()
+        key = (self.version(), as_of)
+        if self._forecast is not None and self._forecast[0] == key:
+            return self._forecast[1]
+        names = list(self.budgets)
+        budgets = [self.budgets[name] for name in names]
+        spend = [b.spend_by_day() for b in budgets]
+        sizes = np.array([len(days) for days, _ in spend], dtype=np.int64)
+        projections = forecast_budgets(
+            starts=np.array([b.start_date for b in budgets], dtype="datetime64[D]"),
+            ends=np.array([b.end_date for b in budgets], dtype="datetime64[D]"),
+            limits=np.array([b.limit for b in budgets], dtype=float),
+            codes=np.repeat(np.arange(len(budgets)), sizes),
+            days=np.concatenate([days for days, _ in spend]) if spend else np.empty(0, dtype="datetime64[D]"),
+            amounts=np.concatenate([amounts for _, amounts in spend]) if spend else np.empty(0),
+            as_of=as_of,
+        )
+        exhaustion = projections["exhaustion_date"].astype(object)
+        result = {
+            name: {
+                "spent_to_date": float(projections["spent_to_date"][i]),
+                "daily_burn": float(projections["daily_burn"][i]),
+                "projected_spend": float(projections["projected_spend"][i]),
+                "exhaustion_date": exhaustion[i],
+            }
+            for i, name in enumerate(names)
+        }
+        self._forecast = (key, result)
+        return result
     def load_all(self, file_path: str = DEFAULT_BUDGETS_PATH) -> None:
-        if not os.path.exists(file_path):
+        if self.storage is None and not os.path.exists(file_path):
             print(f"No budgets file at {file_path}, starting empty")
             self.budgets = {}
             return
         try:
-            with open(file_path, "r") as f:
-                data = json.load(f) or {}
+            if self.storage is not None:
+                data = self.storage.load_budgets()
+            else:
+                with open(file_path, "r") as f:
+                    data = json.load(f) or {}
             loaded_budgets: Dict[str, Budget] = {}
             if isinstance(data, dict):
                 items = data.items()
@@ -37,6 +172,7 @@ class BudgetManager:
                         bobj = Budget.from_dict(budget_dict)
                     else:
                         bobj = Budget(**budget_dict)
+                    bobj.tag_index = self.tag_index
                     loaded_budgets[bobj.name or key] = bobj
                 except Exception as e:
                     print(f"Skipping budget '{key}': {e}")
@@ -56,31 +192,46 @@ class BudgetManager:
                     if fld in serial and isinstance(serial[fld], date):
                         serial[fld] = serial[fld].isoformat()
 
-            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
-            existing: Dict[str, dict] = {}
-            if os.path.exists(file_path):
-                try:
-                    with open(file_path, "r") as f:
-                        existing = json.load(f) or {}
-                except Exception:
-                    existing = {}
-
             key = getattr(budget, "name", None)
             if not key:
                 raise ValueError("Budget object must have a 'name' attribute")
 
-            existing[key] = serial
-
-            tmp_path = f"{file_path}.tmp"
-            with open(tmp_path, "w") as f:
-                json.dump(existing, f, indent=2, default=str)
-            os.replace(tmp_path, file_path)
+            if self.storage is not None:
+                self.storage.save_budget(key, serial)
+            else:
+                self._write_json_budget(file_path, key, serial)
 
+            if self.budgets.get(key) is not budget:
+                self._synced.discard(key)
+            budget.tag_index = self.tag_index
             self.budgets[key] = budget
             print(f"Saved budget '{key}' successfully")
         except Exception as e:
             print(f"There was an error saving budget: {e}")
+    def _write_json_budget(self, file_path: str, key: str, serial: dict) -> None:
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        existing: Dict[str, dict] = {}
+        if os.path.exists(file_path):
+            try:
+                with open(file_path, "r") as f:
+                    existing = json.load(f) or {}
+            except Exception:
+                existing = {}
+
+        existing[key] = serial
+
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(existing, f, indent=2, default=str)
+        os.replace(tmp_path, file_path)
     def delete_budget(self, name: str) -> None:
+        if self.storage is not None:
+            try:
+                self.storage.delete_budget(name)
+                print(f"Deleted budget '{name}' from '{self.storage.path}'")
+            except Exception as e:
+                print(f"Error deleting budget '{name}': {e}")
+            return
         try:
             file_path = DEFAULT_BUDGETS_PATH
             os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
@@ -110,49 +261,112 @@ class BudgetManager:
         except Exception as e:
             print(f"Error deleting budget '{name}': {e}")
 
-    def apply_budgets_to_transactions(self, df_master, id_col: str = "tx_id") -> None:
+    def apply_budgets_to_transactions(self, df_master, id_col: str = "tx_id", store=None) -> None:
         if df_master is None:
             return
+        if store is not None and "Category" not in df_master.columns and "Details" in df_master.columns:
+            df_master = df_master.assign(Category=store.categorize(df_master["Details"], "categories"))
         if id_col not in df_master.columns:
-            try:
-                import hashlib
-                def make_tx_id(r):
-                    date_part = r.get("Date")
-                    amount_part = r.get("Amount")
-                    details_part = r.get("Details") if "Details" in r.index else ""
-                    s = f"{date_part!s}|{amount_part!s}|{details_part!s}"
-                    return hashlib.sha1(s.encode("utf-8")).hexdigest()
-                df_master = df_master.reset_index(drop=True)
-                df_master[id_col] = df_master.apply(make_tx_id, axis=1)
-            except Exception:
-                df_master[id_col] = [str(i) for i in range(len(df_master))]
+            df_master = df_master.reset_index(drop=True)
+            df_master[id_col] = make_tx_ids(df_master)
 
-        for b in self.budgets.values():
-            b.transactions = pd.DataFrame()
-
-        for b in self.budgets.values():
+        index = self.index_for(df_master, id_col)
+        columns = None
+        for name, b in self.budgets.items():
             if getattr(b, "tx_ids", None):
-                sel = df_master[df_master[id_col].isin(b.tx_ids)].copy()
-                b.transactions = sel.reset_index(drop=True)
-        budgets_without_ids = [b for b in self.budgets.values() if not getattr(b, "tx_ids", None)]
-        if budgets_without_ids:
-            for b in budgets_without_ids:
-                b.transactions = pd.DataFrame()
-
-            for _, row in df_master.iterrows():
-                for b in budgets_without_ids:
-                    try:
-                        b.add_transaction(row)
-                    except Exception:
-                        continue
+                positions = index.positions_of(b.tx_ids)
+            else:
+                if columns is None:
+                    columns = self.columns_for(df_master, id_col)
+                positions = np.flatnonzero(b.match(columns))
+            b.transactions = index.take(positions)
+            b.tx_ids = index.ids[positions].tolist() if len(positions) else (getattr(b, "tx_ids", []) or [])
+        self._synced.update(self.budgets)
+        self._seen_ids.update(index.ids)
+        self._last_synced = df_master
+
+    def apply_budgets_from_ledger(self, ledger, store=None, id_col: str = "tx_id") -> Optional[pd.DataFrame]:
+        """Rehydrate budgets from only the ledger partitions covering their date ranges."""
+        if not self.budgets:
+            return None
+        starts = [pd.Timestamp(b.start_date) for b in self.budgets.values()]
+        ends = [pd.Timestamp(b.end_date) for b in self.budgets.values()]
+        df_master = ledger.load(min(starts), max(ends))
+        if df_master.empty:
+            return None
+        self.apply_budgets_to_transactions(df_master, id_col=id_col, store=store)
+        return df_master
+
+    def index_for(self, df_master: pd.DataFrame, id_col: str = "tx_id") -> TransactionIndex:
+        if self._index is None or self._index.frame is not df_master or self._index.id_col != id_col:
+            self._index = TransactionIndex(df_master, id_col)
+        return self._index
+
+    def columns_for(self, df: pd.DataFrame, id_col: str = "tx_id") -> TransactionColumns:
+        return TransactionColumns(df, tag_index=self.tag_index, id_col=id_col)
+
+    def sync_transactions(
+            self,
+            df_master: pd.DataFrame,
+            id_col: str = "tx_id",
+            changed_ids: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Bring every budget up to date with ``df_master`` without rebuilding them.
+
+        Budgets seen for the first time (or replaced since the last sync) are
+        evaluated against the whole frame; all others only receive rows whose
+        tx_id was not seen before, plus a targeted re-evaluation of
+        ``changed_ids``. Rows are never dropped because they are missing from
+        a later frame, so budgets accumulate across uploads.
+        """
+        if df_master is None or id_col not in df_master.columns:
+            return
+        synced = [name for name in self.budgets if name in self._synced]
+        if df_master is not self._last_synced:
+            self._append_unseen(df_master, id_col, synced)
+            self._last_synced = df_master
+        unsynced = [name for name in self.budgets if name not in self._synced]
+        if unsynced:
+            columns = self.columns_for(df_master, id_col)
+            for name in unsynced:
+                self.budgets[name].evaluate(columns)
+                self._synced.add(name)
+        if changed_ids:
+            changed_ids = set(changed_ids)
+            changed = df_master[df_master[id_col].astype(str).isin(list(changed_ids)).to_numpy()]
+            self.refresh_transactions(changed, id_col, removed_ids=changed_ids)
+
+    def add_transactions(self, df_new: pd.DataFrame, id_col: str = "tx_id") -> pd.DataFrame:
+        """Match only rows whose tx_id has not been seen before and append them to every budget."""
+        return self._append_unseen(df_new, id_col, list(self.budgets))
 
+    def refresh_transactions(
+            self,
+            df_changed: pd.DataFrame,
+            id_col: str = "tx_id",
+            removed_ids: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Re-evaluate edited rows in every budget, touching only those rows."""
+        ids = set(removed_ids) if removed_ids is not None else set(df_changed[id_col].astype(str))
+        if not ids:
+            return
+        columns = self.columns_for(df_changed, id_col)
         for b in self.budgets.values():
-            if not b.transactions.empty and id_col in b.transactions.columns:
-                try:
-                    b.tx_ids = b.transactions[id_col].astype(str).tolist()
-                except Exception:
-                    b.tx_ids = []
-            else:
-                b.tx_ids = getattr(b, "tx_ids", []) or []
+            b.remove_transactions(ids)
+            b.add_transactions(columns)
+        self._seen_ids.update(ids)
 
-    
\ No newline at end of file
+    def _append_unseen(self, df_new: pd.DataFrame, id_col: str, names: List[str]) -> pd.DataFrame:
+        if df_new is None or df_new.empty:
+            return pd.DataFrame()
+        ids = df_new[id_col].astype(str)
+        seen = self._seen_ids
+        unseen = np.fromiter((tx_id not in seen for tx_id in ids), dtype=bool, count=len(ids))
+        delta = df_new[unseen & ~ids.duplicated().to_numpy()]
+        if delta.empty:
+            return delta
+        seen.update(delta[id_col].astype(str))
+        columns = self.columns_for(delta, id_col)
+        for name in names:
+            self.budgets[name].add_transactions(columns)
+        return delta
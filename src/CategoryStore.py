@@ -1,40 +1,252 @@
 from __future__ import annotations
-import hashlib
-from typing import Dict, List, Literal, Optional, Mapping
+from types import MappingProxyType
+from typing import Dict, List, Literal, Optional, Mapping, Set, Tuple
+import glob
 import os
 import json
+import hashlib
+import re
+import sqlite3
+import uuid
 import pandas as pd
 
+from Journal import Journal
+from MerchantClassifier import MerchantClassifier
+from TagIndex import TagIndex
+from tx_ids import make_tx_ids
+
 Scope = Literal["categories", "income_categories"]
+SCOPES: Tuple[Scope, ...] = ("categories", "income_categories")
+RULE_KINDS = ("prefix", "contains", "regex")
+COMPACT_AFTER_RECORDS = 1000
+
+
+class RuleMatcher:
+    """The pattern rules of one scope, matched as a whole.
+
+    Prefix and contains rules are escaped literals and share one
+    alternation; the literal it matched (and whether it matched at the
+    start) identifies the rule. Regex rules without groups or inline
+    global flags share a second, non-capturing alternation that finds where
+    the first of them matches; the rule is then the first one matching at
+    that position. Named groups per rule would identify it directly, but
+    they stop ``re`` from optimizing the alternation and made it slower
+    than searching each rule. The few that cannot be combined
+    (backreferences, their own group names, flags like ``(?x)``) are
+    searched one by one. The match starting earliest in the detail wins,
+    then the rule added first.
+    """
+
+    def __init__(self, rules: List[Dict[str, str]]):
+        self.categories = [r["category"] for r in rules]
+        self._literals: Dict[str, Dict[str, int]] = {}
+        self._regexes: List[Tuple[int, re.Pattern]] = []
+        self._combined_rules: List[Tuple[int, re.Pattern]] = []
+        fragments, combined = [], []
+        for i, rule in enumerate(rules):
+            kind, pattern = rule["kind"], rule["pattern"]
+            if kind == "regex":
+                compiled = self.compile_regex(pattern)
+                fragment = self._fragment(pattern) if compiled.groups == 0 else None
+                if fragment is not None:
+                    combined.append(fragment)
+                    self._combined_rules.append((i, compiled))
+                else:
+                    self._regexes.append((i, compiled))
+                continue
+            if kind not in self._literals.setdefault(pattern, {}):
+                self._literals[pattern][kind] = i
+                fragments.append(("^" if kind == "prefix" else "") + re.escape(pattern))
+        self._literal = re.compile("|".join(fragments), re.IGNORECASE) if fragments else None
+        self._combined = re.compile("|".join(combined), re.IGNORECASE) if combined else None
+
+    @staticmethod
+    def _fragment(pattern: str) -> Optional[str]:
+        """``pattern`` as one branch of an alternation, or None if it only works on its own."""
+        fragment = f"(?:{pattern})"
+        try:
+            re.compile(fragment, re.IGNORECASE)
+        except re.error:
+            return None
+        return fragment
+
+    @staticmethod
+    def compile_regex(pattern: str) -> re.Pattern:
+        try:
+            return re.compile(pattern, re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"Invalid regex '{pattern}': {e}") from e
+
+    def match(self, detail: str) -> Optional[str]:
+        best: Optional[Tuple[int, int]] = None
+        if self._literal is not None:
+            m = self._literal.search(detail)
+            if m:
+                kinds = self._literals[m.group(0).lower()]
+                best = (m.start(), min(i for kind, i in kinds.items() if kind == "contains" or m.start() == 0))
+        if self._combined is not None:
+            m = self._combined.search(detail)
+            if m and (best is None or m.start() <= best[0]):
+                start = m.start()
+                i = next(i for i, regex in self._combined_rules if regex.match(detail, start))
+                best = min(best, (start, i)) if best is not None else (start, i)
+        for i, regex in self._regexes:
+            m = regex.search(detail)
+            if m and (best is None or (m.start(), i) < best):
+                best = (m.start(), i)
+        return None if best is None else self.categories[best[1]]
+
 
 class CategoryStore:
-    def __init__(self, categories_path: str, income_categories_path: str, tags_path="tags.json"):
+    def __init__(self, categories_path: str, income_categories_path: str, tags_path="tags.json", rules_path="rules.json", model_path="merchant_model", backend=None, journal_path=None):
         self.paths = {
             "categories": categories_path,
             "income_categories": income_categories_path,
-            "tags": tags_path
+            "tags": tags_path,
+            "rules": rules_path,
+            "model": model_path,
         }
-        self.data: Dict[Scope, Dict[str, List[str]]] = {
-            "categories": {"uncategorized": []},
-            "income_categories": {"uncategorized": [],}
+        # Optional SqliteStorage; without one the JSON files above are used.
+        self.backend = backend
+        # Optional edit journal replayed on top of the last saved snapshot. Each store
+        # writes its own; unlocked journals beside it are left over from finished
+        # stores and are adopted on load, then deleted once folded into a snapshot.
+        self.journal: Optional[Journal] = Journal(journal_path) if journal_path else None
+        self._adopted: List[Journal] = []
+        self._replaying: bool = False
+        # Details per category are insertion-ordered dicts used as sets.
+        self.data: Dict[Scope, Dict[str, Dict[str, None]]] = {
+            "categories": {"uncategorized": {}},
+            "income_categories": {"uncategorized": {}},
         }
         self.lookups: Dict[Scope, Dict[str, str]] = {
             "categories": {},
             "income_categories": {},
         }
-        self.tags_list: List[str] = []
-        self.tags: Dict[str, Dict[str, List[str]]] = {}
+        self._versions: Dict[Scope, int] = {"categories": 0, "income_categories": 0}
+        self._snapshots: Dict[Scope, Tuple[int, Mapping[str, Tuple[str, ...]]]] = {}
+        self.rules: Dict[Scope, List[Dict[str, str]]] = {
+            "categories": [],
+            "income_categories": [],
+        }
+        self._matchers: Dict[Scope, Optional[RuleMatcher]] = {}
+        self._rules_version: int = 0
+        # Content hashes taken at load; categorization_token() and tags_token() build on them.
+        self._base_tokens: Dict[str, Tuple[tuple, str]] = {}
+        self._uid: str = uuid.uuid4().hex[:12]
+        self.classifiers: Dict[Scope, MerchantClassifier] = {}
+        self._models_dirty: Set[Scope] = set()
+        self.tags: TagIndex = TagIndex()
         self.current_file: Optional[str] = None
         self._dirty: bool = False
         self._tags_dirty: bool = False
+        self._rules_dirty: bool = False
+        self._changed_categories: Dict[Scope, Set[str]] = {"categories": set(), "income_categories": set()}
+        self._changed_details: Dict[Scope, Set[str]] = {"categories": set(), "income_categories": set()}
+        self._changed_tags: Set[str] = set()
         self._loaded: bool = False
+    def __getstate__(self) -> dict:
+        """Pickle only what categorize() needs, e.g. for ingest worker processes.
+
+        The journal, storage backend, classifiers and tags stay with the
+        original store; edits made on an unpickled copy are not persisted.
+        """
+        state = self.__dict__.copy()
+        state.update(
+            backend=None,
+            journal=None,
+            _adopted=[],
+            _snapshots={},
+            classifiers={},
+            _models_dirty=set(),
+            tags=TagIndex(),
+        )
+        return state
     def load_all(self) -> None:
-        for scope in ["categories", "income_categories"]:
+        if self.backend is not None:
+            self._load_backend()
+        else:
+            self._load_json()
+        for scope in SCOPES:
+            self.rules[scope] = self._valid_rules(scope, self.rules[scope])
+        self._matchers.clear()
+        self._rules_version += 1
+        self.classifiers.clear()
+        self.rebuild_lookups()
+        self.rebuild_tags()
+        if self.journal is not None:
+            self._replay_journal()
+        self._base_tokens = {
+            "categories": (self._categorization_versions(), self._content_hash([self.lookups, self.rules])),
+            "tags": (self._tags_versions(), self._content_hash(self.tags.to_dict())),
+        }
+        self._loaded = True
+    def _replay_journal(self) -> None:
+        if not self.journal.claim():
+            print(f"Journal {self.journal.path} is in use by another store; saving edits directly")
+            self.journal = None
+            return
+        records = self.journal.replay()
+        for orphan in self._adopted:
+            records.extend(orphan.replay())
+        own = os.path.abspath(self.journal.path)
+        for path in sorted(glob.glob(os.path.join(os.path.dirname(own), "*.journal"))):
+            orphan = Journal(path)
+            if os.path.abspath(path) == own or not orphan.claim():
+                continue
+            adopted = orphan.replay()
+            if adopted:
+                records.extend(adopted)
+                self._adopted.append(orphan)
+            else:
+                orphan.remove()
+        self._replaying = True
+        try:
+            for record in records:
+                op, args = record[0], record[1:]
+                if op == "a":
+                    self.add_category(*args)
+                elif op == "c":
+                    self.set_category(*args)
+                elif op == "t":
+                    self.set_tags(*args)
+                elif op == "r+":
+                    try:
+                        self.add_rule(*args)
+                    except ValueError as e:
+                        print(f"Skipping journaled rule {args}: {e}")
+                elif op == "r-":
+                    self.remove_rule(*args)
+        finally:
+            self._replaying = False
+    def _log(self, record: list) -> None:
+        if self.journal is not None and not self._replaying:
+            self.journal.append(record)
+    def flush(self) -> None:
+        """Make edits durable: fsync the journal, compacting it into the snapshot once it grows large.
+
+        Without a journal this is a full save_all.
+        """
+        if self.journal is None or self.journal.records >= COMPACT_AFTER_RECORDS:
+            self.save_all()
+        else:
+            self.journal.sync()
+    def _load_backend(self) -> None:
+        data = self.backend.load_categories()
+        rules = self.backend.load_rules()
+        for scope in SCOPES:
+            self.data[scope] = data.get(scope, {})
+            self.data[scope].setdefault("uncategorized", {})
+            self.rules[scope] = rules.get(scope, [])
+            self._versions[scope] += 1
+        self.tags = TagIndex(self.backend.load_tags())
+    def _load_json(self) -> None:
+        for scope in SCOPES:
             path = self.paths[scope]
             if not os.path.exists(path):
                 try:
                     with open(path, "w") as f:
-                        json.dump(self.data[scope], f)
+                        json.dump(self.get_data_copy(scope), f)
                 except IOError as e:
                     print(f"Error creating {scope} file: {e}")
             try:
@@ -43,10 +255,11 @@ class CategoryStore:
                     norm = {}
                     for cat, details in loaded_data.items():
                         c = self.normalize_category(cat)
-                        norm[c] = [self.normalize_detail(d) for d in details]
+                        norm.setdefault(c, {}).update(dict.fromkeys(self.normalize_detail(d) for d in details))
                     if "uncategorized" not in norm:
-                        norm["uncategorized"] = []
+                        norm["uncategorized"] = {}
                     self.data[scope] = norm
+                    self._versions[scope] += 1
             except IOError as e:
                 print(f"Error creating {scope} file: {e}")
         tags_path = self.paths["tags"]
@@ -59,41 +272,237 @@ class CategoryStore:
         else:
             try:
                 with open(tags_path, "r") as f:
-                    self.tags = json.load(f)
+                    loaded_tags = json.load(f) or {}
+                self.tags = TagIndex.from_dict(loaded_tags)
+                if any(isinstance(v, dict) for v in loaded_tags.values()):
+                    self._tags_dirty = True
             except IOError as e:
                 print(f"Error reading tags file: {e}")
-        self.rebuild_lookups()
-        self.rebuild_tags()
-        self._loaded = True  
+        rules_path = self.paths["rules"]
+        if os.path.exists(rules_path):
+            try:
+                with open(rules_path, "r") as f:
+                    loaded_rules = json.load(f) or {}
+                for scope in SCOPES:
+                    self.rules[scope] = [
+                        {
+                            "category": self.normalize_category(r.get("category")),
+                            "kind": r.get("kind", "contains"),
+                            "pattern": r.get("pattern", ""),
+                        }
+                        for r in loaded_rules.get(scope, [])
+                    ]
+            except IOError as e:
+                print(f"Error reading rules file: {e}")
     def is_loaded(self) -> bool:
         return self._loaded             
     def save_all(self) -> None:
+        if self.backend is not None:
+            self._save_backend()
+        else:
+            self._save_json()
+        for scope in list(self._models_dirty):
+            try:
+                self.classifiers[scope].save(self.model_file(scope))
+                self._models_dirty.discard(scope)
+            except IOError as e:
+                print(f"Error saving {scope} model: {e}")
+        if self.journal is not None and not (self._dirty or self._tags_dirty or self._rules_dirty):
+            self.journal.truncate()
+            for orphan in self._adopted:
+                orphan.remove()
+            self._adopted = []
+    def _save_backend(self) -> None:
+        if not (self._dirty or self._tags_dirty or self._rules_dirty):
+            return
+        categories = [(scope, c) for scope in SCOPES for c in self._changed_categories[scope]]
+        details = [
+            (scope, d, self.lookups[scope][d])
+            for scope in SCOPES for d in self._changed_details[scope] if d in self.lookups[scope]
+        ]
+        rules = {scope: self.rules[scope] for scope in SCOPES} if self._rules_dirty else None
+        tags = {tx_id: self.tags.get(tx_id) for tx_id in self._changed_tags}
+        try:
+            self.backend.save_categories(categories, details, rules=rules, tags=tags)
+            self._dirty = self._tags_dirty = self._rules_dirty = False
+            for changed in (*self._changed_categories.values(), *self._changed_details.values(), self._changed_tags):
+                changed.clear()
+        except sqlite3.Error as e:
+            print(f"Error saving to {self.backend.path}: {e}")
+    def _save_json(self) -> None:
         if self._dirty:
             try:
-                for cat, path in self.paths.items():
-                    with open(path, "w") as f:
-                        json.dump(self.data[cat], f)
+                for cat in SCOPES:
+                    self._write_json(self.paths[cat], self.get_data_copy(cat))
                 self._dirty = False
+                for changed in (*self._changed_categories.values(), *self._changed_details.values()):
+                    changed.clear()
             except IOError as e:
                 print(f"Error creating {cat} file: {e}")
         if self._tags_dirty:
             try:
-                with open(self.paths["tags"], "w") as f:
-                    json.dump(self.tags, f)
+                self._write_json(self.paths["tags"], self.tags.to_dict())
                 self._tags_dirty = False
+                self._changed_tags.clear()
             except IOError as e:
-                print("Error saving tags file: {e}")
+                print(f"Error saving tags file: {e}")
+        if self._rules_dirty:
+            try:
+                self._write_json(self.paths["rules"], self.rules)
+                self._rules_dirty = False
+            except IOError as e:
+                print(f"Error saving rules file: {e}")
+    @staticmethod
+    def _write_json(path: str, data) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
     def get_options(self, scope: Scope) -> List[str]:
         return sorted(self.data[scope].keys())
     def get_lookup(self, scope: Scope) -> Mapping[str, str]:
-        return dict(self.lookups[scope])
-    def get_data(self, scope: Scope) -> Dict[str, List[str]]:
-        return {k:list(v) for k, v in self.data[scope].items()}
+        """Read-only live view of the detail -> category lookup."""
+        return MappingProxyType(self.lookups[scope])
+    def data_version(self, scope: Scope) -> int:
+        return self._versions[scope]
+    def categorize(self, details: pd.Series, scope: Scope) -> pd.Series:
+        normalized = details.fillna("").astype(str).str.strip().str.lower()
+        categories = normalized.map(self.lookups[scope]).astype(object)
+        unmatched = categories.isna().to_numpy()
+        if unmatched.any() and self.rules[scope]:
+            matcher = self.matcher(scope)
+            matched = {}
+            for detail in pd.unique(normalized[unmatched]):
+                category = matcher.match(detail)
+                if category is not None:
+                    matched[detail] = category
+            if matched:
+                categories[unmatched] = normalized[unmatched].map(matched)
+        return categories.str.capitalize().fillna("Uncategorized")
+    def matcher(self, scope: Scope) -> RuleMatcher:
+        """The rules of a scope compiled into a RuleMatcher, rebuilt only after the rules change.
+
+        Exact detail matches always win over rules.
+        """
+        if self._matchers.get(scope) is None:
+            self._matchers[scope] = RuleMatcher(self.rules[scope])
+        return self._matchers[scope]
+    def add_rule(self, scope: Scope, category: str, pattern: str, kind: str = "contains") -> None:
+        if kind not in RULE_KINDS:
+            raise ValueError(f"Unknown rule kind '{kind}', expected one of {', '.join(RULE_KINDS)}")
+        pattern = pattern if kind == "regex" else self.normalize_detail(pattern)
+        if not pattern:
+            raise ValueError("Rule pattern must not be empty")
+        c = self.normalize_category(category)
+        rule = {"category": c, "kind": kind, "pattern": pattern}
+        matcher = RuleMatcher(self.rules[scope] + [rule])
+        self.add_category(scope, c)
+        self.rules[scope].append(rule)
+        self._matchers[scope] = matcher
+        self._rules_version += 1
+        self._rules_dirty = True
+        self._log(["r+", scope, c, pattern, kind])
+    def _valid_rules(self, scope: Scope, rules: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Drop stored rules that cannot be compiled, e.g. a hand-edited rules.json."""
+        valid = []
+        for rule in rules:
+            try:
+                if rule.get("kind") not in RULE_KINDS or not rule.get("pattern"):
+                    raise ValueError("unknown kind or empty pattern")
+                RuleMatcher(valid + [rule])
+            except ValueError as e:
+                print(f"Skipping invalid {scope} rule {rule}: {e}")
+                self._rules_dirty = True
+                continue
+            valid.append(rule)
+        return valid
+    def remove_rule(self, scope: Scope, index: int) -> None:
+        self.rules[scope].pop(index)
+        self._matchers[scope] = None
+        self._rules_version += 1
+        self._rules_dirty = True
+        self._log(["r-", scope, index])
+    def get_rules(self, scope: Scope) -> List[Dict[str, str]]:
+        return [dict(r) for r in self.rules[scope]]
+    def model_file(self, scope: Scope) -> str:
+        return f"{self.paths['model']}_{scope}.npz"
+    def classifier(self, scope: Scope) -> MerchantClassifier:
+        """The merchant classifier for ``scope``, loaded from disk or trained from the stored details.
+
+        A saved model is only reused while it was trained on as many labels
+        as the category file holds, so edits made elsewhere trigger a retrain.
+        """
+        if scope not in self.classifiers:
+            labelled = {c: d for c, d in self.data[scope].items() if c != "uncategorized"}
+            n_labels = sum(len(d) for d in labelled.values())
+            model = None
+            path = self.model_file(scope)
+            if os.path.exists(path):
+                try:
+                    model = MerchantClassifier.load(path)
+                except (IOError, ValueError, KeyError) as e:
+                    print(f"Error reading {scope} model: {e}")
+            if model is None or model.n_labels != n_labels:
+                model = MerchantClassifier().fit(labelled)
+                self._models_dirty.add(scope)
+            self.classifiers[scope] = model
+        return self.classifiers[scope]
+    def suggest_categories(self, details: pd.Series, scope: Scope, min_confidence: float = 0.5) -> pd.Series:
+        """Predicted category for each detail that neither the lookup nor a rule categorizes, else None."""
+        suggestions = pd.Series(None, index=details.index, dtype=object)
+        unmatched = (self.categorize(details, scope) == "Uncategorized").to_numpy()
+        if not unmatched.any():
+            return suggestions
+        normalized = details[unmatched].fillna("").astype(str).str.strip().str.lower()
+        uniques = pd.unique(normalized)
+        labels, confidence = self.classifier(scope).predict(uniques)
+        predicted = {
+            detail: label.capitalize()
+            for detail, label, p in zip(uniques, labels, confidence)
+            if label is not None and p >= min_confidence
+        }
+        suggestions[unmatched] = normalized.map(predicted).astype(object)
+        return suggestions.where(suggestions.notna(), None)
+    def categorization_token(self) -> str:
+        """Token for everything categorize() depends on; changes with every edit.
+
+        Until the first edit it is a content hash of the loaded state, so
+        sessions loaded from the same snapshot share cache entries; after that
+        it is that hash plus this store's id and edit counters, so an edit
+        costs no rehashing.
+        """
+        return self._token("categories", self._categorization_versions())
+    def tags_token(self) -> str:
+        return self._token("tags", self._tags_versions())
+    def _categorization_versions(self) -> tuple:
+        return self._versions["categories"], self._versions["income_categories"], self._rules_version
+    def _tags_versions(self) -> tuple:
+        return id(self.tags), self.tags.version
+    def _token(self, name: str, versions: tuple) -> str:
+        loaded, content = self._base_tokens.get(name, ((), ""))
+        if versions == loaded:
+            return content
+        return f"{content}:{self._uid}:{':'.join(str(v) for v in versions)}"
+    @staticmethod
+    def _content_hash(state) -> str:
+        return hashlib.sha1(json.dumps(state, sort_keys=True).encode("utf-8")).hexdigest()
+    def get_data(self, scope: Scope) -> Mapping[str, Tuple[str, ...]]:
+        """Read-only snapshot of ``{category: details}``, rebuilt only after the scope changes."""
+        cached = self._snapshots.get(scope)
+        if cached is None or cached[0] != self._versions[scope]:
+            snapshot = MappingProxyType({k: tuple(v) for k, v in self.data[scope].items()})
+            cached = self._snapshots[scope] = (self._versions[scope], snapshot)
+        return cached[1]
+    def get_data_copy(self, scope: Scope) -> Dict[str, List[str]]:
+        return {k: list(v) for k, v in self.data[scope].items()}
     def add_category(self, scope: Scope, name:str) -> None:
         c = self.normalize_category(name)
         if c not in self.data[scope]:
-            self.data[scope][c] = []
+            self.data[scope][c] = {}
+            self._changed_categories[scope].add(c)
+            self._versions[scope] += 1
             self._dirty = True
+            self._log(["a", scope, c])
     def apply_edits(
             self,
             scope: Scope,
@@ -104,17 +513,32 @@ class CategoryStore:
             if "Category" not in row_changes:
                 continue
             row_index_int = int(rw_idx)
-            detail = self.normalize_detail(current_df.iloc[row_index_int]["Details"])
-            new_category = self.normalize_category(row_changes["Category"])
-            old_category = self.lookups[scope].get(detail)
-            if old_category and detail in self.data[scope].get(old_category):
-                self.data[scope][old_category].remove(detail)
-            if new_category not in self.data[scope]:
-                self.data[scope][new_category] = []
-            if detail not in self.data[scope][new_category]:
-                self.data[scope][new_category].append(detail)
-            self.lookups[scope][detail] = new_category
-            self._dirty = True
+            self.set_category(scope, current_df.iloc[row_index_int]["Details"], row_changes["Category"])
+    def set_category(self, scope: Scope, detail: str, category: str) -> None:
+        """Move ``detail`` to ``category``, updating the lookup and classifier in place."""
+        detail = self.normalize_detail(detail)
+        new_category = self.normalize_category(category)
+        old_category = self.lookups[scope].get(detail)
+        if old_category == new_category:
+            return
+        if old_category:
+            self.data[scope].get(old_category, {}).pop(detail, None)
+        if new_category not in self.data[scope]:
+            self.data[scope][new_category] = {}
+            self._changed_categories[scope].add(new_category)
+        self.data[scope][new_category][detail] = None
+        self.lookups[scope][detail] = new_category
+        self._changed_details[scope].add(detail)
+        self._versions[scope] += 1
+        self._dirty = True
+        self._log(["c", scope, detail, new_category])
+        if scope in self.classifiers:
+            model = self.classifiers[scope]
+            if old_category and old_category != "uncategorized":
+                model.unlearn([detail], [old_category])
+            if new_category != "uncategorized":
+                model.partial_fit([detail], [new_category])
+            self._models_dirty.add(scope)
 
     def rebuild_lookups(self)->None:
         for categorie in self.data.keys():
@@ -125,36 +549,19 @@ class CategoryStore:
     
     def set_current_file(self, filename: str) -> None:
         self.current_file = filename
-        if filename not in self.tags:
-            self.tags[filename] = {}
     
-    def create_tx_id(self, row: pd.Series) -> str:
-        key_parts = [
-            str(row.get("Date", "")),
-            str(row.get("Details", "")),
-            str(row.get("Amount", "")),
-            str(row.get("Description", "")),
-        ]
-        key = "|".join(key_parts)
-        return hashlib.md5(key.encode()).hexdigest()[:12]
-
+    @property
+    def tags_list(self) -> List[str]:
+        return self.tags.tags
     def get_tags(self, tx_id: str) -> List[str]:
-        return self.tags.get(self.current_file, {}).get(tx_id, [])
+        return self.tags.get(tx_id)
     def set_tags(self, tx_id: str, tags: List[str]):
-        if self.current_file is None:
-            raise ValueError("No specified file")
-        if self.current_file not in self.tags:
-            self.tags[self.current_file] = {}
-        self.tags[self.current_file][tx_id] = tags
-        self.rebuild_tags()
+        self.tags.set(tx_id, tags)
+        self._changed_tags.add(tx_id)
         self._tags_dirty = True
+        self._log(["t", tx_id, list(tags)])
     def rebuild_tags(self):
-        tags_set = set()
-        for file_id, tx_id in self.tags.items():
-            for txn_id, tags_list in tx_id.items():
-                tags_set.update(tags_list)
-        tags_list = list(tags_set)
-        self.tags_list = sorted(tags_list)
+        self.tags.rebuild()
     def remove_tag(self, tag: str, tx_id: str):
         current_tags = self.get_tags(tx_id)
         tag_normalized = tag.strip().lower()
@@ -162,18 +569,13 @@ class CategoryStore:
             current_tags.remove(tag_normalized)
             self.set_tags(tx_id, current_tags)
     def get_all_tags(self) -> List[str]:
-        """Return all known tags. If no current file is set, return empty list.
-
-        Tests expect an empty list when no file has been set/loaded.
-        """
-        if self.current_file is None:
-            return []
         return list(self.tags_list)
     def apply_tags_to_df(self, df: pd.DataFrame, filename: str) -> pd.DataFrame:
         self.set_current_file(filename)
         df = df.copy()
-        df["tx_id"] = df.apply(self.create_tx_id, axis=1)
-        df["tags"] = df["tx_id"].apply(self.get_tags)
+        if "tx_id" not in df.columns:
+            df["tx_id"] = make_tx_ids(df)
+        df["tags"] = [self.tags.get(tx_id) for tx_id in df["tx_id"]]
         return df
     def apply_tag_edits(
             self,
@@ -193,7 +595,6 @@ class CategoryStore:
             else:
                 new_tags = []
             self.set_tags(tx_id, new_tags)
-            print(f"STORE TAGS NOW {self.tags} and filename {self.current_file}")
     @staticmethod
     def normalize_category(name: str) -> str:
         return (name or "").strip().lower()
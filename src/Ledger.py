@@ -0,0 +1,160 @@
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+import os
+import time
+import uuid
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+DEFAULT_LEDGER_PATH = os.path.join(os.path.dirname(__file__), "ledger")
+DERIVED_COLUMNS = ("Category", "tags")
+COMPACT_AFTER_PARTS = 32
+
+
+class Ledger:
+    """Parsed transactions persisted as uncompressed Feather files per month, keyed by tx_id.
+
+    Each month is a directory with one part file per append, so streaming a
+    large statement writes every chunk once instead of rewriting the month.
+    Parts are merged once a month holds ``compact_after`` of them. Category
+    and tags are derived from the CategoryStore when the rows are read back,
+    so only the parsed statement columns are stored.
+    """
+
+    def __init__(self, root: str = DEFAULT_LEDGER_PATH, id_col: str = "tx_id", compact_after: int = COMPACT_AFTER_PARTS):
+        self.root = root
+        self.id_col = id_col
+        self.compact_after = compact_after
+        # tx_ids stored per month and the part files they were read from.
+        self._ids: Dict[str, Tuple[Set[str], Set[str]]] = {}
+
+    def partition_path(self, month: str) -> str:
+        return os.path.join(self.root, month)
+
+    def parts(self, month: str) -> List[str]:
+        path = self.partition_path(month)
+        if not os.path.isdir(path):
+            return []
+        return sorted(name for name in os.listdir(path) if name.endswith(".feather"))
+
+    def months(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if self.parts(name))
+
+    def version(self) -> tuple:
+        """Changes whenever a partition is written; cheap enough to check on every rerun."""
+        stats = []
+        for month in self.months():
+            parts = [os.stat(os.path.join(self.partition_path(month), part)) for part in self.parts(month)]
+            stats.append((month, max(stat.st_mtime_ns for stat in parts), sum(stat.st_size for stat in parts)))
+        return tuple(stats)
+
+    def is_empty(self) -> bool:
+        return not self.months()
+
+    def date_range(self) -> Optional[tuple]:
+        months = self.months()
+        if not months:
+            return None
+        first = self._read(months[0], columns=["Date"])["Date"]
+        last = self._read(months[-1], columns=["Date"])["Date"]
+        return first.min(), last.max()
+
+    def append(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Write rows whose tx_id is not stored yet and return them."""
+        if df is None or df.empty:
+            return pd.DataFrame()
+        df = df.drop(columns=[c for c in DERIVED_COLUMNS if c in df.columns])
+        df = df.drop_duplicates(subset=self.id_col)
+        codes, uniques = pd.factorize(pd.to_datetime(df["Date"], errors="coerce").to_numpy(dtype="datetime64[M]"))
+        months = pd.Series(pd.Index(uniques).strftime("%Y-%m").to_numpy(dtype=object)[codes], index=df.index)
+        months[codes < 0] = None
+        if (codes < 0).any():
+            print(f"Skipping {int((codes < 0).sum())} ledger rows with invalid dates")
+        added = []
+        for month, part in df.groupby(months, sort=True):
+            stored = self.stored_ids(month)
+            ids = part[self.id_col].astype(str).to_numpy(dtype=object)
+            part = part[np.fromiter((tx_id not in stored for tx_id in ids), dtype=bool, count=len(ids))]
+            if part.empty:
+                continue
+            name = self._write_part(month, part.reset_index(drop=True))
+            stored.update(part[self.id_col].astype(str).to_numpy(dtype=object))
+            self._ids[month][1].add(name)
+            if len(self.parts(month)) > self.compact_after:
+                self.compact(month)
+            added.append(part)
+        if not added:
+            return pd.DataFrame(columns=df.columns)
+        return pd.concat(added, ignore_index=True)
+
+    def stored_ids(self, month: str) -> Set[str]:
+        """tx_ids stored for ``month``; only parts written by other processes are read."""
+        ids, seen = self._ids.setdefault(month, (set(), set()))
+        parts = set(self.parts(month))
+        if seen - parts:
+            ids.clear()
+            seen.clear()
+        for part in sorted(parts - seen):
+            table = feather.read_table(os.path.join(self.partition_path(month), part), columns=[self.id_col], memory_map=True)
+            ids.update(table.column(0).to_pylist())
+            seen.add(part)
+        return ids
+
+    def compact(self, month: str) -> None:
+        """Merge a month's part files into one."""
+        parts = self.parts(month)
+        if len(parts) < 2:
+            return
+        self._write_part(month, self._read(month))
+        for part in parts:
+            os.remove(os.path.join(self.partition_path(month), part))
+        self._ids.pop(month, None)
+
+    def _write_part(self, month: str, df: pd.DataFrame) -> str:
+        path = self.partition_path(month)
+        os.makedirs(path, exist_ok=True)
+        name = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.feather"
+        tmp_path = os.path.join(path, f"{name}.tmp")
+        feather.write_feather(df, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, os.path.join(path, name))
+        return name
+
+    def load(
+            self,
+            start: Optional[date] = None,
+            end: Optional[date] = None,
+            columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """Read only the monthly partitions overlapping ``start``..``end`` (inclusive)."""
+        first = pd.Timestamp(start).strftime("%Y-%m") if start is not None else None
+        last = pd.Timestamp(end).strftime("%Y-%m") if end is not None else None
+        months = [m for m in self.months() if (first is None or m >= first) and (last is None or m <= last)]
+        if not months:
+            return pd.DataFrame(columns=list(columns) if columns else None)
+        df = pd.concat([self._read(m, columns) for m in months], ignore_index=True)
+        if (start is not None or end is not None) and "Date" in df.columns:
+            dates = pd.to_datetime(df["Date"], errors="coerce")
+            keep = pd.Series(True, index=df.index)
+            if start is not None:
+                keep &= dates >= pd.Timestamp(start)
+            if end is not None:
+                keep &= dates <= pd.Timestamp(end)
+            df = df[keep.to_numpy()].reset_index(drop=True)
+        return df
+
+    def partition(self, month: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """All rows stored for one ``YYYY-MM`` month."""
+        if not self.parts(month):
+            return pd.DataFrame(columns=list(columns) if columns else None)
+        return self._read(month, columns)
+
+    def _read(self, month: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        tables = [
+            feather.read_table(os.path.join(self.partition_path(month), part), columns=list(columns) if columns else None, memory_map=True)
+            for part in self.parts(month)
+        ]
+        return pa.concat_tables(tables, promote_options="default").to_pandas()
@@ -0,0 +1,135 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import os
+import numpy as np
+import pandas as pd
+
+DEFAULT_N_FEATURES = 2 ** 16
+NGRAM_SIZES = (3, 4)
+
+
+def _features(details: Sequence[str], n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Hashed char n-grams and words of each detail as (row, feature) pairs, grouped by row.
+
+    Every detail yields at least one feature so rows are never empty.
+    """
+    rows: List[int] = []
+    grams: List[str] = []
+    for i, detail in enumerate(details):
+        padded = f" {detail} "
+        items = [f"w:{word}" for word in detail.split()] or ["w:"]
+        for n in NGRAM_SIZES:
+            items.extend(padded[j:j + n] for j in range(len(padded) - n + 1))
+        grams.extend(items)
+        rows.extend([i] * len(items))
+    hashes = pd.util.hash_array(np.asarray(grams, dtype=object))
+    return np.asarray(rows, dtype=np.intp), (hashes % np.uint64(n_features)).astype(np.intp)
+
+
+class MerchantClassifier:
+    """Multinomial naive Bayes over hashed character n-grams of transaction details.
+
+    Training only adds (or removes) counts, so labels from edits are learnt
+    one at a time without retraining, and a batch of details is scored with
+    a single gather over the log-probability table.
+    """
+
+    def __init__(self, n_features: int = DEFAULT_N_FEATURES, alpha: float = 0.1):
+        self.n_features = n_features
+        self.alpha = alpha
+        self.classes: List[str] = []
+        self._class_index: Dict[str, int] = {}
+        self.feature_counts = np.zeros((0, n_features), dtype=np.float32)
+        self.doc_counts = np.zeros(0, dtype=np.float64)
+        self._log_probs: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @property
+    def n_labels(self) -> int:
+        return int(self.doc_counts.sum())
+
+    def fit(self, data: Dict[str, Iterable[str]]) -> "MerchantClassifier":
+        """Train from scratch on a ``{category: [details]}`` mapping."""
+        self.classes, self._class_index = [], {}
+        self.feature_counts = np.zeros((0, self.n_features), dtype=np.float32)
+        self.doc_counts = np.zeros(0, dtype=np.float64)
+        details, labels = [], []
+        for category, items in data.items():
+            for detail in items:
+                details.append(detail)
+                labels.append(category)
+        return self.partial_fit(details, labels)
+
+    def partial_fit(self, details: Sequence[str], labels: Sequence[str]) -> "MerchantClassifier":
+        self._update(details, labels, 1.0)
+        return self
+
+    def unlearn(self, details: Sequence[str], labels: Sequence[str]) -> "MerchantClassifier":
+        """Undo an earlier partial_fit, e.g. when a detail is moved to another category."""
+        labels = list(labels)
+        keep = [i for i, label in enumerate(labels) if label in self._class_index]
+        self._update([details[i] for i in keep], [labels[i] for i in keep], -1.0)
+        return self
+
+    def predict(self, details: Sequence[str]) -> Tuple[List[Optional[str]], np.ndarray]:
+        """Return the best category and its probability for each detail."""
+        details = list(details)
+        if not details or not self.n_labels:
+            return [None] * len(details), np.zeros(len(details))
+        priors, log_probs = self._tables()
+        rows, features = _features(details, self.n_features)
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        scores = np.add.reduceat(log_probs[:, features], starts, axis=1).T + priors
+        scores -= scores.max(axis=1, keepdims=True)
+        probs = np.exp(scores)
+        probs /= probs.sum(axis=1, keepdims=True)
+        best = probs.argmax(axis=1)
+        return [self.classes[i] for i in best], probs[np.arange(len(details)), best]
+
+    def save(self, path: str) -> None:
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            classes=np.asarray(self.classes, dtype=str),
+            feature_counts=self.feature_counts,
+            doc_counts=self.doc_counts,
+            params=np.asarray([self.n_features, self.alpha]),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "MerchantClassifier":
+        with np.load(path) as f:
+            n_features, alpha = f["params"]
+            model = cls(n_features=int(n_features), alpha=float(alpha))
+            model.classes = [str(c) for c in f["classes"]]
+            model.feature_counts = f["feature_counts"].astype(np.float32)
+            model.doc_counts = f["doc_counts"].astype(np.float64)
+        model._class_index = {c: i for i, c in enumerate(model.classes)}
+        return model
+
+    def _update(self, details: Sequence[str], labels: Sequence[str], weight: float) -> None:
+        if not len(details):
+            return
+        for label in labels:
+            if label not in self._class_index:
+                self._class_index[label] = len(self.classes)
+                self.classes.append(label)
+        missing = len(self.classes) - len(self.doc_counts)
+        if missing:
+            self.feature_counts = np.vstack([self.feature_counts, np.zeros((missing, self.n_features), dtype=np.float32)])
+            self.doc_counts = np.concatenate([self.doc_counts, np.zeros(missing)])
+        codes = np.asarray([self._class_index[label] for label in labels], dtype=np.intp)
+        rows, features = _features(details, self.n_features)
+        np.add.at(self.feature_counts, (codes[rows], features), weight)
+        np.add.at(self.doc_counts, codes, weight)
+        np.maximum(self.feature_counts, 0, out=self.feature_counts)
+        np.maximum(self.doc_counts, 0, out=self.doc_counts)
+        self._log_probs = None
+
+    def _tables(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._log_probs is None:
+            smoothed = self.feature_counts.astype(np.float64) + self.alpha
+            log_probs = np.log(smoothed) - np.log(smoothed.sum(axis=1, keepdims=True))
+            with np.errstate(divide="ignore"):
+                priors = np.log(self.doc_counts) - np.log(self.doc_counts.sum())
+            self._log_probs = (priors, log_probs.astype(np.float32))
+        return self._log_probs
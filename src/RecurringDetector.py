@@ -0,0 +1,185 @@
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from CategoryStore import CategoryStore
+
+# name -> (typical interval in days, calendar months per step or 0 for fixed-day periods)
+PERIODS: Dict[str, Tuple[float, int]] = {
+    "weekly": (7.0, 0),
+    "biweekly": (14.0, 0),
+    "monthly": (30.44, 1),
+    "quarterly": (91.31, 3),
+    "yearly": (365.25, 12),
+}
+SERIES_COLUMNS = [
+    "count", "first", "last", "interval_days", "interval_cv", "amount", "amount_cv",
+    "period", "period_days", "monthly_cost", "next_expected", "recurring",
+]
+
+
+def series_stats(
+        rows: pd.DataFrame,
+        min_occurrences: int = 3,
+        max_interval_cv: float = 0.25,
+        max_amount_cv: float = 0.25,
+        period_tolerance: float = 0.15,
+) -> pd.DataFrame:
+    """Interval and amount statistics per detail in one groupby pass.
+
+    ``rows`` has ``detail``, ``day`` (datetime64) and ``amount`` columns. A
+    detail is flagged recurring when it occurs at least ``min_occurrences``
+    times, its median interval is within ``period_tolerance`` of one of
+    ``PERIODS`` and both intervals and amounts vary by less than the given
+    coefficients of variation.
+    """
+    if rows.empty:
+        return pd.DataFrame(columns=SERIES_COLUMNS, index=pd.Index([], dtype=object, name="detail"))
+    rows = rows.sort_values(["detail", "day"], kind="stable")
+    details = rows["detail"].to_numpy(dtype=object)
+    days = rows["day"].to_numpy(dtype="datetime64[D]")
+    gaps = np.empty(len(rows), dtype=float)
+    gaps[0] = np.nan
+    gaps[1:] = (days[1:] - days[:-1]).astype(np.int64)
+    gaps[1:][details[1:] != details[:-1]] = np.nan
+    frame = pd.DataFrame({"detail": details, "day": rows["day"].to_numpy(), "gap": gaps, "amount": rows["amount"].to_numpy(dtype=float)})
+    stats = frame.groupby("detail", sort=True).agg(
+        count=("day", "size"),
+        first=("day", "min"),
+        last=("day", "max"),
+        interval_days=("gap", "median"),
+        gap_mean=("gap", "mean"),
+        gap_std=("gap", "std"),
+        amount=("amount", "mean"),
+        amount_std=("amount", "std"),
+    )
+
+    interval = stats["interval_days"].to_numpy(dtype=float)
+    names = np.array(list(PERIODS), dtype=object)
+    lengths = np.array([p[0] for p in PERIODS.values()])
+    months = np.array([p[1] for p in PERIODS.values()])
+    error = np.abs(interval[:, None] - lengths[None, :]) / lengths[None, :]
+    nearest = np.argmin(np.nan_to_num(error, nan=np.inf), axis=1)
+    matched = np.take_along_axis(error, nearest[:, None], axis=1)[:, 0] <= period_tolerance
+
+    gap_mean = stats["gap_mean"].to_numpy(dtype=float)
+    interval_cv = np.divide(
+        stats["gap_std"].fillna(0.0).to_numpy(dtype=float), gap_mean,
+        out=np.full(len(stats), np.inf), where=gap_mean > 0,
+    )
+    amount = stats["amount"].to_numpy(dtype=float)
+    amount_cv = np.divide(
+        stats["amount_std"].fillna(0.0).to_numpy(dtype=float), np.abs(amount),
+        out=np.full(len(stats), np.inf), where=amount != 0,
+    )
+    recurring = (
+        (stats["count"].to_numpy() >= min_occurrences) & matched
+        & (interval_cv <= max_interval_cv) & (amount_cv <= max_amount_cv)
+    )
+
+    # Calendar periods keep the day of month (clamped to the month's length); others add the median interval.
+    last = stats["last"].to_numpy(dtype="datetime64[D]")
+    steps = np.where(matched, months[nearest], 0)
+    month_start = last.astype("datetime64[M]")
+    target = month_start + steps
+    month_length = ((target + 1).astype("datetime64[D]") - target.astype("datetime64[D]")).astype(np.int64)
+    day_of_month = (last - month_start.astype("datetime64[D]")).astype(np.int64)
+    by_month = target.astype("datetime64[D]") + np.minimum(day_of_month, month_length - 1)
+    by_days = last + np.nan_to_num(np.round(interval), nan=0.0).astype(np.int64)
+    next_expected = np.where(steps > 0, by_month, by_days)
+
+    period_days = np.where(matched, lengths[nearest], interval)
+    stats["interval_cv"] = interval_cv
+    stats["amount_cv"] = amount_cv
+    stats["period"] = np.where(matched, names[nearest], None)
+    stats["period_days"] = period_days
+    stats["monthly_cost"] = np.divide(amount * PERIODS["monthly"][0], period_days, out=np.zeros(len(stats)), where=period_days > 0)
+    stats["next_expected"] = pd.to_datetime(next_expected)
+    stats["recurring"] = recurring
+    return stats[SERIES_COLUMNS]
+
+
+class RecurringDetector:
+    """Finds recurring payments (subscriptions, rent, salaries) in the ledger.
+
+    Transactions are grouped by ``CategoryStore.normalize_detail(Details)``.
+    Credits count as negative amounts, so a detail mixing charges and
+    refunds does not look steady and recurring income has a negative cost.
+    ``rows`` keeps one (detail, day, amount) entry per tx_id, so ``update``
+    only recomputes the statistics of details that received new rows, and
+    ``refresh`` only reads the ledger partitions written since the last call.
+    """
+
+    def __init__(
+            self,
+            min_occurrences: int = 3,
+            max_interval_cv: float = 0.25,
+            max_amount_cv: float = 0.25,
+            id_col: str = "tx_id",
+    ):
+        self.min_occurrences = min_occurrences
+        self.max_interval_cv = max_interval_cv
+        self.max_amount_cv = max_amount_cv
+        self.id_col = id_col
+        self.rows = pd.DataFrame(
+            {
+                "detail": pd.Series(dtype=object),
+                "day": pd.Series(dtype="datetime64[ns]"),
+                "amount": pd.Series(dtype=float),
+            },
+            index=pd.Index([], dtype=object, name=id_col),
+        )
+        self.series = series_stats(self.rows)
+        self.version = 0
+        self._partitions: Dict[str, tuple] = {}
+
+    def update(self, df: Optional[pd.DataFrame]) -> int:
+        """Add the rows of ``df`` not seen before and return how many were added."""
+        if df is None or df.empty or self.id_col not in df.columns:
+            return 0
+        ids = df[self.id_col].astype(str).to_numpy(dtype=object)
+        unseen = (self.rows.index.get_indexer(ids) < 0) & ~pd.Index(ids).duplicated()
+        fresh = df[unseen]
+        if fresh.empty:
+            return 0
+        raw = fresh["Details"].fillna("").astype(object)
+        normalized = {d: CategoryStore.normalize_detail(d) for d in pd.unique(raw)}
+        amount = pd.to_numeric(fresh["Amount"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+        if "Debit/Credit" in fresh.columns:
+            amount = np.where(fresh["Debit/Credit"].to_numpy(dtype=object) == "Credit", -amount, amount)
+        added = pd.DataFrame(
+            {
+                "detail": raw.map(normalized).to_numpy(dtype=object),
+                "day": pd.to_datetime(fresh["Date"], errors="coerce").dt.normalize().to_numpy(),
+                "amount": amount,
+            },
+            index=pd.Index(ids[unseen], dtype=object, name=self.id_col),
+        )
+        added = added[added["day"].notna()]
+        if added.empty:
+            return 0
+        self.rows = pd.concat([self.rows, added]) if not self.rows.empty else added
+        affected = pd.unique(added["detail"])
+        recomputed = series_stats(
+            self.rows[self.rows["detail"].isin(affected).to_numpy()],
+            self.min_occurrences, self.max_interval_cv, self.max_amount_cv,
+        )
+        kept = self.series[~self.series.index.isin(affected)]
+        self.series = pd.concat([kept, recomputed]).sort_index() if not kept.empty else recomputed
+        self.version += 1
+        return len(added)
+
+    def refresh(self, ledger) -> int:
+        """Fold in the ledger partitions written since the last refresh, in one update."""
+        changed = [(month, stat) for month, *stat in ledger.version() if self._partitions.get(month) != stat]
+        if not changed:
+            return 0
+        columns = [self.id_col, "Date", "Details", "Amount", "Debit/Credit"]
+        added = self.update(pd.concat([ledger.partition(month, columns=columns) for month, _ in changed], ignore_index=True))
+        self._partitions.update(changed)
+        return added
+
+    def recurring(self) -> pd.DataFrame:
+        """Flagged series, most expensive per month first."""
+        found = self.series[self.series["recurring"].to_numpy(dtype=bool)]
+        return found.sort_values("monthly_cost", key=np.abs, ascending=False)
@@ -0,0 +1,162 @@
+from datetime import date
+from typing import Iterable, Optional
+import numpy as np
+import pandas as pd
+
+from Budget import split_tags
+
+AGG_COLUMNS = ("Amount", "count")
+
+
+def _empty_rollup(level: str) -> pd.DataFrame:
+    index = pd.MultiIndex.from_arrays(
+        [pd.DatetimeIndex([], name="day"), pd.Index([], dtype=object, name=level)]
+    )
+    return pd.DataFrame({"Amount": pd.Series(dtype=float), "count": pd.Series(dtype=np.int64)}, index=index)
+
+
+class Rollups:
+    """Running per-day aggregates of transactions, by category and by tag.
+
+    ``rows`` remembers what each tx_id contributed (day, category, amount,
+    tags), so ``update`` only re-aggregates rows that are new or whose
+    category or tags changed; ``sync`` also subtracts rows that left the
+    frame, so each view can keep a rollup of exactly the rows it shows.
+    Monthly and per-category views are derived from the daily aggregates,
+    so charts built from them scale with the number of days and
+    categories, not with the number of transactions.
+    """
+
+    def __init__(self, id_col: str = "tx_id"):
+        self.id_col = id_col
+        self.rows = pd.DataFrame(
+            {
+                "day": pd.Series(dtype="datetime64[ns]"),
+                "Category": pd.Series(dtype=object),
+                "Amount": pd.Series(dtype=float),
+                "tags": pd.Series(dtype=object),
+            },
+            index=pd.Index([], dtype=object, name=id_col),
+        )
+        self.by_category = _empty_rollup("Category")
+        self.by_tag = _empty_rollup("tag")
+        self.version = 0
+
+    def update(self, df: Optional[pd.DataFrame]) -> int:
+        """Fold ``df`` into the aggregates; returns how many rows changed.
+
+        Rows not in ``df`` are kept, since callers pass uploads and date
+        ranges of the ledger rather than the whole history.
+        """
+        if df is None or df.empty or self.id_col not in df.columns:
+            return 0
+        new = self._contributions(df)
+        seen = new.index.isin(self.rows.index)
+        old = self.rows.reindex(new.index)
+        changed = ~seen
+        for col in ("day", "Category", "Amount", "tags"):
+            changed |= (old[col] != new[col]).to_numpy() & seen
+        if not changed.any():
+            return 0
+        removed = old[changed & seen]
+        added = new[changed]
+        self._apply(removed, -1)
+        self._apply(added, 1)
+        self.rows = pd.concat([self.rows[~self.rows.index.isin(added.index)], added])
+        self.version += 1
+        return int(changed.sum())
+
+    def sync(self, df: Optional[pd.DataFrame]) -> int:
+        """Make the aggregates cover exactly the rows of ``df``: fold in its
+        changes and subtract rows it no longer has. Returns how many rows changed."""
+        changed = self.update(df)
+        if df is None or df.empty or self.id_col not in df.columns:
+            stale = np.ones(len(self.rows), dtype=bool)
+        else:
+            ids = df[self.id_col].astype(str).to_numpy(dtype=object)
+            stale = ~self.rows.index.isin(pd.Index(ids, dtype=object))
+        if stale.any():
+            self._apply(self.rows[stale], -1)
+            self.rows = self.rows[~stale]
+            self.version += 1
+        return changed + int(stale.sum())
+
+    def daily(self, start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+        """Total amount and count per day."""
+        frame = self._between(self.by_category, start, end)
+        return frame.groupby(level="day").sum().reset_index()
+
+    def monthly(self, start: Optional[date] = None, end: Optional[date] = None, by: Optional[str] = "Category") -> pd.DataFrame:
+        """Totals per month, and per category or tag when ``by`` is "Category" or "tag"."""
+        frame = self._between(self.by_tag if by == "tag" else self.by_category, start, end).reset_index()
+        frame["month"] = frame["day"].dt.to_period("M").dt.to_timestamp()
+        keys = ["month"] if by is None else ["month", by]
+        return frame.groupby(keys, as_index=False)[list(AGG_COLUMNS)].sum()
+
+    def category_totals(self, start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+        frame = self._between(self.by_category, start, end)
+        return frame.groupby(level="Category").sum().reset_index()
+
+    def tag_totals(self, start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+        frame = self._between(self.by_tag, start, end)
+        return frame.groupby(level="tag").sum().reset_index()
+
+    def daily_for(self, tx_ids: Iterable[str], start: Optional[date] = None, end: Optional[date] = None) -> pd.Series:
+        """Amount per day over the given transactions (e.g. a budget's), from the stored contributions."""
+        rows = self.rows[self.rows.index.isin(np.asarray(list(tx_ids), dtype=object))]
+        if start is not None:
+            rows = rows[rows["day"] >= pd.Timestamp(start)]
+        if end is not None:
+            rows = rows[rows["day"] <= pd.Timestamp(end)]
+        return rows.groupby("day")["Amount"].sum()
+
+    def span(self) -> Optional[tuple]:
+        if self.by_category.empty:
+            return None
+        days = self.by_category.index.get_level_values("day")
+        return days.min().date(), days.max().date()
+
+    def _contributions(self, df: pd.DataFrame) -> pd.DataFrame:
+        ids = df[self.id_col].astype(str).to_numpy(dtype=object)
+        category = df["Category"] if "Category" in df.columns else pd.Series("", index=df.index)
+        tags = df["tags"] if "tags" in df.columns else pd.Series([()] * len(df), index=df.index)
+        new = pd.DataFrame(
+            {
+                "day": pd.to_datetime(df["Date"], errors="coerce").dt.normalize().to_numpy(),
+                "Category": category.fillna("").astype(str).str.strip().str.lower().to_numpy(dtype=object),
+                "Amount": pd.to_numeric(df["Amount"], errors="coerce").fillna(0.0).to_numpy(dtype=float),
+                "tags": np.array([",".join(sorted(split_tags(t))) for t in tags], dtype=object),
+            },
+            index=pd.Index(ids, dtype=object, name=self.id_col),
+        )
+        new = new[~new.index.duplicated(keep="last")]
+        return new[new["day"].notna()]
+
+    def _apply(self, rows: pd.DataFrame, sign: int) -> None:
+        if rows.empty:
+            return
+        self.by_category = self._merge(self.by_category, rows, "Category", sign)
+        tagged = rows[rows["tags"] != ""]
+        if not tagged.empty:
+            exploded = tagged.assign(tag=tagged["tags"].str.split(",")).explode("tag")
+            self.by_tag = self._merge(self.by_tag, exploded, "tag", sign)
+
+    @staticmethod
+    def _merge(rollup: pd.DataFrame, rows: pd.DataFrame, level: str, sign: int) -> pd.DataFrame:
+        delta = rows.groupby(["day", level]).agg(Amount=("Amount", "sum"), count=("Amount", "size"))
+        delta = delta * sign
+        merged = rollup.add(delta, fill_value=0) if not rollup.empty else delta
+        merged["count"] = merged["count"].astype(np.int64)
+        return merged[merged["count"] != 0].sort_index()
+
+    @staticmethod
+    def _between(rollup: pd.DataFrame, start: Optional[date], end: Optional[date]) -> pd.DataFrame:
+        if start is None and end is None:
+            return rollup
+        days = rollup.index.get_level_values("day")
+        keep = np.ones(len(rollup), dtype=bool)
+        if start is not None:
+            keep &= days >= pd.Timestamp(start)
+        if end is not None:
+            keep &= days <= pd.Timestamp(end)
+        return rollup[keep]
@@ -0,0 +1,196 @@
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+import json
+import os
+import sqlite3
+import threading
+
+from TagIndex import TagIndex
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS categories (
+    scope TEXT NOT NULL,
+    category TEXT NOT NULL,
+    PRIMARY KEY (scope, category)
+);
+CREATE TABLE IF NOT EXISTS category_details (
+    scope TEXT NOT NULL,
+    detail TEXT NOT NULL,
+    category TEXT NOT NULL,
+    PRIMARY KEY (scope, detail)
+);
+CREATE INDEX IF NOT EXISTS category_details_by_category ON category_details (scope, category);
+CREATE TABLE IF NOT EXISTS rules (
+    scope TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    pattern TEXT NOT NULL,
+    PRIMARY KEY (scope, position)
+);
+CREATE TABLE IF NOT EXISTS tags (
+    tx_id TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (tx_id, tag)
+);
+CREATE INDEX IF NOT EXISTS tags_by_tag ON tags (tag);
+CREATE TABLE IF NOT EXISTS budgets (
+    name TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS budget_memberships (
+    budget TEXT NOT NULL,
+    tx_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (budget, tx_id)
+);
+CREATE INDEX IF NOT EXISTS budget_memberships_by_tx ON budget_memberships (tx_id);
+"""
+
+
+class SqliteStorage:
+    """SQLite (WAL mode) persistence for categories, rules, tags and budgets.
+
+    Every write is one transaction touching only the rows passed in, so
+    concurrent sessions can share the database file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def is_empty(self) -> bool:
+        for table in ("categories", "tags", "budgets"):
+            if self.conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+                return False
+        return True
+
+    def load_categories(self) -> Dict[str, Dict[str, Dict[str, None]]]:
+        data: Dict[str, Dict[str, Dict[str, None]]] = {}
+        for scope, category in self.conn.execute("SELECT scope, category FROM categories ORDER BY rowid"):
+            data.setdefault(scope, {})[category] = {}
+        rows = self.conn.execute("SELECT scope, detail, category FROM category_details ORDER BY rowid")
+        for scope, detail, category in rows:
+            data.setdefault(scope, {}).setdefault(category, {})[detail] = None
+        return data
+
+    def load_rules(self) -> Dict[str, List[Dict[str, str]]]:
+        rules: Dict[str, List[Dict[str, str]]] = {}
+        rows = self.conn.execute("SELECT scope, category, kind, pattern FROM rules ORDER BY scope, position")
+        for scope, category, kind, pattern in rows:
+            rules.setdefault(scope, []).append({"category": category, "kind": kind, "pattern": pattern})
+        return rules
+
+    def load_tags(self) -> Dict[str, List[str]]:
+        tags: Dict[str, List[str]] = {}
+        for tx_id, tag in self.conn.execute("SELECT tx_id, tag FROM tags ORDER BY tx_id, position"):
+            tags.setdefault(tx_id, []).append(tag)
+        return tags
+
+    def save_categories(
+            self,
+            categories: Iterable[Tuple[str, str]] = (),
+            details: Iterable[Tuple[str, str, str]] = (),
+            rules: Optional[Mapping[str, List[Mapping[str, str]]]] = None,
+            tags: Optional[Mapping[str, List[str]]] = None,
+    ) -> None:
+        """Upsert changed ``(scope, category)`` and ``(scope, detail, category)`` rows,
+        replace the rules of the given scopes and the tags of the given tx_ids."""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO categories (scope, category) VALUES (?, ?)", list(categories)
+            )
+            self.conn.executemany(
+                "INSERT INTO category_details (scope, detail, category) VALUES (?, ?, ?) "
+                "ON CONFLICT (scope, detail) DO UPDATE SET category = excluded.category",
+                list(details),
+            )
+            for scope, scope_rules in (rules or {}).items():
+                self.conn.execute("DELETE FROM rules WHERE scope = ?", (scope,))
+                self.conn.executemany(
+                    "INSERT INTO rules (scope, position, category, kind, pattern) VALUES (?, ?, ?, ?, ?)",
+                    [(scope, i, r["category"], r["kind"], r["pattern"]) for i, r in enumerate(scope_rules)],
+                )
+            if tags:
+                self.conn.executemany("DELETE FROM tags WHERE tx_id = ?", [(tx_id,) for tx_id in tags])
+                self.conn.executemany(
+                    "INSERT INTO tags (tx_id, tag, position) VALUES (?, ?, ?)",
+                    [(tx_id, tag, i) for tx_id, tx_tags in tags.items() for i, tag in enumerate(tx_tags)],
+                )
+
+    def load_budgets(self) -> Dict[str, dict]:
+        budgets = {name: json.loads(data) for name, data in self.conn.execute("SELECT name, data FROM budgets ORDER BY rowid")}
+        for budget in budgets.values():
+            budget["tx_ids"] = []
+        rows = self.conn.execute("SELECT budget, tx_id FROM budget_memberships ORDER BY budget, position")
+        for name, tx_id in rows:
+            if name in budgets:
+                budgets[name]["tx_ids"].append(tx_id)
+        return budgets
+
+    def save_budget(self, name: str, serial: Mapping) -> None:
+        """Upsert one budget and insert/delete only the memberships that changed."""
+        data = {k: v for k, v in serial.items() if k != "tx_ids"}
+        tx_ids = list(dict.fromkeys(serial.get("tx_ids") or []))
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO budgets (name, data) VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET data = excluded.data",
+                (name, json.dumps(data, default=str)),
+            )
+            stored = dict(self.conn.execute(
+                "SELECT tx_id, position FROM budget_memberships WHERE budget = ?", (name,)
+            ).fetchall())
+            wanted = set(tx_ids)
+            self.conn.executemany(
+                "DELETE FROM budget_memberships WHERE budget = ? AND tx_id = ?",
+                [(name, tx_id) for tx_id in stored if tx_id not in wanted],
+            )
+            next_position = max(stored.values(), default=-1) + 1
+            self.conn.executemany(
+                "INSERT INTO budget_memberships (budget, tx_id, position) VALUES (?, ?, ?)",
+                [(name, tx_id, next_position + i) for i, tx_id in enumerate(t for t in tx_ids if t not in stored)],
+            )
+
+    def delete_budget(self, name: str) -> None:
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM budget_memberships WHERE budget = ?", (name,))
+            self.conn.execute("DELETE FROM budgets WHERE name = ?", (name,))
+
+    def import_json(
+            self,
+            categories_path: Optional[str] = None,
+            income_categories_path: Optional[str] = None,
+            tags_path: Optional[str] = None,
+            rules_path: Optional[str] = None,
+            budgets_path: Optional[str] = None,
+    ) -> None:
+        """Copy existing JSON stores into the database; missing files are skipped."""
+        categories, details = [], []
+        for scope, path in (("categories", categories_path), ("income_categories", income_categories_path)):
+            for category, items in (_read_json(path) or {}).items():
+                c = (category or "").strip().lower()
+                categories.append((scope, c))
+                details.extend((scope, (d or "").strip().lower(), c) for d in items)
+        rules = _read_json(rules_path)
+        tags = TagIndex.from_dict(_read_json(tags_path) or {}).to_dict()
+        self.save_categories(categories, details, rules=rules, tags=tags)
+        budgets = _read_json(budgets_path) or {}
+        if isinstance(budgets, list):
+            budgets = {(d.get("name") or f"budget_{i}"): d for i, d in enumerate(budgets)}
+        for name, serial in budgets.items():
+            self.save_budget(serial.get("name") or name, serial)
+
+
+def _read_json(path: Optional[str]):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
@@ -0,0 +1,118 @@
+from collections import OrderedDict
+from typing import Hashable, Iterable, Optional, Tuple
+import hashlib
+import os
+import threading
+import pandas as pd
+import pyarrow.feather as feather
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def frame_bytes(*frames: Optional[pd.DataFrame]) -> int:
+    return int(sum(f.memory_usage(index=True, deep=True).sum() for f in frames if f is not None))
+
+
+class StatementCache:
+    """Content-addressed LRU cache of parsed and processed statements.
+
+    Two layers share one byte budget. ``parsed`` holds the raw statement
+    frame per file hash. ``processed`` holds the categorized and tagged
+    (expenses, income) pair per (file hash, categorization token, tags token).
+    A rules or tag change therefore only misses the processed layer. Parsed
+    frames evicted from memory are spilled to Feather files in ``spill_dir``
+    when one is given.
+
+    Frames are handed out as shallow copies. Under copy-on-write, callers
+    may add or assign columns without touching the cached frames.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, spill_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[object, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(contents: Iterable[bytes], bank_format: Optional[str] = None) -> str:
+        digest = hashlib.sha256((bank_format or "").encode("utf-8"))
+        for data in contents:
+            digest.update(hashlib.sha256(data).digest())
+        return digest.hexdigest()
+
+    def get_parsed(self, key: str) -> Optional[pd.DataFrame]:
+        df = self._get(("parsed", key))
+        if df is None and self.spill_dir:
+            path = self._spill_path(key)
+            if os.path.exists(path):
+                df = feather.read_feather(path)
+                self._put(("parsed", key), df, frame_bytes(df))
+                self.misses -= 1
+                self.hits += 1
+        return None if df is None else df.copy(deep=False)
+
+    def put_parsed(self, key: str, df: pd.DataFrame) -> None:
+        self._put(("parsed", key), df, frame_bytes(df))
+
+    def get_processed(self, key: str, token: str) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+        frames = self._get(("processed", key, token))
+        if frames is None:
+            return None
+        return tuple(None if f is None else f.copy(deep=False) for f in frames)
+
+    def put_processed(self, key: str, token: str, frames: Tuple[pd.DataFrame, pd.DataFrame]) -> None:
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == "processed" and k[1] == key and k[2] != token]
+            for k in stale:
+                self.nbytes -= self._entries.pop(k)[1]
+        self._put(("processed", key, token), tuple(frames), frame_bytes(*frames))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def _get(self, entry_key: Hashable):
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(entry_key)
+            self.hits += 1
+            return entry[0]
+
+    def _put(self, entry_key: Hashable, value, nbytes: int) -> None:
+        if nbytes > self.max_bytes:
+            return
+        evicted = []
+        with self._lock:
+            if entry_key in self._entries:
+                self.nbytes -= self._entries.pop(entry_key)[1]
+            self._entries[entry_key] = (value, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                old_key, (old_value, old_bytes) = self._entries.popitem(last=False)
+                self.nbytes -= old_bytes
+                evicted.append((old_key, old_value))
+        for old_key, old_value in evicted:
+            if old_key[0] == "parsed" and self.spill_dir:
+                self._spill(old_key[1], old_value)
+
+    def _spill(self, key: str, df: pd.DataFrame) -> None:
+        path = self._spill_path(key)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            feather.write_feather(df.reset_index(drop=True), tmp_path, compression="uncompressed")
+            os.replace(tmp_path, path)
+        except (IOError, ValueError) as e:
+            print(f"Error spilling statement {key[:12]} to disk: {e}")
+
+    def _spill_path(self, key: str) -> str:
+        return os.path.join(self.spill_dir, f"{key}.feather")
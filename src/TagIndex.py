@@ -0,0 +1,89 @@
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+
+class TagIndex:
+    """Tags keyed on tx_id with a tag -> tx_ids inverted index.
+
+    Setting the tags of one transaction only touches the tags that changed,
+    and the sorted tag list is rebuilt only when a tag appears or disappears.
+    """
+
+    def __init__(self, tags: Optional[Mapping[str, Iterable[str]]] = None):
+        self.by_tx: Dict[str, Tuple[str, ...]] = {}
+        self.by_tag: Dict[str, Set[str]] = {}
+        self._sorted: Optional[List[str]] = None
+        self.version = 0
+        for tx_id, tx_tags in (tags or {}).items():
+            self.set(tx_id, tx_tags)
+
+    def __len__(self) -> int:
+        return len(self.by_tx)
+
+    def __contains__(self, tx_id: str) -> bool:
+        return tx_id in self.by_tx
+
+    @property
+    def tags(self) -> List[str]:
+        if self._sorted is None:
+            self._sorted = sorted(self.by_tag)
+        return self._sorted
+
+    def count(self, tag: str) -> int:
+        return len(self.by_tag.get(tag, ()))
+
+    def get(self, tx_id: str) -> List[str]:
+        return list(self.by_tx.get(tx_id, ()))
+
+    def set(self, tx_id: str, tags: Iterable[str]) -> None:
+        new = tuple(dict.fromkeys(tags))
+        old = self.by_tx.get(tx_id, ())
+        if new == old:
+            return
+        self.version += 1
+        for tag in set(old).difference(new):
+            ids = self.by_tag[tag]
+            ids.discard(tx_id)
+            if not ids:
+                del self.by_tag[tag]
+                self._sorted = None
+        for tag in set(new).difference(old):
+            if tag not in self.by_tag:
+                self.by_tag[tag] = set()
+                self._sorted = None
+            self.by_tag[tag].add(tx_id)
+        if new:
+            self.by_tx[tx_id] = new
+        else:
+            self.by_tx.pop(tx_id, None)
+
+    def rebuild(self) -> None:
+        """Recompute the inverted index from the per-transaction tags."""
+        by_tx, self.by_tx, self.by_tag = self.by_tx, {}, {}
+        self._sorted = None
+        self.version += 1
+        for tx_id, tags in by_tx.items():
+            self.set(tx_id, tags)
+
+    def tx_ids_with(self, tag: str) -> Set[str]:
+        return self.by_tag.get(tag, set())
+
+    def tx_ids_with_any(self, tags: Iterable[str]) -> Set[str]:
+        found: Set[str] = set()
+        for tag in tags:
+            found |= self.by_tag.get(tag, set())
+        return found
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        return {tx_id: list(tags) for tx_id, tags in self.by_tx.items()}
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "TagIndex":
+        """Load ``{tx_id: [tags]}``, merging the legacy ``{filename: {tx_id: [tags]}}`` layout."""
+        index = cls()
+        for key, value in (data or {}).items():
+            if isinstance(value, dict):
+                for tx_id, tags in value.items():
+                    index.set(tx_id, index.get(tx_id) + list(tags))
+            else:
+                index.set(key, index.get(key) + list(value))
+        return index
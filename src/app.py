@@ -1,15 +1,18 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from Budget import Budget, BudgetLine
 from BudgetManager import BudgetManager
 from functions import (
     load_transactions,
-    assign_category,
     edit_rows_wrapper,
     initialize_session_state,
     create_df_from_file,
+    create_df_from_files,
+    create_df_from_ledger,
+    pop_changed_tx_ids,
 )
 from constants import (
     STORE_KEY,
@@ -17,8 +20,18 @@ from constants import (
     CREATING_BUDGET_KEY,
     DF_EXPENSES_KEY,
     DF_INCOME_KEY,
+    LEDGER_KEY,
+    ROLLUPS_KEY,
+    RECURRING_KEY,
+    ANOMALIES_KEY,
+    EDITOR_GENERATION_KEY,
+    HISTORY_RANGE_KEY,
 )
-from CategoryStore import CategoryStore
+from CategoryStore import CategoryStore, RULE_KINDS
+from parsers import get_format, list_formats
+from render import frame_version, set_frame_version, memoize, unchanged, mark
+from paging import PageQuery, DEFAULT_PAGE_SIZE, PAGE_SIZES, SORT_COLUMNS, page_count, slice_page, view_of
+from dataclasses import replace
 
 def load_page():
     st.set_page_config(
@@ -47,6 +60,7 @@ def manage_budgets_sidebar():
     budgets = manager.get_budgets()
     if budgets:
         st.sidebar.subheader("Active Budgets")
+        forecasts = manager.forecast()
         for name, budget in budgets.items():
             with st.sidebar.expander(f"💰 {budget.name}"):
                 summary = budget.summary()
@@ -55,6 +69,14 @@ def manage_budgets_sidebar():
                 st.write(f"**Spent:** ${summary.get('total_spent', 0):,.2f}")
                 remaining = budget.limit - summary.get('total_spent', 0)
                 st.write(f"**Remaining:** ${remaining:,.2f}")
+                forecast = forecasts.get(name)
+                if forecast:
+                    st.write(f"**Burn rate:** ${forecast['daily_burn']:,.2f}/day")
+                    st.write(f"**Projected spend:** ${forecast['projected_spend']:,.2f}")
+                    if forecast["exhaustion_date"] is not None:
+                        st.write(f"**Runs out:** {forecast['exhaustion_date']}")
+                    else:
+                        st.caption("On track to stay within the limit")
                 
                 if st.button("🗑️ Delete", key=f"delete_budget_{name}"):
                     manager.budgets.pop(name, None)
@@ -137,11 +159,7 @@ def create_budget_form():
                             exclude_tags=tuple(tags_exclude) if tags_exclude else (),
                         ))
                 if st.session_state[DF_EXPENSES_KEY] is not None:
-                    for _, row in st.session_state[DF_EXPENSES_KEY].iterrows():
-                        new_budget.add_transaction(row)
-                
-                if not new_budget.transactions.empty and "tx_id" in new_budget.transactions.columns:
-                    new_budget.tx_ids = new_budget.transactions["tx_id"].astype(str).tolist()
+                    new_budget.evaluate(st.session_state[DF_EXPENSES_KEY])
 
                 st.session_state[BUDGETS_KEY].add_or_update_budget(new_budget)
                 st.session_state[BUDGETS_KEY].save_budget(new_budget)
@@ -163,14 +181,13 @@ def apply_budgets_to_transactions(df_expenses):
         return
 
     budgets = list(budgets_dict.values())
-    for b in budgets:
-        b.transactions = pd.DataFrame()
-
     st.subheader("📈 Budget Summary")
 
-    for _, row in df_expenses.iterrows():
-        for b in budgets:
-            b.add_transaction(row)
+    changed_ids = pop_changed_tx_ids(df_expenses)
+    version = frame_version(df_expenses)
+    if changed_ids or not unchanged("budget_sync", (version, manager.version())):
+        manager.sync_transactions(df_expenses, changed_ids=changed_ids)
+        mark("budget_sync", (version, manager.version()))
 
     if not budgets:
         return
@@ -223,24 +240,40 @@ def display_expenses_tab(df_expenses):
                 st.success(f"Category '{category_text}' added!")
                 st.rerun()
         if st.button("💾 Save Changes", key="save_category_changes"):
-            st.session_state[STORE_KEY].save_all()
+            st.session_state[STORE_KEY].flush()
             st.success("Changes saved successfully!")
-    df_expenses["tags"] = df_expenses["tags"].apply(
+    display_rules_expander(df_expenses)
+    display_anomalies(df_expenses)
+    store = st.session_state[STORE_KEY]
+    version = frame_version(df_expenses)
+    query = page_controls(df_expenses, "expenses", store.get_options(scope="categories"), store.tags_list)
+    page, query, editor_key = editor_page(df_expenses, query, version, "data-editor", store.tags)
+    page["Suggested"] = memoize(
+        "expense_suggestions",
+        (version, query, store.categorization_token()),
+        lambda: store.suggest_categories(page["Details"], "categories"),
+    )
+    page["tags"] = page["tags"].apply(
         lambda x: ", ".join(x) if isinstance(x, (list, tuple)) else (x or "")
     )
-    df_expenses_edited = st.data_editor(
-        df_expenses,
+    st.data_editor(
+        page,
         hide_index=True,
         column_config={
             "Category": st.column_config.SelectboxColumn(
                 "Category",
                 help="Select Category",
                 width="medium",
-                options=[k.capitalize() for k in st.session_state[STORE_KEY].get_options(scope="categories")],
+                options=[k.capitalize() for k in store.get_options(scope="categories")],
                 required=True,
             ),
             "tx_id": None,
             "Status": None,
+            "Suggested": st.column_config.TextColumn(
+                "Suggested",
+                help="Category suggested from similar merchants you already categorized",
+                disabled=True,
+            ),
            "tags": st.column_config.TextColumn(
                 "Tags",
                 help="Enter comma-separated tags (e.g. groceries, food)",
@@ -250,25 +283,62 @@ def display_expenses_tab(df_expenses):
         on_change=edit_rows_wrapper,
         args=(
             "categories",
-            df_expenses,
-            st.session_state[STORE_KEY],
-            "data-editor"
+            page,
+            store,
+            editor_key,
+            DF_EXPENSES_KEY,
         ),
-        key="data-editor",
+        key=editor_key,
     )
     
-    st.session_state[DF_EXPENSES_KEY] = df_expenses_edited
+    st.session_state[DF_EXPENSES_KEY] = df_expenses
     
-    if not df_expenses_edited.empty:
-        fig = px.pie(
-            df_expenses_edited,
-            values="Amount",
-            names="Category",
-            title="Expenses by Category",
-            hole=0.3
+    if not df_expenses.empty:
+        rollups = rollup_for("expenses", df_expenses)
+        fig = memoize(
+            "expenses_pie",
+            rollups.version,
+            lambda: category_pie(rollups.category_totals(), "Expenses by Category"),
         )
         st.plotly_chart(fig, use_container_width=True)
 
+def display_rules_expander(df_expenses):
+    store = st.session_state[STORE_KEY]
+    with st.expander("🧩 Pattern Rules"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            pattern = st.text_input("Pattern", placeholder="e.g., amazon", key="rule-pattern")
+        with col2:
+            kind = st.selectbox("Match", RULE_KINDS, index=RULE_KINDS.index("contains"), key="rule-kind")
+        with col3:
+            category = st.selectbox(
+                "Category",
+                [k.capitalize() for k in store.get_options(scope="categories")],
+                key="rule-category",
+            )
+        if st.button("➕ Add Rule", key="add_rule_button") and pattern and category:
+            try:
+                store.add_rule("categories", category, pattern, kind)
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                uncategorized = (df_expenses["Category"] == "Uncategorized").to_numpy()
+                categories = df_expenses["Category"].to_numpy(dtype=object, copy=True)
+                categories[uncategorized] = store.categorize(
+                    df_expenses.loc[uncategorized, "Details"], "categories"
+                ).to_numpy(dtype=object)
+                st.session_state[DF_EXPENSES_KEY] = set_frame_version(
+                    df_expenses.assign(Category=categories),
+                    (frame_version(df_expenses), store.categorization_token()),
+                )
+                st.rerun()
+        for i, rule in enumerate(store.get_rules("categories")):
+            col1, col2 = st.columns([4, 1])
+            col1.write(f"{rule['kind']} `{rule['pattern']}` → {rule['category'].capitalize()}")
+            if col2.button("🗑️", key=f"remove_rule_{i}"):
+                store.remove_rule("categories", i)
+                st.rerun()
+
 def display_income_tab(df_income):
     st.subheader("💵 Income Transactions")
     
@@ -290,67 +360,284 @@ def display_income_tab(df_income):
                 st.rerun()
     with col2:
         if st.button("💾 Save Changes", key="save_income_category_changes"):
-            st.session_state[STORE_KEY].save_all()
+            st.session_state[STORE_KEY].flush()
             st.success("Changes saved successfully!")
-            st.session_state[STORE_KEY].load_all()
     
-    df_income_edited = st.data_editor(
-        df_income,
+    store = st.session_state[STORE_KEY]
+    version = frame_version(df_income)
+    query = page_controls(df_income, "income", store.get_options(scope="income_categories"))
+    page, query, editor_key = editor_page(df_income, query, version, "income-editor")
+    st.data_editor(
+        page,
         hide_index=True,
         column_config={
             "Category": st.column_config.SelectboxColumn(
                 "Category",
                 help="Select Category",
                 width="medium",
-                options=[k.capitalize() for k in st.session_state[STORE_KEY].get_options(scope="income_categories")],
+                options=[k.capitalize() for k in store.get_options(scope="income_categories")],
                 required=True,
-            )
+            ),
+            "tx_id": None,
         },
         on_change=edit_rows_wrapper,
         args=(
             "income_categories",
-            df_income,
-            st.session_state[STORE_KEY],
-            "income-editor"
+            page,
+            store,
+            editor_key,
+            DF_INCOME_KEY,
+            ("Category",),
         ),
-        key="income-editor",
+        key=editor_key,
     )
     
-    st.session_state[DF_INCOME_KEY] = df_income_edited
+    st.session_state[DF_INCOME_KEY] = df_income
     
-    if not df_income_edited.empty:
-        fig_income = px.pie(
-            df_income_edited,
-            values="Amount",
-            names="Category",
-            title="Income by Category",
-            hole=0.3
+    if not df_income.empty:
+        rollups = rollup_for("income", df_income)
+        fig_income = memoize(
+            "income_pie",
+            rollups.version,
+            lambda: category_pie(rollups.category_totals(), "Income by Category"),
         )
         st.plotly_chart(fig_income, use_container_width=True)
 
+def page_controls(df, prefix, categories, tags=()):
+    """Filter, sort and page widgets for a transactions editor; returns the PageQuery they describe."""
+    col1, col2, col3, col4, col5 = st.columns([3, 2, 2, 1, 1])
+    with col1:
+        selected = st.multiselect("Categories", [c.capitalize() for c in categories], key=f"{prefix}-filter-categories")
+    with col2:
+        tag = st.selectbox("Tag", ["All"] + list(tags), key=f"{prefix}-filter-tag") if tags else "All"
+    with col3:
+        sort_by = st.selectbox("Sort by", [c for c in SORT_COLUMNS if c in df.columns], key=f"{prefix}-sort")
+    with col4:
+        ascending = st.checkbox("Ascending", key=f"{prefix}-ascending")
+    with col5:
+        page_size = st.selectbox("Rows", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE), key=f"{prefix}-page-size")
+    return PageQuery(
+        categories=tuple(selected),
+        tag=None if tag == "All" else tag,
+        sort_by=sort_by,
+        ascending=ascending,
+        page_size=page_size,
+    )
+
+def editor_page(df, query, version, prefix, tag_index=None):
+    """The visible page of ``df`` for ``query``, the query pointing at that page
+    and a data_editor key unique to it.
+
+    Filtering and sorting are memoized on the frame version, so paging
+    through a large frame only slices it. The key also carries the editor
+    generation, which ``edit_rows_wrapper`` bumps once it has applied an
+    edit, so positional edits never outlive the page they were made on.
+    """
+    view = memoize(f"{prefix}-view", (version, query), lambda: view_of(df, query, tag_index))
+    n_pages = page_count(len(view), query.page_size)
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        page_number = st.number_input("Page", min_value=1, max_value=n_pages, value=1, key=f"{prefix}-page-{query.key}")
+    with col2:
+        st.caption(f"{len(view):,} transactions, page {page_number} of {n_pages}")
+    query = replace(query, page=int(page_number) - 1)
+    generation = st.session_state[EDITOR_GENERATION_KEY]
+    return slice_page(view, query), query, f"{prefix}-{query.key}-{generation}"
+
+def rollup_for(scope, df):
+    """The session's rollups for ``scope``, synced to cover exactly the rows of ``df``.
+
+    Syncing is skipped while ``df``'s version is unchanged, so charts drawn
+    from the rollups do no per-transaction work on idle reruns.
+    """
+    rollups = st.session_state[ROLLUPS_KEY][scope]
+    if not unchanged(f"{scope}_rollup", frame_version(df)):
+        rollups.sync(df)
+        mark(f"{scope}_rollup", frame_version(df))
+    return rollups
+
+def category_pie(totals, title):
+    return px.pie(totals, values="Amount", names=totals["Category"].str.capitalize(), title=title, hole=0.3)
+
+def trend_chart(expenses, income=None):
+    frames = [expenses.monthly(by=None).assign(Type="Expenses")]
+    if income is not None:
+        frames.append(income.monthly(by=None).assign(Type="Income"))
+    monthly = pd.concat(frames, ignore_index=True)
+    return px.line(monthly, x="month", y="Amount", color="Type", markers=True, title="Monthly totals")
+
+def category_bars(rollups):
+    monthly = rollups.monthly()
+    monthly["Category"] = monthly["Category"].str.capitalize()
+    return px.bar(monthly, x="month", y="Amount", color="Category", barmode="stack", title="Monthly expenses by category")
+
+def tag_bars(rollups):
+    totals = rollups.tag_totals().sort_values("Amount", ascending=False)
+    return px.bar(totals, x="tag", y="Amount", title="Expenses by tag")
+
+def burn_down(rollups, budget):
+    days = pd.date_range(budget.start_date, budget.end_date, freq="D")
+    spent = rollups.daily_for(budget.tx_ids, budget.start_date, budget.end_date)
+    spent = spent.reindex(days, fill_value=0.0).cumsum()
+    frame = pd.DataFrame({
+        "day": days,
+        "Remaining": budget.limit - spent.to_numpy(),
+        "Target": np.linspace(budget.limit, 0.0, len(days)),
+    })
+    return px.line(frame, x="day", y=["Remaining", "Target"], title=f"{budget.name} burn-down")
+
+def display_trends(df_expenses, df_income):
+    if df_expenses is None or df_expenses.empty:
+        st.info("No expenses to chart yet")
+        return
+    expenses = rollup_for("expenses", df_expenses)
+    income = None
+    if df_income is not None and not df_income.empty:
+        income = rollup_for("income", df_income)
+
+    trend_inputs = (expenses.version, getattr(income, "version", None))
+    st.plotly_chart(
+        memoize("trend_chart", trend_inputs, lambda: trend_chart(expenses, income)),
+        use_container_width=True,
+    )
+    st.plotly_chart(
+        memoize("category_bars", expenses.version, lambda: category_bars(expenses)),
+        use_container_width=True,
+    )
+    if not expenses.by_tag.empty:
+        st.plotly_chart(
+            memoize("tag_bars", expenses.version, lambda: tag_bars(expenses)),
+            use_container_width=True,
+        )
+
+    # Budgets rehydrated from the ledger may cover rows outside the frame on screen,
+    # so burn-downs come from a rollup of the budgets' own transactions.
+    budget_rollups = st.session_state[ROLLUPS_KEY]["budgets"]
+    manager = st.session_state.get(BUDGETS_KEY)
+    for name, budget in (manager.get_budgets() if manager is not None else {}).items():
+        if not unchanged(f"budget_rollup_{name}", budget.revision):
+            budget_rollups.update(budget.transactions)
+            mark(f"budget_rollup_{name}", budget.revision)
+        fig = memoize(
+            f"burn_down_{name}",
+            (budget.revision, budget_rollups.version),
+            lambda: burn_down(budget_rollups, budget),
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+def display_anomalies(df_expenses):
+    """Charges far above what is usual for their merchant or category, scored as statements reach the ledger."""
+    detector = st.session_state[ANOMALIES_KEY]
+    detector.refresh(st.session_state[LEDGER_KEY], store=st.session_state[STORE_KEY])
+    flagged = memoize(
+        "anomalies",
+        (frame_version(df_expenses), detector.version),
+        lambda: detector.flagged_in(df_expenses),
+    )
+    if flagged.empty:
+        return
+    with st.expander(f"⚠️ {len(flagged)} unusual charges"):
+        st.dataframe(
+            pd.DataFrame({
+                "Date": flagged["Date"],
+                "Details": flagged["Details"],
+                "Amount": flagged["Amount"].round(2),
+                "Typical": flagged["typical"].round(2),
+                "Compared with": flagged["level"],
+                "Score": flagged["score"].round(1),
+            }),
+            hide_index=True,
+            use_container_width=True,
+        )
+
+def recurring_table(found):
+    table = found.reset_index()
+    return pd.DataFrame({
+        "Details": table["detail"],
+        "Type": np.where(table["amount"] < 0, "Income", "Payment"),
+        "Every": table["period"],
+        "Amount": table["amount"].abs().round(2),
+        "Per month": table["monthly_cost"].abs().round(2),
+        "Seen": table["count"],
+        "Last": table["last"].dt.date,
+        "Next expected": table["next_expected"].dt.date,
+    })
+
+def display_recurring():
+    """Recurring payments found across the whole ledger, refreshed from partitions written since the last rerun."""
+    detector = st.session_state[RECURRING_KEY]
+    detector.refresh(st.session_state[LEDGER_KEY])
+    found = detector.recurring()
+    if found.empty:
+        st.info("No recurring payments found in the ledger yet")
+        return
+    monthly = found["monthly_cost"]
+    col1, col2 = st.columns(2)
+    col1.metric("Recurring payments per month", f"${monthly[monthly > 0].sum():,.2f}")
+    col2.metric("Recurring income per month", f"${-monthly[monthly < 0].sum():,.2f}")
+    table = memoize("recurring_table", detector.version, lambda: recurring_table(found))
+    st.dataframe(table, hide_index=True, use_container_width=True)
+
 def display_transactions(df_expenses, df_income):
     st.header("📊 Transactions")
     
-    tab1, tab2 = st.tabs(["💳 Expenses (Debits)", "💵 Income (Credits)"])
+    tab1, tab2, tab3, tab4 = st.tabs(["💳 Expenses (Debits)", "💵 Income (Credits)", "📈 Trends", "🔁 Recurring"])
     
     with tab1:
         display_expenses_tab(df_expenses)
     
     with tab2:
         display_income_tab(df_income)
+    
+    with tab3:
+        display_trends(st.session_state.get(DF_EXPENSES_KEY), st.session_state.get(DF_INCOME_KEY))
+    
+    with tab4:
+        display_recurring()
 
 def main():
     load_page()
     initialize_session_state()
     manage_budgets_sidebar()  
-    uploaded_transactions = st.file_uploader(
-        "📁 Upload your CSV transactions file",
-        type=['csv']
+    uploaded_files = st.file_uploader(
+        "📁 Upload your CSV transactions files",
+        type=['csv'],
+        accept_multiple_files=True,
     )
-    if uploaded_transactions is not None:
-        df_expenses, df_income = create_df_from_file(uploaded_transactions)
-        apply_budgets_to_transactions(df_expenses)
-        display_transactions(df_expenses, df_income)
+    format_name = st.selectbox(
+        "Statement format",
+        options=["Auto-detect"] + list_formats(),
+        help="Detected from the CSV header row unless you pick one",
+    )
+    bank_format = None if format_name == "Auto-detect" else get_format(format_name)
+    if uploaded_files:
+        st.session_state[HISTORY_RANGE_KEY] = None
+        if len(uploaded_files) == 1:
+            df_expenses, df_income = create_df_from_file(uploaded_files[0], bank_format=bank_format)
+        else:
+            df_expenses, df_income = create_df_from_files(uploaded_files, bank_format=bank_format)
+        if df_expenses is not None:
+            apply_budgets_to_transactions(df_expenses)
+            display_transactions(df_expenses, df_income)
+    elif not st.session_state[LEDGER_KEY].is_empty():
+        first, last = st.session_state[LEDGER_KEY].date_range()
+        history = st.date_input(
+            "📚 Show saved transactions between",
+            value=(max(first, last - timedelta(days=90)), last),
+            min_value=first,
+            max_value=last,
+        )
+        if isinstance(history, (list, tuple)) and len(history) == 2:
+            # The session frame keeps this range's edits; a new range starts from the ledger.
+            if st.session_state[HISTORY_RANGE_KEY] == tuple(history) and st.session_state.get(DF_EXPENSES_KEY) is not None:
+                df_expenses, df_income = st.session_state[DF_EXPENSES_KEY], st.session_state.get(DF_INCOME_KEY)
+            else:
+                st.session_state[DF_EXPENSES_KEY] = st.session_state[DF_INCOME_KEY] = None
+                st.session_state[HISTORY_RANGE_KEY] = tuple(history)
+                df_expenses, df_income = create_df_from_ledger(*history)
+            if df_expenses is not None:
+                apply_budgets_to_transactions(df_expenses)
+                display_transactions(df_expenses, df_income)
     elif st.session_state.get(DF_EXPENSES_KEY) is not None:
         apply_budgets_to_transactions(st.session_state[DF_EXPENSES_KEY])
         display_transactions(st.session_state[DF_EXPENSES_KEY], st.session_state.get(DF_INCOME_KEY))
@@ -3,14 +3,35 @@ INCOME_CATEGORY = "details_to_income_category"
 
 STORE_KEY = "store"
 BUDGETS_KEY = "budgets"
+LEDGER_KEY = "ledger"
 DF_EXPENSES_KEY = "df_expenses"
 DF_INCOME_KEY = "df_income"
 CREATING_BUDGET_KEY = "creating_budget"
+BUDGET_CHANGES_KEY = "budget_changes"
+STREAMED_FILES_KEY = "streamed_files"
+RENDER_MEMO_KEY = "render_memo"
+ROLLUPS_KEY = "rollups"
+RECURRING_KEY = "recurring"
+ANOMALIES_KEY = "anomalies"
+EDITOR_GENERATION_KEY = "editor_generation"
+HISTORY_RANGE_KEY = "history_range"
+
+# Set to a database path to store categories, tags and budgets in SQLite instead of JSON files.
+SQLITE_PATH_ENV = "FINANCE_DB"
 
 SESSION_DEFAULTS = {
     STORE_KEY: None,
     BUDGETS_KEY: None,
+    LEDGER_KEY: None,
     DF_EXPENSES_KEY: None,
     DF_INCOME_KEY: None,
     CREATING_BUDGET_KEY: False,
+    BUDGET_CHANGES_KEY: None,
+    STREAMED_FILES_KEY: None,
+    RENDER_MEMO_KEY: None,
+    ROLLUPS_KEY: None,
+    RECURRING_KEY: None,
+    ANOMALIES_KEY: None,
+    EDITOR_GENERATION_KEY: 0,
+    HISTORY_RANGE_KEY: None,
 }
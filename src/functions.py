@@ -1,98 +1,220 @@
+import os
+import uuid
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import hashlib
+from datetime import timedelta
 from constants import(
     EXPENSES_CATEGORY,
     INCOME_CATEGORY,
     STORE_KEY,
     BUDGETS_KEY,
+    LEDGER_KEY,
     DF_EXPENSES_KEY,
     DF_INCOME_KEY,
     CREATING_BUDGET_KEY,
+    BUDGET_CHANGES_KEY,
+    STREAMED_FILES_KEY,
+    SQLITE_PATH_ENV,
+    ROLLUPS_KEY,
+    RECURRING_KEY,
+    ANOMALIES_KEY,
+    EDITOR_GENERATION_KEY,
     SESSION_DEFAULTS,
 )
 from CategoryStore import CategoryStore
-from BudgetManager import BudgetManager
+from BudgetManager import BudgetManager, DEFAULT_BUDGETS_PATH
+from Ledger import Ledger
+from Rollups import Rollups
+from RecurringDetector import RecurringDetector
+from AnomalyDetector import AnomalyDetector
+from SqliteStorage import SqliteStorage
+from StatementCache import StatementCache
+from render import frame_version, memoize, set_frame_version
+from paging import apply_page_edits
+from ingest import STREAMING_THRESHOLD_BYTES, import_files, ingest_to_ledger, read_statement
 
 
+@st.cache_resource
+def open_storage(path):
+    storage = SqliteStorage(path)
+    if storage.is_empty():
+        storage.import_json(
+            categories_path="categories.json",
+            income_categories_path="income_categories.json",
+            tags_path="tags.json",
+            rules_path="rules.json",
+            budgets_path=DEFAULT_BUDGETS_PATH,
+        )
+    return storage
+
+@st.cache_resource
+def statement_cache():
+    return StatementCache(spill_dir=os.path.join(os.path.dirname(__file__), "statement_cache"))
+
 def initialize_session_state():
     for k, default in SESSION_DEFAULTS.items():
         if k not in st.session_state:
             st.session_state[k] = default
+    db_path = os.environ.get(SQLITE_PATH_ENV)
+    storage = open_storage(db_path) if db_path else None
     if st.session_state.get(STORE_KEY) is None:
         store = CategoryStore(
             categories_path="categories.json",
             income_categories_path="income_categories.json",
+            backend=storage,
+            journal_path=os.path.join("journals", f"category_edits-{uuid.uuid4().hex}.journal"),
         )
         store.load_all()
         st.session_state[STORE_KEY] = store
 
+    if st.session_state.get(STREAMED_FILES_KEY) is None:
+        st.session_state[STREAMED_FILES_KEY] = {}
+    if st.session_state.get(LEDGER_KEY) is None:
+        st.session_state[LEDGER_KEY] = Ledger()
+    if st.session_state.get(ROLLUPS_KEY) is None:
+        st.session_state[ROLLUPS_KEY] = {"expenses": Rollups(), "income": Rollups(), "budgets": Rollups()}
+    if st.session_state.get(RECURRING_KEY) is None:
+        st.session_state[RECURRING_KEY] = RecurringDetector()
+    if st.session_state.get(ANOMALIES_KEY) is None:
+        st.session_state[ANOMALIES_KEY] = AnomalyDetector()
+
     if st.session_state.get(BUDGETS_KEY) is None:
-        mgr = BudgetManager()
+        mgr = BudgetManager(tag_index=st.session_state[STORE_KEY].tags, storage=storage)
         mgr.load_all()
+        mgr.apply_budgets_from_ledger(st.session_state[LEDGER_KEY], store=st.session_state[STORE_KEY])
         st.session_state[BUDGETS_KEY] = mgr
 
 
-def create_df_from_file(uploaded_transactions):
-    df = load_transactions(uploaded_transactions)
+def create_df_from_file(uploaded_transactions, bank_format=None):
+    if getattr(uploaded_transactions, "size", 0) > STREAMING_THRESHOLD_BYTES:
+        return stream_file_to_ledger(uploaded_transactions, bank_format=bank_format)
+    cache = statement_cache()
+    key = StatementCache.key_for([uploaded_transactions.getvalue()], getattr(bank_format, "name", None))
+    df = cache.get_parsed(key)
+    if df is None:
+        df = load_transactions(uploaded_transactions, bank_format=bank_format)
+        if df is None:
+            return None, None
+        st.session_state[LEDGER_KEY].append(df)
+        cache.put_parsed(key, df)
+    file_name = getattr(uploaded_transactions, "name", "uploaded.csv")
+    return split_cached(cache, key, df, file_name)
+
+def create_df_from_files(uploaded_files, bank_format=None):
+    cache = statement_cache()
+    key = StatementCache.key_for([f.getvalue() for f in uploaded_files], getattr(bank_format, "name", None))
+    df = cache.get_parsed(key)
     if df is None:
+        with st.spinner(f"Importing {len(uploaded_files)} statements..."):
+            result = import_files(uploaded_files, store=st.session_state[STORE_KEY], bank_format=bank_format)
+        for name, error in result.errors.items():
+            st.warning(f"Skipped {name}: {error}")
+        if result.transactions.empty:
+            return None, None
+        df = result.transactions
+        st.session_state[LEDGER_KEY].append(df)
+        if not result.errors:
+            # Categories from the workers go stale as the store changes; cache hits re-categorize.
+            cache.put_parsed(key, df.drop(columns="Category"))
+    return split_cached(cache, key, df, "batch")
+
+def split_cached(cache, key, df, file_name):
+    """split_transactions through the processed layer of the statement cache."""
+    store = st.session_state[STORE_KEY]
+    token = f"{store.categorization_token()}:{store.tags_token()}"
+    frames = cache.get_processed(key, token)
+    if frames is None:
+        frames = split_transactions(df, file_name)
+        for i, frame in enumerate(frames):
+            set_frame_version(frame, (key, token, i))
+        cache.put_processed(key, token, frames)
+        frames = cache.get_processed(key, token) or frames
+    return frames
+
+def stream_file_to_ledger(uploaded_transactions, days=90, bank_format=None):
+    ledger = st.session_state[LEDGER_KEY]
+    streamed = st.session_state[STREAMED_FILES_KEY]
+    file_id = getattr(uploaded_transactions, "file_id", None) or getattr(uploaded_transactions, "name", "")
+    if file_id not in streamed:
+        try:
+            streamed[file_id] = ingest_to_ledger(uploaded_transactions, ledger, bank_format=bank_format)
+        except (KeyError, ValueError, UnicodeDecodeError, pd.errors.ParserError) as e:
+            st.error(f"Error processing file: {e}")
+            return None, None
+    st.info(f"Large statement streamed into the ledger ({streamed[file_id]:,} new transactions). Showing the last {days} days.")
+    first, last = ledger.date_range()
+    return create_df_from_ledger(max(first, last - timedelta(days=days)), last)
+
+def create_df_from_ledger(start=None, end=None):
+    ledger = st.session_state[LEDGER_KEY]
+    store = st.session_state[STORE_KEY]
+    version = (ledger.version(), str(start), str(end), store.categorization_token(), store.tags_token())
+    frames = memoize("ledger_frames", version, lambda: load_ledger_frames(ledger, start, end, version))
+    return tuple(None if f is None else f.copy(deep=False) for f in frames)
+
+def load_ledger_frames(ledger, start, end, version):
+    df = ledger.load(start, end)
+    if df.empty:
         return None, None
+    df_expenses, df_income = split_transactions(df, "ledger")
+    return set_frame_version(df_expenses, version + (0,)), set_frame_version(df_income, version + (1,))
 
+def split_transactions(df, file_name):
+    store = st.session_state[STORE_KEY]
+    categorized = "Category" in df.columns
     df_expenses = df[df.get("Debit/Credit") == "Debit"].copy()
-    df_expenses["Category"] = df.apply(assign_category, axis=1, args=("categories", st.session_state[STORE_KEY].is_loaded()))
-    file_name = getattr(uploaded_transactions, "name", "uploaded.csv")
-    df_expenses = st.session_state[STORE_KEY].apply_tags_to_df(df=df_expenses, filename=file_name)
+    if not categorized:
+        df_expenses["Category"] = store.categorize(df_expenses["Details"], "categories")
+    df_expenses = store.apply_tags_to_df(df=df_expenses, filename=file_name)
 
     df_income = df[df.get("Debit/Credit") == "Credit"].copy()
-    df_income["Category"] = df.apply(assign_category, axis=1, args=("income_categories", st.session_state[STORE_KEY].is_loaded()))
+    if not categorized:
+        df_income["Category"] = store.categorize(df_income["Details"], "income_categories")
 
     return df_expenses, df_income
 
-def assign_category(row, category, is_loaded):
-    if is_loaded:
-        concept = row["Details"].lower()
-        category = category.lower()
-        lookup = st.session_state[STORE_KEY].get_lookup(category)
-        k = lookup.get(concept)
-        if k:
-            return k.capitalize()
-        return "Uncategorized"
-        
-def load_transactions(file):
+def load_transactions(file, bank_format=None):
     try:
-        df = pd.read_csv(file);
-        df.columns = [col.strip() for col in df.columns]
-        df["Amount"] = df["Amount"].str.replace(",", "").astype(float)
-        df["Date"] = pd.to_datetime(df["Date"], format="%d %b %Y").dt.date
-        df = df.loc[:, ~df.columns.str.contains('^Unnamed', case=False, na=False)]
-        def _make_tx_id(r):
-            date_part = r.get("Date")
-            amount_part = r.get("Amount")
-            details_part = r.get("Details") if "Details" in r.index else ""
-            s = f"{date_part!s}|{amount_part!s}|{details_part!s}"
-            return hashlib.sha1(s.encode("utf-8")).hexdigest()
-        try:
-            df = df.reset_index(drop=True)
-            df["tx_id"] = df.apply(_make_tx_id, axis=1)
-        except Exception:
-            df["tx_id"] = [str(i) for i in range(len(df))]
-
-        return df
-    except Exception as e:
+        return read_statement(file, bank_format=bank_format)
+    except (KeyError, ValueError, UnicodeDecodeError, pd.errors.ParserError) as e:
         st.error(f"Error processing file: {e}")
         return None
 
-def edit_rows_wrapper(scope, current_df, store, key):
+def edit_rows_wrapper(scope, current_df, store, key, frame_key, columns=("Category", "tags")):
     e_row = "edited_rows"
     edited_data = st.session_state[key][e_row]
     if edited_data:
+        record_budget_changes(edited_data, current_df)
         store.apply_edits(
             edited_rows=edited_data,
             scope=scope,
             current_df=current_df
         )
-        if store.current_file:
-            store.apply_tag_edits(edited_rows=edited_data, current_df=current_df)
-    
+        store.apply_tag_edits(edited_rows=edited_data, current_df=current_df)
+        df = st.session_state.get(frame_key)
+        if df is not None:
+            edited = apply_page_edits(df, edited_data, current_df, columns=columns)
+            st.session_state[frame_key] = set_frame_version(edited, (frame_version(df), st.session_state[EDITOR_GENERATION_KEY]))
+    # edited_rows are positions in current_df; once applied, start a fresh editor so
+    # they are not replayed onto a page that the edit re-sorted or re-filtered.
+    st.session_state[EDITOR_GENERATION_KEY] += 1
+
+def record_budget_changes(edited_rows, current_df):
+    changes = st.session_state.get(BUDGET_CHANGES_KEY) or {"tx_ids": set(), "details": set()}
+    for rw_idx, row_changes in edited_rows.items():
+        row = current_df.iloc[int(rw_idx)]
+        if "Category" in row_changes:
+            changes["details"].add(CategoryStore.normalize_detail(row["Details"]))
+        if "tags" in row_changes and "tx_id" in current_df.columns:
+            changes["tx_ids"].add(str(row["tx_id"]))
+    st.session_state[BUDGET_CHANGES_KEY] = changes
 
+def pop_changed_tx_ids(df):
+    changes = st.session_state.get(BUDGET_CHANGES_KEY)
+    st.session_state[BUDGET_CHANGES_KEY] = None
+    if not changes or df is None or "tx_id" not in df.columns:
+        return set()
+    details = df["Details"].fillna("").astype(str).str.strip().str.lower()
+    touched = details.isin(list(changes["details"])) | df["tx_id"].astype(str).isin(list(changes["tx_ids"]))
+    return set(df.loc[touched, "tx_id"].astype(str))
@@ -0,0 +1,152 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+import io
+import os
+import pandas as pd
+
+from parsers import BankFormat, detect_format
+from tx_ids import TxIdStream, make_tx_ids
+
+DEFAULT_CHUNK_SIZE = 50_000
+STREAMING_THRESHOLD_BYTES = 50 * 1024 * 1024
+
+
+def read_statement_chunks(
+        file,
+        chunksize: int = DEFAULT_CHUNK_SIZE,
+        bank_format: Optional[BankFormat] = None,
+) -> Iterator[pd.DataFrame]:
+    """Yield normalized chunks of a statement CSV with tx_ids, holding at most one chunk in memory.
+
+    The bank format is detected from the header row unless one is given.
+    """
+    make_ids = TxIdStream()
+    for chunk in _normalized_chunks(file, chunksize, bank_format):
+        chunk["tx_id"] = make_ids(chunk)
+        yield chunk
+
+
+def _normalized_chunks(file, chunksize: int, bank_format: Optional[BankFormat]) -> Iterator[pd.DataFrame]:
+    bank_format = bank_format or detect_format(file)
+    reader = pd.read_csv(file, chunksize=chunksize, **bank_format.read_options())
+    for chunk in reader:
+        chunk = bank_format.normalize(chunk)
+        if not chunk.empty:
+            yield chunk
+
+
+def categorize_chunk(chunk: pd.DataFrame, store) -> pd.DataFrame:
+    debit = (chunk["Debit/Credit"] == "Debit").to_numpy()
+    category = pd.Series("Uncategorized", index=chunk.index, dtype=object)
+    if debit.any():
+        category[debit] = store.categorize(chunk.loc[debit, "Details"], "categories")
+    if (~debit).any():
+        category[~debit] = store.categorize(chunk.loc[~debit, "Details"], "income_categories")
+    chunk["Category"] = category
+    return chunk
+
+
+def iter_transactions(
+        file,
+        chunksize: int = DEFAULT_CHUNK_SIZE,
+        store=None,
+        bank_format: Optional[BankFormat] = None,
+) -> Iterator[pd.DataFrame]:
+    for chunk in read_statement_chunks(file, chunksize, bank_format):
+        yield categorize_chunk(chunk, store) if store is not None else chunk
+
+
+def ingest_to_ledger(
+        file,
+        ledger,
+        chunksize: int = DEFAULT_CHUNK_SIZE,
+        bank_format: Optional[BankFormat] = None,
+) -> int:
+    """Stream a statement into the ledger chunk by chunk and return how many new rows were stored."""
+    added = 0
+    for chunk in read_statement_chunks(file, chunksize, bank_format):
+        added += len(ledger.append(chunk))
+    return added
+
+
+def read_statement(
+        file,
+        chunksize: int = DEFAULT_CHUNK_SIZE,
+        bank_format: Optional[BankFormat] = None,
+) -> pd.DataFrame:
+    chunks = list(_normalized_chunks(file, chunksize, bank_format))
+    if not chunks:
+        return pd.DataFrame()
+    df = pd.concat(chunks, ignore_index=True)
+    df["tx_id"] = make_tx_ids(df)
+    return df
+
+
+@dataclass
+class ImportResult:
+    transactions: pd.DataFrame
+    rows: Dict[str, int] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+
+def import_files(
+        files: List,
+        store=None,
+        bank_format: Optional[BankFormat] = None,
+        max_workers: Optional[int] = None,
+) -> ImportResult:
+    """Parse, id and categorize several statements in parallel and merge them on tx_id.
+
+    ``files`` may be paths or file-like uploads. A file that fails to parse
+    is reported in ``errors`` and the others are still imported.
+    """
+    jobs = []
+    for i, f in enumerate(files):
+        name, source = _as_job(f, i)
+        if any(name == existing for existing, _ in jobs):
+            name = f"{name} ({i + 1})"
+        jobs.append((name, source))
+    result = ImportResult(transactions=pd.DataFrame())
+    frames = {}
+    if len(jobs) == 1:
+        name, source = jobs[0]
+        try:
+            frames[name] = _import_one(source, store, bank_format)
+        except Exception as e:
+            result.errors[name] = str(e)
+    else:
+        workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {name: pool.submit(_import_one, source, store, bank_format) for name, source in jobs}
+            for name, future in futures.items():
+                try:
+                    frames[name] = future.result()
+                except Exception as e:
+                    result.errors[name] = str(e)
+    for name, df in frames.items():
+        result.rows[name] = len(df)
+    parsed = [df for df in frames.values() if not df.empty]
+    if parsed:
+        merged = pd.concat(parsed, ignore_index=True)
+        result.transactions = merged.drop_duplicates(subset="tx_id").reset_index(drop=True)
+    return result
+
+
+def _as_job(file, position: int):
+    if isinstance(file, (str, os.PathLike)):
+        return str(file), str(file)
+    name = getattr(file, "name", None) or f"file_{position}"
+    data = file.getvalue() if hasattr(file, "getvalue") else file.read()
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return name, data
+
+
+def _import_one(source, store=None, bank_format: Optional[BankFormat] = None) -> pd.DataFrame:
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    df = read_statement(source, bank_format=bank_format)
+    if store is not None and not df.empty:
+        df = categorize_chunk(df, store)
+    return df
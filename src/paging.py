@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Optional, Sequence, Tuple
+import math
+import numpy as np
+import pandas as pd
+
+from Budget import split_tags
+
+DEFAULT_PAGE_SIZE = 100
+PAGE_SIZES = (50, 100, 250, 500)
+SORT_COLUMNS = ("Date", "Amount", "Category", "Details")
+
+
+@dataclass(frozen=True)
+class PageQuery:
+    """Server-side view of a transactions frame: filters, sort order and one page of it."""
+    categories: Tuple[str, ...] = ()
+    tag: Optional[str] = None
+    start: Optional[date] = None
+    end: Optional[date] = None
+    sort_by: str = "Date"
+    ascending: bool = False
+    page: int = 0
+    page_size: int = DEFAULT_PAGE_SIZE
+
+    @property
+    def key(self) -> str:
+        """Identifies the visible slice, e.g. to give each page its own data_editor state."""
+        return str(abs(hash(self)))
+
+
+def filter_transactions(df: pd.DataFrame, query: PageQuery, tag_index=None) -> pd.DataFrame:
+    keep = np.ones(len(df), dtype=bool)
+    if query.categories and "Category" in df.columns:
+        wanted = {c.lower() for c in query.categories}
+        keep &= df["Category"].fillna("").astype(str).str.lower().isin(wanted).to_numpy()
+    if query.tag:
+        tag = query.tag.strip().lower()
+        if tag_index is not None and "tx_id" in df.columns:
+            keep &= df["tx_id"].astype(str).isin(tag_index.tx_ids_with(tag)).to_numpy()
+        elif "tags" in df.columns:
+            keep &= np.fromiter((tag in split_tags(t) for t in df["tags"]), dtype=bool, count=len(df))
+    if (query.start is not None or query.end is not None) and "Date" in df.columns:
+        dates = pd.to_datetime(df["Date"], errors="coerce")
+        if query.start is not None:
+            keep &= (dates >= pd.Timestamp(query.start)).to_numpy()
+        if query.end is not None:
+            keep &= (dates <= pd.Timestamp(query.end)).to_numpy()
+    return df[keep] if not keep.all() else df
+
+
+def sort_transactions(df: pd.DataFrame, query: PageQuery) -> pd.DataFrame:
+    if query.sort_by not in df.columns:
+        return df
+    key = None
+    if query.sort_by == "Date":
+        key = lambda s: pd.to_datetime(s, errors="coerce")
+    elif not pd.api.types.is_numeric_dtype(df[query.sort_by]):
+        key = lambda s: s.astype(str).str.lower()
+    return df.sort_values(query.sort_by, ascending=query.ascending, kind="stable", key=key, na_position="last")
+
+
+def page_count(n_rows: int, page_size: int) -> int:
+    return max(1, math.ceil(n_rows / page_size))
+
+
+def view_of(df: pd.DataFrame, query: PageQuery, tag_index=None) -> pd.DataFrame:
+    """All rows matching the query's filters, in its sort order."""
+    return sort_transactions(filter_transactions(df, query, tag_index), query)
+
+
+def slice_page(view: pd.DataFrame, query: PageQuery) -> pd.DataFrame:
+    page = min(query.page, page_count(len(view), query.page_size) - 1)
+    start = page * query.page_size
+    return view.iloc[start:start + query.page_size].reset_index(drop=True)
+
+
+def page_of(df: pd.DataFrame, query: PageQuery, tag_index=None) -> Tuple[pd.DataFrame, int]:
+    """Filter, sort and slice ``df``; returns the page (with a fresh 0..n index) and the filtered row count."""
+    view = view_of(df, query, tag_index)
+    return slice_page(view, query), len(view)
+
+
+def edits_by_tx_id(edited_rows: Dict, page: pd.DataFrame, id_col: str = "tx_id") -> Dict[str, Dict[str, object]]:
+    """Turn data_editor's positional ``edited_rows`` on ``page`` into ``{tx_id: changes}``."""
+    ids = page[id_col].astype(str).to_numpy()
+    return {ids[int(i)]: dict(changes) for i, changes in edited_rows.items() if int(i) < len(ids)}
+
+
+def apply_page_edits(
+        df: pd.DataFrame,
+        edited_rows: Dict,
+        page: pd.DataFrame,
+        columns: Sequence[str] = ("Category", "tags"),
+        id_col: str = "tx_id",
+) -> pd.DataFrame:
+    """Copy the edited cells of one page back into the full frame, matching rows by tx_id."""
+    edits = edits_by_tx_id(edited_rows, page, id_col)
+    if not edits:
+        return df
+    df = df.copy(deep=False)
+    ids = df[id_col].astype(str).to_numpy(dtype=object)
+    for col in columns:
+        changed = {tx_id: changes[col] for tx_id, changes in edits.items() if col in changes}
+        if not changed or col not in df.columns:
+            continue
+        values = df[col].to_numpy(dtype=object, copy=True)
+        for row in np.flatnonzero(pd.Series(ids).isin(list(changed)).to_numpy()):
+            value = changed[ids[row]]
+            values[row] = split_tags(value) if col == "tags" else value
+        df[col] = values
+    return df
@@ -0,0 +1,137 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Literal, Mapping, Optional, Tuple
+import csv
+import io
+import pandas as pd
+
+HEADER_SAMPLE_BYTES = 4096
+CANONICAL_COLUMNS = ("Date", "Details", "Amount", "Debit/Credit")
+
+SignConvention = Literal["column", "signed", "split"]
+
+
+@dataclass(frozen=True)
+class BankFormat:
+    """How one bank lays out its CSV export.
+
+    ``columns`` maps the bank's header names to the canonical ``Date``,
+    ``Details`` and ``Amount`` (and ``Debit/Credit`` for the "column"
+    convention). With the "signed" convention negative amounts are debits;
+    with "split" the bank has separate ``debit_column``/``credit_column``.
+    """
+    name: str
+    columns: Mapping[str, str]
+    date_format: str
+    sign: SignConvention = "column"
+    debit_values: Tuple[str, ...] = ("Debit",)
+    debit_column: str = ""
+    credit_column: str = ""
+    thousands: str = ","
+    dtypes: Mapping[str, str] = field(default_factory=dict)
+
+    @property
+    def required_columns(self) -> frozenset:
+        extra = (self.debit_column, self.credit_column) if self.sign == "split" else ()
+        return frozenset(self.columns) | frozenset(c for c in extra if c)
+
+    def matches(self, header: List[str]) -> bool:
+        return self.required_columns <= set(header)
+
+    def read_options(self) -> dict:
+        return {"dtype": defaultdict(lambda: str, self.dtypes), "skipinitialspace": True}
+
+    def normalize(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        chunk.columns = [str(col).strip() for col in chunk.columns]
+        chunk = chunk.loc[:, ~chunk.columns.str.contains("^Unnamed", case=False, na=False)]
+        chunk = chunk.rename(columns=dict(self.columns))
+        if self.sign == "split":
+            debit = self._to_float(chunk.pop(self.debit_column))
+            credit = self._to_float(chunk.pop(self.credit_column))
+            is_debit = debit.notna() & (debit != 0)
+            chunk["Amount"] = debit.where(is_debit, credit).abs()
+            chunk["Debit/Credit"] = pd.Series("Credit", index=chunk.index, dtype=object).mask(is_debit, "Debit")
+        else:
+            amount = self._to_float(chunk["Amount"])
+            if self.sign == "signed":
+                chunk["Debit/Credit"] = pd.Series("Credit", index=chunk.index, dtype=object).mask(amount < 0, "Debit")
+                amount = amount.abs()
+            else:
+                is_debit = chunk["Debit/Credit"].astype(str).str.strip().isin(self.debit_values)
+                chunk["Debit/Credit"] = pd.Series("Credit", index=chunk.index, dtype=object).mask(is_debit, "Debit")
+            chunk["Amount"] = amount
+        chunk["Date"] = pd.to_datetime(chunk["Date"], format=self.date_format).dt.date
+        ordered = [c for c in CANONICAL_COLUMNS if c in chunk.columns]
+        return chunk[ordered + [c for c in chunk.columns if c not in ordered]]
+
+    def _to_float(self, values: pd.Series) -> pd.Series:
+        if pd.api.types.is_numeric_dtype(values):
+            return values.astype(float)
+        values = values.astype(str).str.strip()
+        if self.thousands:
+            values = values.str.replace(self.thousands, "", regex=False)
+        return values.replace({"": None, "nan": None, "None": None}).astype(float)
+
+
+_FORMATS: Dict[str, BankFormat] = {}
+_DETECTED: Dict[Tuple[str, ...], BankFormat] = {}
+
+
+def register_format(bank_format: BankFormat) -> None:
+    _FORMATS[bank_format.name] = bank_format
+    _DETECTED.clear()
+
+
+def get_format(name: str) -> BankFormat:
+    return _FORMATS[name]
+
+
+def list_formats() -> List[str]:
+    return list(_FORMATS)
+
+
+def read_header(file, sample_bytes: int = HEADER_SAMPLE_BYTES) -> List[str]:
+    """Read the header row from the first few KB of ``file`` and rewind it."""
+    if hasattr(file, "read"):
+        position = file.tell()
+        sample = file.read(sample_bytes)
+        file.seek(position)
+    else:
+        with open(file, "rb") as f:
+            sample = f.read(sample_bytes)
+    if isinstance(sample, bytes):
+        sample = sample.decode("utf-8-sig", errors="replace")
+    first_line = sample.splitlines()[0] if sample else ""
+    row = next(csv.reader(io.StringIO(first_line)), [])
+    return [col.strip() for col in row]
+
+
+def detect_format(file) -> BankFormat:
+    header = tuple(read_header(file))
+    if header not in _DETECTED:
+        candidates = [f for f in _FORMATS.values() if f.matches(list(header))]
+        if not candidates:
+            raise ValueError(f"Unrecognized statement format with columns: {', '.join(header)}")
+        _DETECTED[header] = max(candidates, key=lambda f: len(f.required_columns))
+    return _DETECTED[header]
+
+
+register_format(BankFormat(
+    name="default",
+    columns={"Date": "Date", "Details": "Details", "Amount": "Amount", "Debit/Credit": "Debit/Credit"},
+    date_format="%d %b %Y",
+))
+register_format(BankFormat(
+    name="signed_amount",
+    columns={"Date": "Date", "Description": "Details", "Amount": "Amount"},
+    date_format="%Y-%m-%d",
+    sign="signed",
+))
+register_format(BankFormat(
+    name="debit_credit_columns",
+    columns={"Transaction Date": "Date", "Transaction Description": "Details"},
+    date_format="%d/%m/%Y",
+    sign="split",
+    debit_column="Debit Amount",
+    credit_column="Credit Amount",
+))
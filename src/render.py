@@ -0,0 +1,56 @@
+from typing import Any, Callable, Hashable
+import pandas as pd
+import streamlit as st
+
+from constants import RENDER_MEMO_KEY
+
+VERSION_ATTR = "version"
+
+
+def set_frame_version(df: pd.DataFrame, version: Hashable) -> pd.DataFrame:
+    """Tag ``df`` with the version of the inputs it was derived from."""
+    if df is not None:
+        df.attrs[VERSION_ATTR] = version
+    return df
+
+
+def frame_version(df: pd.DataFrame) -> Hashable:
+    """A cheap version for ``df``: its tagged version, else a content hash.
+
+    The hash fallback covers frames that come back from ``st.data_editor``
+    without attrs.
+    """
+    if df is None:
+        return None
+    version = df.attrs.get(VERSION_ATTR)
+    if version is not None:
+        return (version, df.shape)
+    hashed = pd.util.hash_pandas_object(df.astype(str), index=False)
+    return (int(hashed.sum()), df.shape)
+
+
+def _memo() -> dict:
+    if st.session_state.get(RENDER_MEMO_KEY) is None:
+        st.session_state[RENDER_MEMO_KEY] = {}
+    return st.session_state[RENDER_MEMO_KEY]
+
+
+def memoize(key: str, inputs: Hashable, compute: Callable[[], Any]) -> Any:
+    """Return the value computed for ``key`` on an earlier rerun while ``inputs`` are unchanged."""
+    memo = _memo()
+    cached = memo.get(key)
+    if cached is not None and cached[0] == inputs:
+        return cached[1]
+    value = compute()
+    memo[key] = (inputs, value)
+    return value
+
+
+def unchanged(key: str, inputs: Hashable) -> bool:
+    cached = _memo().get(key)
+    return cached is not None and cached[0] == inputs
+
+
+def mark(key: str, inputs: Hashable) -> None:
+    """Record ``inputs`` as up to date for work done outside ``memoize``."""
+    _memo()[key] = (inputs, None)
@@ -0,0 +1,113 @@
+from typing import Optional, Sequence
+import numpy as np
+import pandas as pd
+
+TX_ID_COLUMNS = ("Date", "Amount", "Details")
+_HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8).astype(np.uint32)
+
+
+def _hash_values(values: pd.Series) -> np.ndarray:
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    unique_hashes = pd.util.hash_array(pd.Index(uniques).astype(str).to_numpy(dtype=object))
+    return unique_hashes[codes]
+
+
+def _key_frame(df: pd.DataFrame, columns: Sequence[str]) -> pd.DataFrame:
+    n = len(df)
+    keys = {}
+    for col in columns:
+        values = df[col] if col in df.columns else pd.Series([""] * n, index=df.index)
+        if col == "Date":
+            parsed = pd.to_datetime(values, errors="coerce")
+            keys[col] = parsed.to_numpy(dtype="datetime64[D]").astype(np.int64)
+            invalid = parsed.isna().to_numpy()
+            if invalid.any():
+                keys[f"{col}_raw"] = np.where(invalid, _hash_values(values), 0)
+        elif col == "Amount":
+            amounts = values
+            if not pd.api.types.is_numeric_dtype(amounts):
+                amounts = pd.to_numeric(amounts.astype(str).str.replace(",", ""), errors="coerce")
+            keys[col] = amounts.to_numpy(dtype=np.float64)
+        else:
+            keys[col] = _hash_values(values.fillna(""))
+    return pd.DataFrame(keys)
+
+
+def hash_rows(df: pd.DataFrame, columns: Sequence[str] = TX_ID_COLUMNS) -> np.ndarray:
+    if df.empty:
+        return np.empty(0, dtype=np.uint64)
+    return pd.util.hash_pandas_object(_key_frame(df, columns), index=False).to_numpy()
+
+
+def to_hex(hashes: np.ndarray) -> np.ndarray:
+    digits = hashes.astype(">u8").view(np.uint8).reshape(-1, 8)
+    nibbles = np.empty((digits.shape[0], 16), dtype=np.uint8)
+    nibbles[:, 0::2] = digits >> 4
+    nibbles[:, 1::2] = digits & 0x0F
+    return _HEX_DIGITS[nibbles].view("U16").ravel().astype(object)
+
+
+def make_tx_ids(df: pd.DataFrame, columns: Sequence[str] = TX_ID_COLUMNS) -> pd.Series:
+    """Return a 16-hex-digit tx_id per row of ``df``, aligned to its index.
+
+    Rows that hash identically (same Date, Amount and Details) are told
+    apart by an occurrence counter, so the first occurrence keeps the
+    plain hash and repeats get a salted one.
+    """
+    base = hash_rows(df, columns)
+    return pd.Series(_ids_from_hashes(base), index=df.index, dtype=object)
+
+
+def _ids_from_hashes(base: np.ndarray, offsets: Optional[np.ndarray] = None) -> np.ndarray:
+    if base.size == 0:
+        return np.empty(0, dtype=object)
+    hashes = base.copy()
+    occurrence = np.zeros(base.size, dtype=np.int64) if offsets is None else offsets.copy()
+    clashing = pd.Series(base).duplicated(keep=False).to_numpy()
+    if clashing.any():
+        clashes = base[clashing]
+        occurrence[clashing] += pd.Series(clashes).groupby(clashes, sort=False).cumcount().to_numpy()
+    repeated = occurrence > 0
+    if repeated.any():
+        salted = pd.DataFrame({"hash": base[repeated], "occurrence": occurrence[repeated]})
+        hashes[repeated] = pd.util.hash_pandas_object(salted, index=False).to_numpy()
+    return to_hex(hashes)
+
+
+class TxIdStream:
+    """make_tx_ids over consecutive chunks of one statement.
+
+    Every row hash seen so far is kept in a sorted uint64 array with its
+    count (16 bytes per distinct row), so repeats get the same ids as
+    make_tx_ids over the whole file whatever order the rows come in.
+    """
+
+    def __init__(self, columns: Sequence[str] = TX_ID_COLUMNS):
+        self.columns = columns
+        self._seen = np.empty(0, dtype=np.uint64)
+        self._counts = np.empty(0, dtype=np.int64)
+
+    def __call__(self, chunk: pd.DataFrame) -> pd.Series:
+        base = hash_rows(chunk, self.columns)
+        if base.size == 0:
+            return pd.Series([], index=chunk.index, dtype=object)
+        ids = _ids_from_hashes(base, self._lookup(base))
+        hashes, counts = np.unique(base, return_counts=True)
+        positions = np.searchsorted(self._seen, hashes)
+        known = self._known(hashes, positions)
+        self._counts[positions[known]] += counts[known]
+        self._seen = np.insert(self._seen, positions[~known], hashes[~known])
+        self._counts = np.insert(self._counts, positions[~known], counts[~known])
+        return pd.Series(ids, index=chunk.index, dtype=object)
+
+    def _lookup(self, hashes: np.ndarray) -> np.ndarray:
+        positions = np.searchsorted(self._seen, hashes)
+        known = self._known(hashes, positions)
+        offsets = np.zeros(hashes.size, dtype=np.int64)
+        offsets[known] = self._counts[positions[known]]
+        return offsets
+
+    def _known(self, hashes: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        known = positions < self._seen.size
+        known[known] = self._seen[positions[known]] == hashes[known]
+        return known
@@ -0,0 +1,72 @@
+import sys
+import pathlib
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from AnomalyDetector import AnomalyDetector, merge_stats
+from Ledger import Ledger
+
+
+def _charges(prefix, dates, amounts, details="Corner Shop", category="Groceries"):
+    return pd.DataFrame({
+        "tx_id": [f"{prefix}{i}" for i in range(len(amounts))],
+        "Date": dates,
+        "Details": [details] * len(amounts),
+        "Amount": amounts,
+        "Category": [category] * len(amounts),
+        "Debit/Credit": ["Debit"] * len(amounts),
+    })
+
+
+class TestAnomalyDetector(unittest.TestCase):
+    def test_merge_stats_matches_full_pass(self):
+        values = np.array([3.0, 5.0, 8.0, 13.0, 21.0, 34.0])
+        def stats(v):
+            return pd.DataFrame({"n": [len(v)], "mean": [v.mean()], "m2": [((v - v.mean()) ** 2).sum()]},
+                                index=pd.Index(["k"], dtype=object))
+        merged = merge_stats(stats(values[:2]), stats(values[2:])).loc["k"]
+        self.assertEqual(merged["n"], 6)
+        self.assertAlmostEqual(merged["mean"], values.mean())
+        self.assertAlmostEqual(merged["m2"] / 5, values.var(ddof=1))
+
+    def test_scores_new_rows_against_prior_history(self):
+        detector = AnomalyDetector(min_history=5)
+        history = _charges("h", [f"2025-01-{d:02d}" for d in range(1, 11)], [20.0, 22.0, 19.0, 21.0, 20.5, 18.0, 23.0, 20.0, 21.5, 19.5])
+        self.assertTrue(detector.update(history).empty)
+        new = _charges("n", ["2025-02-01", "2025-02-02"], [21.0, 140.0])
+        flagged = detector.update(new)
+        self.assertEqual(flagged.index.tolist(), ["n1"])
+        self.assertAlmostEqual(flagged.loc["n1", "typical"], history["Amount"].mean())
+        self.assertTrue(detector.update(new).empty)
+        self.assertEqual(detector.stats["merchant"].loc["corner shop", "n"], 12)
+        self.assertEqual(detector.flagged_in(new).index.tolist(), ["n1"])
+        self.assertTrue(detector.flagged_in(history).empty)
+
+    def test_too_little_history_and_credits_are_not_flagged(self):
+        detector = AnomalyDetector(min_history=5)
+        detector.update(_charges("h", ["2025-01-01", "2025-01-02"], [10.0, 11.0]))
+        self.assertTrue(detector.update(_charges("n", ["2025-01-03"], [500.0])).empty)
+        refund = _charges("r", ["2025-01-04"], [900.0]).assign(**{"Debit/Credit": "Credit"})
+        self.assertTrue(detector.update(refund).empty)
+        self.assertEqual(detector.stats["merchant"].loc["corner shop", "n"], 3)
+
+    def test_refresh_scores_ledger_months_in_order(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            ledger = Ledger(root=tmp)
+            january = _charges("j", [f"2025-01-{d:02d}" for d in range(1, 9)], [30.0, 31.0, 29.0, 30.5, 29.5, 30.0, 31.5, 28.5])
+            ledger.append(pd.concat([january, _charges("f", ["2025-02-03"], [300.0])], ignore_index=True))
+            detector = AnomalyDetector()
+            self.assertEqual(detector.refresh(ledger), 1)
+            self.assertEqual(detector.refresh(ledger), 0)
+            ledger.append(_charges("m", ["2025-03-03"], [30.0]))
+            self.assertEqual(detector.refresh(ledger), 0)
+            self.assertEqual(detector.stats["merchant"].loc["corner shop", "n"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
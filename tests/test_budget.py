@@ -9,7 +9,8 @@ import pandas as pd
 
 sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
 
-from Budget import Budget, BudgetLine
+from Budget import Budget, BudgetLine, TransactionColumns
+from TagIndex import TagIndex
 
 
 class TestBudget(unittest.TestCase):
@@ -104,6 +105,124 @@ class TestBudget(unittest.TestCase):
         per_cat = b.per_category_spent()
         self.assertEqual(per_cat.get("transport", 0.0), 15.0)
 
+    def test_evaluate_masks_whole_frame(self):
+        b = Budget(
+            name="frame",
+            start_date=datetime.date(2025, 1, 1),
+            end_date=datetime.date(2025, 1, 31),
+            limit=100.0,
+            budget_lines=[BudgetLine(category="groceries", exclude_tags=("work",))],
+        )
+        df = pd.DataFrame([
+            {"Date": datetime.date(2025, 1, 5), "Amount": 10.0, "Category": "Groceries", "tags": ["food"], "tx_id": "a"},
+            {"Date": datetime.date(2025, 1, 6), "Amount": 20.0, "Category": "Groceries", "tags": "Work, food", "tx_id": "b"},
+            {"Date": datetime.date(2025, 2, 1), "Amount": 30.0, "Category": "Groceries", "tags": [], "tx_id": "c"},
+            {"Date": datetime.date(2025, 1, 7), "Amount": 40.0, "Category": "Rent", "tags": [], "tx_id": "d"},
+            {"Date": "not a date", "Amount": 50.0, "Category": "Groceries", "tags": [], "tx_id": "e"},
+        ])
+        b.evaluate(df)
+        self.assertEqual(b.tx_ids, ["a"])
+        self.assertEqual(b.total_spent(), 10.0)
+
+        b.add_transactions(pd.DataFrame([
+            {"Date": datetime.date(2025, 1, 9), "Amount": 5.0, "Category": "groceries", "tags": [], "tx_id": "f"},
+        ]))
+        self.assertEqual(b.tx_ids, ["a", "f"])
+        self.assertEqual(b.total_spent(), 15.0)
+
+    def test_tag_lines_resolve_through_tag_index(self):
+        b = Budget(
+            name="tagged",
+            start_date=datetime.date(2025, 1, 1),
+            end_date=datetime.date(2025, 1, 31),
+            limit=100.0,
+            budget_lines=[BudgetLine(category="travel", include_tags=("trip",)), BudgetLine(category="rent", exclude_tags=("work",))],
+        )
+        df = pd.DataFrame([
+            {"Date": datetime.date(2025, 1, 5), "Amount": 10.0, "Category": "Food", "tx_id": "a"},
+            {"Date": datetime.date(2025, 1, 6), "Amount": 20.0, "Category": "Rent", "tx_id": "b"},
+            {"Date": datetime.date(2025, 1, 7), "Amount": 40.0, "Category": "Rent", "tx_id": "c"},
+        ])
+        index = TagIndex({"a": ["trip"], "c": ["work"]})
+        columns = TransactionColumns(df, tag_index=index)
+        self.assertEqual(b.match(columns).tolist(), [True, True, False])
+        positions, codes, lookup = columns.tag_pairs
+        self.assertEqual(sorted(zip(positions.tolist(), codes.tolist())), [(0, lookup["trip"]), (2, lookup["work"])])
+
+    def test_budget_without_lines_matches_nothing(self):
+        b = Budget(
+            name="nolines",
+            start_date=datetime.date(2025, 1, 1),
+            end_date=datetime.date(2025, 12, 31),
+            limit=10.0,
+        )
+        b.add_transaction(self.make_row("2025-05-01", 5, category="other"))
+        self.assertTrue(b.transactions.empty)
+
+    def test_assign_lines_first_match_wins(self):
+        b = Budget(
+            name="lines",
+            start_date=datetime.date(2025, 1, 1),
+            end_date=datetime.date(2025, 12, 31),
+            limit=100.0,
+            budget_lines=[
+                BudgetLine(category="groceries", exclude_tags=("work",)),
+                BudgetLine(include_tags=("work",)),
+            ],
+        )
+        df = pd.DataFrame([
+            {"Date": "2025-01-01", "Amount": 1.0, "Category": "Groceries", "tags": ["food"]},
+            {"Date": "2025-01-01", "Amount": 2.0, "Category": "Groceries", "tags": ["work"]},
+            {"Date": "2025-01-01", "Amount": 4.0, "Category": "Rent", "tags": []},
+        ])
+        self.assertEqual(b.assign_lines(df).tolist(), [0, 1, 1])
+        b.budget_lines[1].include_tags = ("travel",)
+        b.budget_lines[1].category = "transport"
+        self.assertEqual(b.assign_lines(df).tolist(), [0, -1, -1])
+
+    def test_compiled_line_tracks_edits(self):
+        line = BudgetLine(category="Groceries", include_tags=("Food",))
+        self.assertEqual(line.compiled.category, "groceries")
+        self.assertEqual(line.compiled.include_tags, frozenset({"food"}))
+        line.exclude_tags = ("Work",)
+        self.assertEqual(line.compiled.exclude_tags, frozenset({"work"}))
+
+    def test_revision_tracks_changes(self):
+        b = Budget(name="rev", start_date=datetime.date(2025, 1, 1), end_date=datetime.date(2025, 12, 31), limit=10.0)
+        start = b.revision
+        b.add_line(BudgetLine(category="food"))
+        self.assertGreater(b.revision, start)
+        current = b.revision
+        b.add_transactions(pd.DataFrame([{"Date": "2025-02-01", "Amount": 1.0, "Category": "rent", "tx_id": "x"}]))
+        self.assertEqual(b.revision, current)
+        b.add_transactions(pd.DataFrame([{"Date": "2025-02-01", "Amount": 1.0, "Category": "food", "tx_id": "y"}]))
+        self.assertGreater(b.revision, current)
+
+    def test_summary_is_cached_until_inputs_change(self):
+        b = Budget(
+            name="cached",
+            start_date=datetime.date(2025, 1, 1),
+            end_date=datetime.date(2025, 12, 31),
+            limit=50.0,
+            budget_lines=[BudgetLine(category="groceries")],
+        )
+        b.add_transaction(self.make_row("2025-03-01", 20.0, category="Groceries", tags=("food",)))
+        first = b.summary()
+        self.assertIs(b._aggregates(), b._aggregates())
+        self.assertEqual(first["per_tag_spent"], {"food": 20.0})
+
+        b.add_transaction(self.make_row("2025-03-02", 40.0, category="Groceries"))
+        second = b.summary()
+        self.assertEqual(second["total_spent"], 60.0)
+        self.assertTrue(second["is_exceeded"])
+
+        b.add_line(BudgetLine(category="rent"))
+        b.budget_lines[0].category = "rent"
+        self.assertEqual(b.per_category_spent(), {})
+
+        b.limit = 100.0
+        self.assertFalse(b.summary()["is_exceeded"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -63,6 +63,10 @@ class TestBudgetManager(unittest.TestCase):
         self.assertIn("addtest", mgr.get_budgets())
         got = mgr.get_budget("addtest")
         self.assertEqual(got.limit, 123.0)
+        version = mgr.version()
+        self.assertEqual(mgr.version(), version)
+        got.limit = 50.0
+        self.assertNotEqual(mgr.version(), version)
 
     def test_apply_budgets_populates_transactions(self):
         mgr = bm_mod.BudgetManager()
@@ -87,6 +91,149 @@ class TestBudgetManager(unittest.TestCase):
         self.assertFalse(got.transactions.empty)
         self.assertEqual(set(got.transactions["tx_id"].astype(str).tolist()), {"a1", "b2"})
 
+    def test_apply_budgets_uses_index_positions(self):
+        mgr = bm_mod.BudgetManager()
+        import pandas as pd
+        b = Budget(
+            name="indexed",
+            start_date=__import__('datetime').date(2025, 1, 1),
+            end_date=__import__('datetime').date(2025, 12, 31),
+            limit=1000.0,
+        )
+        b.tx_ids = ["c3", "a1", "missing"]
+        mgr.add_or_update_budget(b)
+
+        df = pd.DataFrame([
+            {"Date": "2025-01-01", "Amount": 10.0, "Details": "x", "tx_id": "a1"},
+            {"Date": "2025-01-02", "Amount": 20.0, "Details": "y", "tx_id": "b2"},
+            {"Date": "2025-01-03", "Amount": 30.0, "Details": "z", "tx_id": "c3"},
+            {"Date": "2025-01-03", "Amount": 30.0, "Details": "z", "tx_id": "c3"},
+        ])
+        mgr.apply_budgets_to_transactions(df_master=df)
+        self.assertEqual(b.transactions["tx_id"].tolist(), ["a1", "c3"])
+        self.assertEqual(b.tx_ids, ["a1", "c3"])
+        self.assertEqual(b.total_spent(), 40.0)
+        index = mgr.index_for(df)
+        mgr.apply_budgets_to_transactions(df_master=df)
+        self.assertIs(mgr.index_for(df), index)
+
+    def test_sync_transactions_is_incremental(self):
+        import pandas as pd
+        from Budget import BudgetLine
+        mgr = bm_mod.BudgetManager()
+        b = Budget(
+            name="inc",
+            start_date=__import__('datetime').date(2025, 1, 1),
+            end_date=__import__('datetime').date(2025, 12, 31),
+            limit=100.0,
+            budget_lines=[BudgetLine(category="groceries")],
+        )
+        mgr.add_or_update_budget(b)
+        first = pd.DataFrame([
+            {"Date": "2025-01-01", "Amount": 10.0, "Category": "Groceries", "tags": [], "tx_id": "a"},
+            {"Date": "2025-01-02", "Amount": 20.0, "Category": "Rent", "tags": [], "tx_id": "b"},
+        ])
+        mgr.sync_transactions(first)
+        self.assertEqual(b.tx_ids, ["a"])
+        self.assertEqual(b.summary()["total_spent"], 10.0)
+
+        second = pd.concat([first, pd.DataFrame([
+            {"Date": "2025-02-01", "Amount": 5.0, "Category": "Groceries", "tags": [], "tx_id": "c"},
+        ])], ignore_index=True)
+        mgr.sync_transactions(second)
+        self.assertEqual(b.tx_ids, ["a", "c"])
+        self.assertEqual(b.summary()["total_spent"], 15.0)
+
+        edited = second.copy()
+        edited.loc[edited["tx_id"] == "b", "Category"] = "Groceries"
+        edited.loc[edited["tx_id"] == "a", "Category"] = "Rent"
+        mgr.sync_transactions(edited, changed_ids={"a", "b"})
+        self.assertEqual(sorted(b.tx_ids), ["b", "c"])
+        self.assertEqual(b.summary()["total_spent"], 25.0)
+
+        added = mgr.add_transactions(pd.DataFrame([
+            {"Date": "2025-03-01", "Amount": 1.0, "Category": "Groceries", "tags": [], "tx_id": "c"},
+            {"Date": "2025-03-02", "Amount": 2.0, "Category": "Groceries", "tags": [], "tx_id": "d"},
+        ]))
+        self.assertEqual(added["tx_id"].tolist(), ["d"])
+        self.assertEqual(b.summary()["total_spent"], 27.0)
+
+    def test_forecast_projects_burn_rate_and_exhaustion(self):
+        import pandas as pd
+        from datetime import date
+        mgr = bm_mod.BudgetManager()
+        spent = pd.DataFrame({
+            "Date": ["2025-01-01", "2025-01-05", "2025-01-10"],
+            "Amount": [10.0, 10.0, 10.0],
+            "tx_id": ["a", "b", "c"],
+        })
+        for name, end, limit in (("month", date(2025, 1, 31), 100.0), ("quarter", date(2025, 3, 31), 15.0)):
+            b = Budget(name=name, start_date=date(2025, 1, 1), end_date=end, limit=limit)
+            b.transactions = spent
+            mgr.add_or_update_budget(b)
+        mgr.add_or_update_budget(Budget(name="later", start_date=date(2025, 6, 1), end_date=date(2025, 6, 30), limit=15.0))
+
+        forecast = mgr.forecast(as_of=date(2025, 1, 10))
+        self.assertEqual(forecast["month"]["spent_to_date"], 30.0)
+        self.assertEqual(forecast["month"]["daily_burn"], 3.0)
+        self.assertEqual(forecast["month"]["projected_spend"], 93.0)
+        self.assertIsNone(forecast["month"]["exhaustion_date"])
+        self.assertEqual(forecast["quarter"]["exhaustion_date"], date(2025, 1, 5))
+        self.assertEqual(forecast["later"]["projected_spend"], 0.0)
+        self.assertIs(mgr.forecast(as_of=date(2025, 1, 10)), forecast)
+        self.assertEqual(mgr.forecast(as_of=date(2025, 1, 2))["month"]["exhaustion_date"], date(2025, 1, 20))
+
+    def test_apply_budgets_from_ledger(self):
+        import pandas as pd
+        from Budget import BudgetLine
+        from Ledger import Ledger
+        with tempfile.TemporaryDirectory() as d:
+            ledger = Ledger(root=d)
+            ledger.append(pd.DataFrame([
+                {"Date": __import__('datetime').date(2024, 6, 1), "Amount": 99.0, "Details": "shop", "tx_id": "old"},
+                {"Date": __import__('datetime').date(2025, 3, 1), "Amount": 12.0, "Details": "shop", "tx_id": "new"},
+            ]))
+            mgr = bm_mod.BudgetManager()
+            mgr.add_or_update_budget(Budget(
+                name="ledger",
+                start_date=__import__('datetime').date(2025, 1, 1),
+                end_date=__import__('datetime').date(2025, 12, 31),
+                limit=100.0,
+                budget_lines=[BudgetLine(category="groceries")],
+            ))
+
+            class Store:
+                def categorize(self, details, scope):
+                    return pd.Series("Groceries", index=details.index)
+
+            df = mgr.apply_budgets_from_ledger(ledger, store=Store())
+            self.assertEqual(df["tx_id"].tolist(), ["new"])
+            self.assertEqual(mgr.get_budget("ledger").tx_ids, ["new"])
+
+    def test_tag_totals_use_tag_index_without_tags_column(self):
+        import pandas as pd
+        from Budget import BudgetLine
+        from TagIndex import TagIndex
+        mgr = bm_mod.BudgetManager(tag_index=TagIndex({"a": ["trip"], "b": ["trip"]}))
+        mgr.add_or_update_budget(Budget(
+            name="trip",
+            start_date=__import__('datetime').date(2025, 1, 1),
+            end_date=__import__('datetime').date(2025, 12, 31),
+            limit=100.0,
+            budget_lines=[BudgetLine(category="travel", include_tags=("trip",))],
+        ))
+        df = pd.DataFrame({
+            "tx_id": ["a", "b", "c"],
+            "Date": ["2025-02-01", "2025-02-02", "2025-02-03"],
+            "Amount": [10.0, 20.0, 5.0],
+            "Category": ["food", "travel", "rent"],
+        })
+        mgr.apply_budgets_to_transactions(df)
+        summary = mgr.get_budget("trip").summary()
+        self.assertEqual(summary["total_spent"], 30.0)
+        self.assertEqual(summary["per_category_spent"], {"travel": 30.0})
+        self.assertEqual(summary["per_tag_spent"], {"trip": 30.0})
+
     def test_save_budget_overwrites(self):
         with tempfile.TemporaryDirectory() as d:
             tmp_file = f"{d}/budgets.json"
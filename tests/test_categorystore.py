@@ -8,7 +8,7 @@ import pandas as pd
 
 sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
 
-from CategoryStore import CategoryStore
+from CategoryStore import CategoryStore, RuleMatcher
 
 class TestCategoryStore(unittest.TestCase):
     def test_load_and_add_category(self):
@@ -49,6 +49,10 @@ class TestCategoryStore(unittest.TestCase):
             self.assertTrue("tx_id" in cols or "transaction_id" in cols)
             self.assertIn("tags", out.columns)
 
+            keyed = store.apply_tags_to_df(df.assign(tx_id="tx1"), "file1.csv")
+            self.assertEqual(keyed["tx_id"].tolist(), ["tx1"])
+            self.assertEqual(keyed["tags"].iloc[0], ["groceries", "food"])
+
     def test_get_options_and_lookup(self):
         with tempfile.TemporaryDirectory() as d:
             cat_file = f"{d}/categories.json"
@@ -64,6 +68,137 @@ class TestCategoryStore(unittest.TestCase):
             self.assertIn("groceries", opts)
             lookup = store.get_lookup("categories")
             self.assertEqual(lookup.get("buy"), "groceries")
+            with self.assertRaises(TypeError):
+                lookup["buy"] = "other"
+
+            snapshot = store.get_data("categories")
+            self.assertIs(store.get_data("categories"), snapshot)
+            store.add_category("categories", "rent")
+            self.assertNotIn("rent", snapshot)
+            self.assertIn("rent", store.get_data("categories"))
+
+    def test_categorize_series(self):
+        with tempfile.TemporaryDirectory() as d:
+            cat_file = f"{d}/categories.json"
+            income_file = f"{d}/income_categories.json"
+            tags_file = f"{d}/tags.json"
+            open(cat_file, "w").write(json.dumps({"groceries": ["tesco"], "uncategorized": []}))
+            open(income_file, "w").write(json.dumps({"salary": ["acme ltd"]}))
+            open(tags_file, "w").write(json.dumps({}))
+
+            store = CategoryStore(cat_file, income_file, tags_path=tags_file)
+            store.load_all()
+            details = pd.Series([" TESCO ", "Acme Ltd", None, "unknown"], index=[10, 11, 12, 13])
+            out = store.categorize(details, "categories")
+            self.assertEqual(out.tolist(), ["Groceries", "Uncategorized", "Uncategorized", "Uncategorized"])
+            self.assertEqual(out.index.tolist(), [10, 11, 12, 13])
+            self.assertEqual(store.categorize(details, "income_categories").iloc[1], "Salary")
+
+    def test_set_category_updates_lookup_in_place(self):
+        with tempfile.TemporaryDirectory() as d:
+            cat_file = f"{d}/categories.json"
+            income_file = f"{d}/income_categories.json"
+            tags_file = f"{d}/tags.json"
+            open(cat_file, "w").write(json.dumps({"groceries": ["tesco", "lidl"]}))
+            open(income_file, "w").write(json.dumps({}))
+            open(tags_file, "w").write(json.dumps({}))
+
+            store = CategoryStore(cat_file, income_file, tags_path=tags_file)
+            store.load_all()
+            df = pd.DataFrame({"Details": ["Tesco", "Shell"]})
+            store.apply_edits("categories", {0: {"Category": "Food"}, 1: {"Category": "Fuel"}}, df)
+            self.assertEqual(store.get_lookup("categories")["tesco"], "food")
+            self.assertEqual(store.get_data("categories")["groceries"], ("lidl",))
+            self.assertEqual(store.get_data_copy("categories")["fuel"], ["shell"])
+
+            store.save_all()
+            self.assertEqual(json.load(open(cat_file))["food"], ["tesco"])
+            self.assertEqual(store.get_lookup("categories")["shell"], "fuel")
+
+    def test_pattern_rules(self):
+        with tempfile.TemporaryDirectory() as d:
+            cat_file = f"{d}/categories.json"
+            income_file = f"{d}/income_categories.json"
+            tags_file = f"{d}/tags.json"
+            rules_file = f"{d}/rules.json"
+            open(cat_file, "w").write(json.dumps({"groceries": ["amazon fresh"]}))
+            open(income_file, "w").write(json.dumps({}))
+            open(tags_file, "w").write(json.dumps({}))
+
+            store = CategoryStore(cat_file, income_file, tags_path=tags_file, rules_path=rules_file)
+            store.load_all()
+            store.add_rule("categories", "Shopping", "amazon")
+            store.add_rule("categories", "Transport", "uber", kind="prefix")
+            store.add_rule("categories", "Coffee", r"costa\s+\d+", kind="regex")
+            with self.assertRaises(ValueError):
+                store.add_rule("categories", "Broken", "(", kind="regex")
+
+            details = pd.Series(["Amazon Fresh", "AMAZON MKTPLACE", "Uber trip", "paid uber", "COSTA 1234", "other"])
+            out = store.categorize(details, "categories")
+            self.assertEqual(out.tolist(), ["Groceries", "Shopping", "Transport", "Uncategorized", "Coffee", "Uncategorized"])
+            self.assertIn("shopping", store.get_options("categories"))
+
+            store.save_all()
+            reloaded = CategoryStore(cat_file, income_file, tags_path=tags_file, rules_path=rules_file)
+            reloaded.load_all()
+            self.assertEqual(reloaded.categorize(details, "categories").tolist(), out.tolist())
+            reloaded.remove_rule("categories", 0)
+            self.assertEqual(reloaded.categorize(details, "categories").iloc[1], "Uncategorized")
+
+    def test_regex_rules_do_not_break_other_rules(self):
+        with tempfile.TemporaryDirectory() as d:
+            cat_file = f"{d}/categories.json"
+            income_file = f"{d}/income_categories.json"
+            tags_file = f"{d}/tags.json"
+            rules_file = f"{d}/rules.json"
+            open(cat_file, "w").write(json.dumps({}))
+            open(income_file, "w").write(json.dumps({}))
+            open(tags_file, "w").write(json.dumps({}))
+            open(rules_file, "w").write(json.dumps({"categories": [
+                {"category": "broken", "kind": "regex", "pattern": "("},
+                {"category": "shopping", "kind": "contains", "pattern": "amazon"},
+            ]}))
+
+            store = CategoryStore(cat_file, income_file, tags_path=tags_file, rules_path=rules_file)
+            store.load_all()
+            self.assertEqual([r["pattern"] for r in store.get_rules("categories")], ["amazon"])
+            store.add_rule("categories", "Streaming", "(?i)netflix", kind="regex")
+            store.add_rule("categories", "Repeats", r"(\d)\1", kind="regex")
+            store.add_rule("categories", "Named", "(?P<rule1>xyz)", kind="regex")
+            store.add_rule("categories", "Transport", "uber", kind="prefix")
+            store.add_rule("categories", "Rides", "uber", kind="contains")
+
+            details = pd.Series(["NETFLIX.COM", "shop 1223", "xyz ltd", "uber trip", "paid uber", "amazon 33", "other"])
+            out = store.categorize(details, "categories")
+            self.assertEqual(out.tolist(), ["Streaming", "Repeats", "Named", "Transport", "Rides", "Shopping", "Uncategorized"])
+
+    def test_suggest_categories_learns_from_edits(self):
+        with tempfile.TemporaryDirectory() as d:
+            cat_file = f"{d}/categories.json"
+            income_file = f"{d}/income_categories.json"
+            tags_file = f"{d}/tags.json"
+            model_path = f"{d}/model"
+            open(cat_file, "w").write(json.dumps({"groceries": ["tesco store 1", "tesco express"], "transport": ["uber trip"]}))
+            open(income_file, "w").write(json.dumps({}))
+            open(tags_file, "w").write(json.dumps({}))
+
+            store = CategoryStore(cat_file, income_file, tags_path=tags_file, model_path=model_path)
+            store.load_all()
+            details = pd.Series(["tesco store 1", "Tesco Store 2", "netflix.com"], index=[5, 6, 7])
+            suggestions = store.suggest_categories(details, "categories")
+            self.assertEqual(suggestions.index.tolist(), [5, 6, 7])
+            self.assertIsNone(suggestions[5])
+            self.assertEqual(suggestions[6], "Groceries")
+
+            df = pd.DataFrame({"Details": ["Netflix.com"]})
+            store.apply_edits("categories", {0: {"Category": "Subscriptions"}}, df)
+            self.assertIsNone(store.suggest_categories(details, "categories")[7])
+            self.assertEqual(store.suggest_categories(pd.Series(["netflix monthly"]), "categories")[0], "Subscriptions")
+
+            store.save_all()
+            reloaded = CategoryStore(cat_file, income_file, tags_path=tags_file, model_path=model_path)
+            reloaded.load_all()
+            self.assertEqual(reloaded.classifier("categories").n_labels, 4)
 
     def test_set_and_remove_tags_and_rebuild(self):
         with tempfile.TemporaryDirectory() as d:
@@ -84,6 +219,119 @@ class TestCategoryStore(unittest.TestCase):
             store.remove_tag("a", "tx1")
             self.assertNotIn("a", store.get_tags("tx1"))
 
+    def test_legacy_tags_are_rekeyed_on_tx_id(self):
+        with tempfile.TemporaryDirectory() as d:
+            cat_file = f"{d}/c.json"
+            income_file = f"{d}/i.json"
+            tags_file = f"{d}/t.json"
+            open(cat_file, "w").write(json.dumps({}))
+            open(income_file, "w").write(json.dumps({}))
+            open(tags_file, "w").write(json.dumps({"jan.csv": {"tx1": ["a"]}, "other.csv": {"tx2": ["b"]}}))
+
+            store = CategoryStore(cat_file, income_file, tags_path=tags_file)
+            store.load_all()
+            df = pd.DataFrame({"Details": ["x", "y"], "tx_id": ["tx1", "tx2"]})
+            out = store.apply_tags_to_df(df, "renamed.csv")
+            self.assertEqual(out["tags"].tolist(), [["a"], ["b"]])
+            store.save_all()
+            self.assertEqual(json.load(open(tags_file)), {"tx1": ["a"], "tx2": ["b"]})
+
+    def test_regex_rules_share_one_alternation(self):
+        rules = [
+            {"category": "fuel", "kind": "regex", "pattern": r"shell \d+"},
+            {"category": "coffee", "kind": "regex", "pattern": "cafe|coffee"},
+            {"category": "repeats", "kind": "regex", "pattern": r"(\d)\1"},
+            {"category": "streaming", "kind": "regex", "pattern": "(?i)netflix"},
+            {"category": "late", "kind": "regex", "pattern": "coffee"},
+        ]
+        matcher = RuleMatcher(rules)
+        self.assertEqual([i for i, _ in matcher._regexes], [2, 3])
+        self.assertEqual(matcher.match("shell 12 coffee"), "fuel")
+        self.assertEqual(matcher.match("coffee 77"), "coffee")
+        self.assertEqual(matcher.match("x 77 netflix"), "repeats")
+        self.assertEqual(matcher.match("netflix.com"), "streaming")
+        self.assertIsNone(matcher.match("tesco"))
+
+    def test_journal_replays_unsaved_edits(self):
+        with tempfile.TemporaryDirectory() as d:
+            cat_file = f"{d}/c.json"
+            income_file = f"{d}/i.json"
+            tags_file = f"{d}/t.json"
+            journal_file = f"{d}/edits.journal"
+            open(cat_file, "w").write(json.dumps({"groceries": ["tesco"]}))
+            open(income_file, "w").write(json.dumps({}))
+            open(tags_file, "w").write(json.dumps({}))
+
+            store = CategoryStore(cat_file, income_file, tags_path=tags_file,
+                                  rules_path=f"{d}/r.json", journal_path=journal_file)
+            store.load_all()
+            store.apply_edits("categories", {0: {"Category": "Food"}}, pd.DataFrame({"Details": ["Tesco"]}))
+            store.set_tags("tx1", ["work"])
+            store.add_rule("categories", "Transport", "uber")
+            store.flush()
+            self.assertEqual(json.load(open(cat_file)), {"groceries": ["tesco"]})
+            store.journal.close()
+
+            recovered = CategoryStore(cat_file, income_file, tags_path=tags_file,
+                                      rules_path=f"{d}/r.json", journal_path=journal_file)
+            recovered.load_all()
+            self.assertEqual(recovered.get_lookup("categories")["tesco"], "food")
+            self.assertEqual(recovered.get_tags("tx1"), ["work"])
+            self.assertEqual(len(recovered.get_rules("categories")), 1)
+
+            recovered.save_all()
+            self.assertEqual(recovered.journal.replay(), [])
+            self.assertEqual(json.load(open(cat_file))["food"], ["tesco"])
+
+    def test_compaction_keeps_other_sessions_journals(self):
+        with tempfile.TemporaryDirectory() as d:
+            cat_file = f"{d}/c.json"
+            open(cat_file, "w").write(json.dumps({"groceries": ["tesco"]}))
+            open(f"{d}/i.json", "w").write(json.dumps({}))
+
+            def session(name):
+                store = CategoryStore(cat_file, f"{d}/i.json", tags_path=f"{d}/t.json",
+                                      rules_path=f"{d}/r.json", journal_path=f"{d}/journals/{name}.journal")
+                store.load_all()
+                return store
+
+            first, second = session("first"), session("second")
+            first.set_tags("tx1", ["work"])
+            second.set_tags("tx2", ["trip"])
+            first.save_all()
+            self.assertEqual(second.journal.replay(), [["t", "tx2", ["trip"]]])
+            self.assertEqual(session("third").get_tags("tx2"), [])
+
+            second.journal.close()
+            fourth = session("fourth")
+            self.assertEqual(fourth.get_tags("tx1"), ["work"])
+            self.assertEqual(fourth.get_tags("tx2"), ["trip"])
+            fourth.save_all()
+            self.assertFalse(pathlib.Path(f"{d}/journals/second.journal").exists())
+            self.assertEqual(session("fifth").get_tags("tx2"), ["trip"])
+
+    def test_tokens_track_content(self):
+        with tempfile.TemporaryDirectory() as d:
+            cat_file = f"{d}/c.json"
+            income_file = f"{d}/i.json"
+            tags_file = f"{d}/t.json"
+            open(cat_file, "w").write(json.dumps({"groceries": ["tesco"]}))
+            open(income_file, "w").write(json.dumps({}))
+            open(tags_file, "w").write(json.dumps({}))
+
+            store = CategoryStore(cat_file, income_file, tags_path=tags_file, rules_path=f"{d}/r.json")
+            store.load_all()
+            other = CategoryStore(cat_file, income_file, tags_path=tags_file, rules_path=f"{d}/r.json")
+            other.load_all()
+            token, tags_token = store.categorization_token(), store.tags_token()
+            self.assertEqual(token, other.categorization_token())
+
+            store.set_tags("tx1", ["a"])
+            self.assertEqual(store.categorization_token(), token)
+            self.assertNotEqual(store.tags_token(), tags_token)
+            store.add_rule("categories", "Transport", "uber")
+            self.assertNotEqual(store.categorization_token(), token)
+
     def test_get_all_tags_empty_when_no_file(self):
         with tempfile.TemporaryDirectory() as d:
             cat_file = f"{d}/c2.json"
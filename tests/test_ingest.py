@@ -0,0 +1,100 @@
+import sys
+import io
+import pathlib
+import datetime
+import unittest
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+import json
+
+from CategoryStore import CategoryStore
+from ingest import import_files, ingest_to_ledger, iter_transactions, read_statement, read_statement_chunks
+from Ledger import Ledger
+from tx_ids import make_tx_ids
+
+CSV = """Date, Details, Amount, Debit/Credit,Unnamed: 4
+01 Jan 2025,Coffee,3.50,Debit,
+01 Jan 2025,Coffee,3.50,Debit,
+02 Jan 2025,Salary,"1,200.00",Credit,
+02 Jan 2025,Coffee,3.50,Debit,
+02 Jan 2025,Coffee,3.50,Debit,
+"""
+
+
+class StubStore:
+    def categorize(self, details, scope):
+        return pd.Series("Expense" if scope == "categories" else "Income", index=details.index)
+
+
+class TestIngest(unittest.TestCase):
+    def test_chunks_are_normalized(self):
+        chunks = list(read_statement_chunks(io.StringIO(CSV), chunksize=2))
+        self.assertEqual([len(c) for c in chunks], [2, 2, 1])
+        first = chunks[0]
+        self.assertEqual(list(first.columns), ["Date", "Details", "Amount", "Debit/Credit", "tx_id"])
+        self.assertEqual(first["Date"].iloc[0], datetime.date(2025, 1, 1))
+        self.assertEqual(chunks[1]["Amount"].iloc[0], 1200.0)
+
+    def test_chunked_ids_match_whole_file_ids(self):
+        chunked = pd.concat(read_statement_chunks(io.StringIO(CSV), chunksize=2), ignore_index=True)
+        whole = read_statement(io.StringIO(CSV), chunksize=100)
+        self.assertEqual(chunked["tx_id"].tolist(), whole["tx_id"].tolist())
+        self.assertEqual(whole["tx_id"].tolist(), make_tx_ids(whole.drop(columns="tx_id")).tolist())
+        self.assertTrue(whole["tx_id"].is_unique)
+
+    def test_iter_transactions_categorizes_each_chunk(self):
+        chunks = list(iter_transactions(io.StringIO(CSV), chunksize=3, store=StubStore()))
+        categories = pd.concat(chunks)["Category"].tolist()
+        self.assertEqual(categories, ["Expense", "Expense", "Income", "Expense", "Expense"])
+
+    def test_ingest_to_ledger(self):
+        with tempfile.TemporaryDirectory() as d:
+            ledger = Ledger(root=d)
+            self.assertEqual(ingest_to_ledger(io.StringIO(CSV), ledger, chunksize=2), 5)
+            self.assertEqual(ingest_to_ledger(io.StringIO(CSV), ledger, chunksize=2), 0)
+
+    def test_bad_amount_raises(self):
+        with self.assertRaises(ValueError):
+            read_statement(io.StringIO("Date,Details,Amount,Debit/Credit\n01 Jan 2025,x,abc,Debit\n"))
+
+    def test_import_files_merges_and_reports_errors(self):
+        with tempfile.TemporaryDirectory() as d:
+            overlap = f"{d}/overlap.csv"
+            with open(overlap, "w") as f:
+                f.write("Date,Details,Amount,Debit/Credit\n02 Jan 2025,Salary,\"1,200.00\",Credit\n03 Jan 2025,Rent,500,Debit\n")
+            bad = io.BytesIO(b"When,What\n1,2\n")
+            bad.name = "bad.csv"
+            result = import_files([io.StringIO(CSV), overlap, bad], store=StubStore(), max_workers=2)
+            self.assertIn("bad.csv", result.errors)
+            self.assertEqual(result.rows[overlap], 2)
+            self.assertEqual(len(result.transactions), 6)
+            self.assertTrue(result.transactions["tx_id"].is_unique)
+            self.assertIn("Category", result.transactions.columns)
+
+    def test_import_files_categorizes_with_a_journaled_store(self):
+        with tempfile.TemporaryDirectory() as d:
+            with open(f"{d}/c.json", "w") as f:
+                json.dump({"coffee": ["coffee"]}, f)
+            with open(f"{d}/i.json", "w") as f:
+                json.dump({"pay": ["salary"]}, f)
+            store = CategoryStore(f"{d}/c.json", f"{d}/i.json", tags_path=f"{d}/t.json",
+                                  rules_path=f"{d}/r.json", journal_path=f"{d}/journals/edits.journal")
+            store.load_all()
+            store.add_rule("categories", "Housing", "rent")
+            other = f"{d}/other.csv"
+            with open(other, "w") as f:
+                f.write("Date,Details,Amount,Debit/Credit\n03 Jan 2025,Rent Jan,500,Debit\n")
+            result = import_files([io.StringIO(CSV), other], store=store, max_workers=2)
+            self.assertEqual(result.errors, {})
+            categories = result.transactions.set_index("Details")["Category"].to_dict()
+            self.assertEqual(categories, {"Coffee": "Coffee", "Salary": "Pay", "Rent Jan": "Housing"})
+            store.set_tags("tx1", ["work"])
+            self.assertEqual(store.journal.replay()[-1], ["t", "tx1", ["work"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import sys
+import pathlib
+import unittest
+import tempfile
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from Journal import Journal
+
+
+class TestJournal(unittest.TestCase):
+    def test_append_and_replay(self):
+        with tempfile.TemporaryDirectory() as d:
+            journal = Journal(f"{d}/edits.journal", sync_every=2)
+            journal.append(["c", "categories", "tesco", "groceries"])
+            journal.append(["t", "tx1", ["food"]])
+            journal.close()
+            self.assertEqual(Journal(f"{d}/edits.journal").replay(), [
+                ["c", "categories", "tesco", "groceries"],
+                ["t", "tx1", ["food"]],
+            ])
+
+    def test_torn_tail_is_dropped(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = f"{d}/edits.journal"
+            journal = Journal(path)
+            journal.append(["t", "tx1", ["food"]])
+            journal.close()
+            with open(path, "a") as f:
+                f.write('["t","tx2",["wo')
+            journal = Journal(path)
+            self.assertEqual(journal.replay(), [["t", "tx1", ["food"]]])
+            journal.append(["t", "tx3", []])
+            journal.close()
+            self.assertEqual(len(Journal(path).replay()), 2)
+
+    def test_truncate(self):
+        with tempfile.TemporaryDirectory() as d:
+            journal = Journal(f"{d}/edits.journal")
+            journal.append(["a", "categories", "rent"])
+            journal.truncate()
+            self.assertEqual(journal.records, 0)
+            self.assertEqual(journal.replay(), [])
+
+    def test_claim_is_exclusive_until_close(self):
+        with tempfile.TemporaryDirectory() as d:
+            owner = Journal(f"{d}/edits.journal")
+            self.assertTrue(owner.claim())
+            owner.append(["t", "tx1", ["food"]])
+            self.assertFalse(Journal(f"{d}/edits.journal").claim())
+            owner.close()
+            orphan = Journal(f"{d}/edits.journal")
+            self.assertTrue(orphan.claim())
+            self.assertEqual(orphan.replay(), [["t", "tx1", ["food"]]])
+            orphan.remove()
+            self.assertFalse(pathlib.Path(f"{d}/edits.journal").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
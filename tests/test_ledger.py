@@ -0,0 +1,77 @@
+import sys
+import pathlib
+import datetime
+import unittest
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from Ledger import Ledger
+
+
+class TestLedger(unittest.TestCase):
+    def make_df(self):
+        return pd.DataFrame([
+            {"Date": datetime.date(2025, 1, 5), "Details": "Tesco", "Amount": 10.0, "Debit/Credit": "Debit", "tx_id": "a", "Category": "Groceries"},
+            {"Date": datetime.date(2025, 1, 20), "Details": "Acme", "Amount": 900.0, "Debit/Credit": "Credit", "tx_id": "b", "Category": "Salary"},
+            {"Date": datetime.date(2025, 2, 3), "Details": "Rent", "Amount": 500.0, "Debit/Credit": "Debit", "tx_id": "c", "Category": "Rent"},
+        ])
+
+    def test_append_partitions_by_month(self):
+        with tempfile.TemporaryDirectory() as d:
+            ledger = Ledger(root=d)
+            added = ledger.append(self.make_df())
+            self.assertEqual(len(added), 3)
+            self.assertEqual(ledger.months(), ["2025-01", "2025-02"])
+            version = ledger.version()
+            self.assertEqual(ledger.version(), version)
+            ledger.append(self.make_df().assign(tx_id=["x", "y", "z"]))
+            self.assertNotEqual(ledger.version(), version)
+            self.assertNotIn("Category", ledger.load().columns)
+
+    def test_append_deduplicates_on_tx_id(self):
+        with tempfile.TemporaryDirectory() as d:
+            ledger = Ledger(root=d)
+            ledger.append(self.make_df())
+            more = pd.concat([self.make_df(), pd.DataFrame([
+                {"Date": datetime.date(2025, 2, 10), "Details": "Cafe", "Amount": 3.0, "Debit/Credit": "Debit", "tx_id": "d"},
+            ])], ignore_index=True)
+            added = ledger.append(more)
+            self.assertEqual(added["tx_id"].tolist(), ["d"])
+            self.assertEqual(sorted(ledger.load()["tx_id"]), ["a", "b", "c", "d"])
+
+    def test_load_reads_only_requested_range(self):
+        with tempfile.TemporaryDirectory() as d:
+            ledger = Ledger(root=d)
+            ledger.append(self.make_df())
+            january = ledger.load(datetime.date(2025, 1, 10), datetime.date(2025, 1, 31))
+            self.assertEqual(january["tx_id"].tolist(), ["b"])
+            self.assertEqual(january["Date"].iloc[0], datetime.date(2025, 1, 20))
+            self.assertEqual(ledger.date_range(), (datetime.date(2025, 1, 5), datetime.date(2025, 2, 3)))
+
+    def test_appends_write_parts_without_rewriting_the_month(self):
+        with tempfile.TemporaryDirectory() as d:
+            ledger = Ledger(root=d, compact_after=3)
+            rows = [{"Date": datetime.date(2025, 3, i + 1), "Details": "Cafe", "Amount": 3.0, "Debit/Credit": "Debit", "tx_id": f"t{i}"} for i in range(4)]
+            for i in range(3):
+                self.assertEqual(len(ledger.append(pd.DataFrame(rows[i:i + 2]))), 2 if i == 0 else 1)
+            self.assertEqual(len(ledger.parts("2025-03")), 3)
+            rows.append(dict(rows[0], tx_id="t4"))
+            self.assertEqual(len(Ledger(root=d).append(pd.DataFrame(rows))), 1)
+            self.assertEqual(len(ledger.append(pd.DataFrame(rows))), 0)
+            ledger.append(pd.DataFrame([dict(rows[0], tx_id="t9")]))
+            self.assertEqual(len(ledger.parts("2025-03")), 1)
+            self.assertEqual(sorted(ledger.partition("2025-03")["tx_id"]), ["t0", "t1", "t2", "t3", "t4", "t9"])
+
+    def test_empty_ledger(self):
+        with tempfile.TemporaryDirectory() as d:
+            ledger = Ledger(root=f"{d}/missing")
+            self.assertTrue(ledger.is_empty())
+            self.assertTrue(ledger.load().empty)
+            self.assertIsNone(ledger.date_range())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import sys
+import pathlib
+import unittest
+import tempfile
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from MerchantClassifier import MerchantClassifier
+
+
+class TestMerchantClassifier(unittest.TestCase):
+    def make_model(self):
+        return MerchantClassifier().fit({
+            "groceries": ["tesco store 123", "tesco express", "lidl gb"],
+            "transport": ["uber trip", "uber *ride", "tfl travel"],
+        })
+
+    def test_predict_batch(self):
+        labels, confidence = self.make_model().predict(["TESCO 999".lower(), "uber eats trip", ""])
+        self.assertEqual(labels[:2], ["groceries", "transport"])
+        self.assertEqual(len(confidence), 3)
+        self.assertTrue((confidence[:2] > 0.5).all())
+
+    def test_partial_fit_and_unlearn(self):
+        model = self.make_model()
+        self.assertEqual(model.n_labels, 6)
+        model.partial_fit(["netflix.com", "netflix monthly"], ["subscriptions", "subscriptions"])
+        self.assertEqual(model.predict(["netflix"])[0], ["subscriptions"])
+        model.unlearn(["netflix.com", "netflix monthly"], ["subscriptions", "subscriptions"])
+        self.assertEqual(model.n_labels, 6)
+        self.assertNotEqual(model.predict(["netflix"])[0], ["subscriptions"])
+
+    def test_empty_model_predicts_nothing(self):
+        labels, confidence = MerchantClassifier().predict(["tesco"])
+        self.assertEqual(labels, [None])
+        self.assertEqual(confidence.tolist(), [0.0])
+
+    def test_save_and_load(self):
+        model = self.make_model()
+        with tempfile.TemporaryDirectory() as d:
+            path = f"{d}/model.npz"
+            model.save(path)
+            loaded = MerchantClassifier.load(path)
+        self.assertEqual(loaded.classes, model.classes)
+        self.assertEqual(loaded.n_labels, model.n_labels)
+        self.assertEqual(loaded.predict(["tesco"])[0], ["groceries"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import sys
+import pathlib
+import datetime
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from paging import PageQuery, page_of, edits_by_tx_id, apply_page_edits
+from TagIndex import TagIndex
+
+
+class TestPaging(unittest.TestCase):
+    def make_df(self, n=250):
+        return pd.DataFrame({
+            "Date": [datetime.date(2025, 1, 1) + datetime.timedelta(days=i) for i in range(n)],
+            "Details": [f"shop {i}" for i in range(n)],
+            "Amount": [float(i) for i in range(n)],
+            "Category": ["Food" if i % 2 else "Rent" for i in range(n)],
+            "tags": [["trip"] if i % 10 == 0 else [] for i in range(n)],
+            "tx_id": [f"t{i}" for i in range(n)],
+        })
+
+    def test_page_slices_sorted_view(self):
+        df = self.make_df()
+        page, total = page_of(df, PageQuery(page=1, page_size=100))
+        self.assertEqual(total, 250)
+        self.assertEqual(len(page), 100)
+        self.assertEqual(page["tx_id"].iloc[0], "t149")
+        self.assertEqual(page.index.tolist(), list(range(100)))
+        last, _ = page_of(df, PageQuery(page=99, page_size=100, ascending=True))
+        self.assertEqual(last["tx_id"].tolist()[-1], "t249")
+
+    def test_filters(self):
+        df = self.make_df()
+        query = PageQuery(categories=("food",), tag="trip", sort_by="Amount", ascending=True)
+        page, total = page_of(df, query)
+        self.assertEqual(total, 0)
+        page, total = page_of(df, PageQuery(tag="trip", start=datetime.date(2025, 1, 5)))
+        self.assertEqual(total, 24)
+        indexed, indexed_total = page_of(df, PageQuery(tag="trip"), tag_index=TagIndex({"t3": ["trip"]}))
+        self.assertEqual((indexed_total, indexed["tx_id"].tolist()), (1, ["t3"]))
+
+    def test_edits_map_back_by_tx_id(self):
+        df = self.make_df()
+        page, _ = page_of(df, PageQuery(page=2, page_size=10, ascending=True))
+        edited = {0: {"Category": "Travel"}, 3: {"tags": "Work, trip"}}
+        self.assertEqual(edits_by_tx_id(edited, page), {"t20": {"Category": "Travel"}, "t23": {"tags": "Work, trip"}})
+        merged = apply_page_edits(df, edited, page)
+        self.assertEqual(merged.loc[20, "Category"], "Travel")
+        self.assertEqual(merged.loc[23, "tags"], ["work", "trip"])
+        self.assertEqual(df.loc[20, "Category"], "Rent")
+
+
+if __name__ == "__main__":
+    unittest.main()
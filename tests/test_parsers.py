@@ -0,0 +1,65 @@
+import sys
+import io
+import pathlib
+import datetime
+import unittest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from parsers import BankFormat, detect_format, get_format, read_header, register_format
+from ingest import read_statement
+
+SIGNED_CSV = """Date,Description,Amount,Balance
+2025-03-01,Coffee Shop,-3.50,96.50
+2025-03-02,Refund,10.00,106.50
+"""
+
+SPLIT_CSV = """Transaction Date,Transaction Type,Transaction Description,Debit Amount,Credit Amount,Balance
+01/04/2025,DEB,TESCO STORE 1234,"1,204.10",,10.00
+02/04/2025,FPI,ACME LTD,,2500.00,2510.00
+"""
+
+
+class TestParsers(unittest.TestCase):
+    def test_read_header_rewinds(self):
+        f = io.BytesIO(b"\xef\xbb\xbfDate, Details ,Amount\n01 Jan 2025,x,1\n")
+        self.assertEqual(read_header(f), ["Date", "Details", "Amount"])
+        self.assertEqual(f.tell(), 0)
+
+    def test_detect_formats(self):
+        self.assertEqual(detect_format(io.StringIO("Date,Details,Amount,Debit/Credit\n")).name, "default")
+        self.assertEqual(detect_format(io.StringIO(SIGNED_CSV)).name, "signed_amount")
+        self.assertEqual(detect_format(io.StringIO(SPLIT_CSV)).name, "debit_credit_columns")
+        with self.assertRaises(ValueError):
+            detect_format(io.StringIO("When,What\n"))
+
+    def test_signed_amounts(self):
+        df = read_statement(io.StringIO(SIGNED_CSV))
+        self.assertEqual(df["Debit/Credit"].tolist(), ["Debit", "Credit"])
+        self.assertEqual(df["Amount"].tolist(), [3.5, 10.0])
+        self.assertEqual(df["Details"].iloc[0], "Coffee Shop")
+        self.assertEqual(df["Date"].iloc[0], datetime.date(2025, 3, 1))
+
+    def test_split_debit_credit_columns(self):
+        df = read_statement(io.StringIO(SPLIT_CSV))
+        self.assertEqual(df["Debit/Credit"].tolist(), ["Debit", "Credit"])
+        self.assertEqual(df["Amount"].tolist(), [1204.10, 2500.0])
+        self.assertEqual(df["Date"].iloc[1], datetime.date(2025, 4, 2))
+        self.assertIn("tx_id", df.columns)
+
+    def test_register_custom_format(self):
+        register_format(BankFormat(
+            name="test_bank",
+            columns={"Posted": "Date", "Memo": "Details", "Value": "Amount"},
+            date_format="%m/%d/%Y",
+            sign="signed",
+            dtypes={"Value": "float64"},
+        ))
+        df = read_statement(io.StringIO("Posted,Memo,Value\n12/31/2024,Gym,-20\n"))
+        self.assertEqual(get_format("test_bank").name, "test_bank")
+        self.assertEqual(df["Date"].iloc[0], datetime.date(2024, 12, 31))
+        self.assertEqual(df["Amount"].iloc[0], 20.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import sys
+import pathlib
+import tempfile
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from Ledger import Ledger
+from RecurringDetector import RecurringDetector
+
+
+def _statement():
+    monthly = pd.DataFrame({
+        "tx_id": [f"n{i}" for i in range(6)],
+        "Date": [f"2025-0{m}-15" for m in range(1, 7)],
+        "Details": [" NETFLIX.COM "] * 6,
+        "Amount": [15.99] * 6,
+        "Debit/Credit": ["Debit"] * 6,
+    })
+    weekly = pd.DataFrame({
+        "tx_id": [f"g{i}" for i in range(5)],
+        "Date": pd.date_range("2025-03-03", periods=5, freq="7D").strftime("%Y-%m-%d"),
+        "Details": ["Gym"] * 5,
+        "Amount": [10.0, 10.0, 10.5, 10.0, 10.0],
+        "Debit/Credit": ["Debit"] * 5,
+    })
+    irregular = pd.DataFrame({
+        "tx_id": [f"s{i}" for i in range(4)],
+        "Date": ["2025-01-02", "2025-01-03", "2025-02-20", "2025-05-01"],
+        "Details": ["Supermarket"] * 4,
+        "Amount": [40.0, 12.0, 95.0, 33.0],
+        "Debit/Credit": ["Debit"] * 4,
+    })
+    return pd.concat([monthly, weekly, irregular], ignore_index=True)
+
+
+class TestRecurringDetector(unittest.TestCase):
+    def test_flags_steady_series_with_period_and_next_date(self):
+        detector = RecurringDetector()
+        self.assertEqual(detector.update(_statement()), 15)
+        found = detector.recurring()
+        self.assertEqual(sorted(found.index), ["gym", "netflix.com"])
+        self.assertEqual(found.loc["netflix.com", "period"], "monthly")
+        self.assertEqual(found.loc["netflix.com", "next_expected"], pd.Timestamp("2025-07-15"))
+        self.assertEqual(found.loc["gym", "period"], "weekly")
+        self.assertEqual(found.loc["gym", "next_expected"], pd.Timestamp("2025-04-07"))
+        self.assertFalse(detector.series.loc["supermarket", "recurring"])
+
+    def test_update_only_adds_unseen_rows(self):
+        detector = RecurringDetector()
+        detector.update(_statement())
+        version = detector.version
+        self.assertEqual(detector.update(_statement()), 0)
+        self.assertEqual(detector.version, version)
+        late = pd.DataFrame({
+            "tx_id": ["n6"], "Date": ["2025-07-15"], "Details": ["Netflix.com"],
+            "Amount": [15.99], "Debit/Credit": ["Debit"],
+        })
+        self.assertEqual(detector.update(late), 1)
+        self.assertEqual(detector.series.loc["netflix.com", "count"], 7)
+        self.assertEqual(detector.series.loc["netflix.com", "next_expected"], pd.Timestamp("2025-08-15"))
+        self.assertEqual(detector.series.loc["gym", "count"], 5)
+
+    def test_refresh_reads_new_ledger_partitions(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            ledger = Ledger(root=tmp)
+            ledger.append(_statement())
+            detector = RecurringDetector()
+            self.assertEqual(detector.refresh(ledger), 15)
+            self.assertEqual(detector.refresh(ledger), 0)
+            ledger.append(pd.DataFrame({
+                "tx_id": ["n6"], "Date": ["2025-07-15"], "Details": ["Netflix.com"],
+                "Amount": [15.99], "Debit/Credit": ["Debit"],
+            }))
+            self.assertEqual(detector.refresh(ledger), 1)
+            self.assertIn("netflix.com", detector.recurring().index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import sys
+import pathlib
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from render import frame_version, set_frame_version, memoize, unchanged, mark
+
+
+class TestRender(unittest.TestCase):
+    def test_frame_version(self):
+        df = pd.DataFrame({"Amount": [1.0, 2.0], "tags": [["a"], []]})
+        hashed = frame_version(df)
+        self.assertEqual(hashed, frame_version(df.copy()))
+        self.assertNotEqual(hashed, frame_version(df.assign(Amount=[1.0, 3.0])))
+        set_frame_version(df, "v1")
+        self.assertEqual(frame_version(df), ("v1", (2, 2)))
+        self.assertEqual(frame_version(df.copy(deep=False)), ("v1", (2, 2)))
+
+    def test_memoize_reuses_value_while_inputs_match(self):
+        calls = []
+        compute = lambda: calls.append(1) or len(calls)
+        self.assertEqual(memoize("test-panel", ("v1",), compute), 1)
+        self.assertEqual(memoize("test-panel", ("v1",), compute), 1)
+        self.assertEqual(memoize("test-panel", ("v2",), compute), 2)
+        self.assertFalse(unchanged("test-sync", 1))
+        mark("test-sync", 1)
+        self.assertTrue(unchanged("test-sync", 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
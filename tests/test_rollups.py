@@ -0,0 +1,61 @@
+import sys
+import pathlib
+import unittest
+from datetime import date
+
+import pandas as pd
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from Rollups import Rollups
+
+
+def _frame():
+    return pd.DataFrame({
+        "tx_id": ["a", "b", "c"],
+        "Date": ["2025-01-01", "2025-01-01", "2025-02-03"],
+        "Amount": [10.0, 5.0, 2.5],
+        "Category": ["Food", "Rent", "Food"],
+        "tags": [["x"], [], ["x", "y"]],
+    })
+
+
+class TestRollups(unittest.TestCase):
+    def test_aggregates_by_day_month_category_and_tag(self):
+        rollups = Rollups()
+        self.assertEqual(rollups.update(_frame()), 3)
+        self.assertEqual(rollups.update(_frame()), 0)
+        totals = rollups.category_totals().set_index("Category")
+        self.assertEqual(totals.loc["food", "Amount"], 12.5)
+        self.assertEqual(totals.loc["rent", "count"], 1)
+        monthly = rollups.monthly(by=None)
+        self.assertEqual(monthly["Amount"].tolist(), [15.0, 2.5])
+        self.assertEqual(rollups.tag_totals().set_index("tag")["Amount"].to_dict(), {"x": 12.5, "y": 2.5})
+        self.assertEqual(rollups.daily(start=date(2025, 2, 1))["Amount"].tolist(), [2.5])
+        self.assertEqual(rollups.span(), (date(2025, 1, 1), date(2025, 2, 3)))
+
+    def test_edits_move_only_changed_rows(self):
+        rollups = Rollups()
+        rollups.update(_frame())
+        version = rollups.version
+        edited = _frame().assign(Category=["Food", "Food", "Food"], tags=[[], [], ["x", "y"]])
+        self.assertEqual(rollups.update(edited), 2)
+        self.assertGreater(rollups.version, version)
+        self.assertEqual(rollups.category_totals()["Category"].tolist(), ["food"])
+        self.assertEqual(rollups.tag_totals().set_index("tag")["Amount"].to_dict(), {"x": 2.5, "y": 2.5})
+        self.assertEqual(rollups.daily_for(["a", "c"]).tolist(), [10.0, 2.5])
+
+    def test_sync_drops_rows_outside_the_frame(self):
+        rollups = Rollups()
+        rollups.update(_frame())
+        other = pd.DataFrame({"tx_id": ["d"], "Date": ["2025-01-01"], "Amount": [1.0], "Category": ["Fun"], "tags": [["x"]]})
+        self.assertEqual(rollups.sync(other), 4)
+        self.assertEqual(rollups.category_totals().set_index("Category")["Amount"].to_dict(), {"fun": 1.0})
+        self.assertEqual(rollups.tag_totals().set_index("tag")["Amount"].to_dict(), {"x": 1.0})
+        self.assertEqual(rollups.sync(other), 0)
+        self.assertEqual(rollups.sync(None), 1)
+        self.assertTrue(rollups.category_totals().empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import sys
+import pathlib
+import datetime
+import json
+import unittest
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from Budget import Budget, BudgetLine
+from BudgetManager import BudgetManager
+from CategoryStore import CategoryStore
+from SqliteStorage import SqliteStorage
+
+
+class TestSqliteStorage(unittest.TestCase):
+    def make_store(self, d, storage):
+        return CategoryStore(f"{d}/c.json", f"{d}/i.json", tags_path=f"{d}/t.json",
+                             rules_path=f"{d}/r.json", model_path=f"{d}/m", backend=storage)
+
+    def test_category_store_roundtrip(self):
+        with tempfile.TemporaryDirectory() as d:
+            storage = SqliteStorage(f"{d}/finance.db")
+            self.assertEqual(storage.conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            store = self.make_store(d, storage)
+            store.load_all()
+            store.add_category("categories", "Groceries")
+            store.apply_edits("categories", {0: {"Category": "Groceries"}}, pd.DataFrame({"Details": ["Tesco"]}))
+            store.add_rule("categories", "Transport", "uber", kind="prefix")
+            store.set_tags("tx1", ["food", "work"])
+            store.save_all()
+
+            reloaded = self.make_store(d, SqliteStorage(f"{d}/finance.db"))
+            reloaded.load_all()
+            self.assertEqual(reloaded.get_lookup("categories")["tesco"], "groceries")
+            self.assertEqual(reloaded.get_rules("categories")[0]["pattern"], "uber")
+            self.assertEqual(reloaded.get_tags("tx1"), ["food", "work"])
+            self.assertIn("transport", reloaded.get_options("categories"))
+
+            reloaded.apply_edits("categories", {0: {"Category": "Food"}}, pd.DataFrame({"Details": ["Tesco"]}))
+            reloaded.set_tags("tx1", [])
+            reloaded.save_all()
+            rows = storage.conn.execute("SELECT detail, category FROM category_details").fetchall()
+            self.assertEqual(rows, [("tesco", "food")])
+            self.assertEqual(storage.conn.execute("SELECT COUNT(*) FROM tags").fetchone()[0], 0)
+
+    def test_budget_memberships(self):
+        with tempfile.TemporaryDirectory() as d:
+            storage = SqliteStorage(f"{d}/finance.db")
+            manager = BudgetManager(storage=storage)
+            b = Budget(name="food", start_date=datetime.date(2025, 1, 1), end_date=datetime.date(2025, 12, 31),
+                       limit=100.0, budget_lines=[BudgetLine(category="food")])
+            b.tx_ids = ["a", "b"]
+            manager.save_budget(b)
+            b.tx_ids = ["b", "c"]
+            manager.save_budget(b)
+            rows = storage.conn.execute("SELECT tx_id FROM budget_memberships ORDER BY position").fetchall()
+            self.assertEqual([r[0] for r in rows], ["b", "c"])
+
+            other = BudgetManager(storage=storage)
+            other.load_all()
+            self.assertEqual(other.get_budget("food").tx_ids, ["b", "c"])
+            self.assertEqual(other.get_budget("food").budget_lines[0].category, "food")
+            other.delete_budget("food")
+            self.assertEqual(storage.load_budgets(), {})
+
+    def test_import_json(self):
+        with tempfile.TemporaryDirectory() as d:
+            open(f"{d}/c.json", "w").write(json.dumps({"groceries": ["tesco"]}))
+            open(f"{d}/i.json", "w").write(json.dumps({"salary": ["acme"]}))
+            open(f"{d}/t.json", "w").write(json.dumps({"jan.csv": {"tx1": ["food"]}}))
+            open(f"{d}/b.json", "w").write(json.dumps({"food": {"name": "food", "start_date": "2025-01-01",
+                                                                 "end_date": "2025-12-31", "limit": 50.0,
+                                                                 "budget_lines": [], "tx_ids": ["tx1"]}}))
+            storage = SqliteStorage(f"{d}/finance.db")
+            self.assertTrue(storage.is_empty())
+            storage.import_json(f"{d}/c.json", f"{d}/i.json", f"{d}/t.json", f"{d}/missing.json", f"{d}/b.json")
+            self.assertFalse(storage.is_empty())
+            self.assertEqual(storage.load_categories()["income_categories"]["salary"], {"acme": None})
+            self.assertEqual(storage.load_tags(), {"tx1": ["food"]})
+            self.assertEqual(storage.load_budgets()["food"]["tx_ids"], ["tx1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
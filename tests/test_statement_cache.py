@@ -0,0 +1,56 @@
+import sys
+import pathlib
+import unittest
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from StatementCache import StatementCache, frame_bytes
+
+
+class TestStatementCache(unittest.TestCase):
+    def make_df(self, n=100, offset=0):
+        return pd.DataFrame({"Details": [f"shop {i}" for i in range(offset, offset + n)], "Amount": [1.0] * n})
+
+    def test_key_depends_on_content_and_format(self):
+        a = StatementCache.key_for([b"Date,Amount\n"])
+        self.assertEqual(a, StatementCache.key_for([b"Date,Amount\n"]))
+        self.assertNotEqual(a, StatementCache.key_for([b"Date,Amount\n"], "signed_amount"))
+        self.assertNotEqual(a, StatementCache.key_for([b"Date,Amount\n", b""]))
+
+    def test_lru_byte_budget(self):
+        df = self.make_df()
+        cache = StatementCache(max_bytes=int(frame_bytes(df) * 2.5))
+        cache.put_parsed("a", df)
+        cache.put_parsed("b", self.make_df(offset=100))
+        self.assertIsNotNone(cache.get_parsed("a"))
+        cache.put_parsed("c", self.make_df(offset=200))
+        self.assertIsNone(cache.get_parsed("b"))
+        self.assertIsNotNone(cache.get_parsed("a"))
+        self.assertLessEqual(cache.nbytes, cache.max_bytes)
+
+    def test_evicted_frames_spill_to_disk(self):
+        with tempfile.TemporaryDirectory() as d:
+            df = self.make_df()
+            cache = StatementCache(max_bytes=int(frame_bytes(df) * 1.5), spill_dir=d)
+            cache.put_parsed("a", df)
+            cache.put_parsed("b", self.make_df(offset=100))
+            restored = cache.get_parsed("a")
+            self.assertEqual(restored["Details"].tolist(), df["Details"].tolist())
+
+    def test_processed_layer_keeps_latest_token(self):
+        cache = StatementCache()
+        expenses, income = self.make_df(), self.make_df(offset=5)
+        cache.put_processed("a", "t1", (expenses, income))
+        hit = cache.get_processed("a", "t1")
+        hit[0]["Category"] = "changed"
+        self.assertNotIn("Category", cache.get_processed("a", "t1")[0].columns)
+        cache.put_processed("a", "t2", (expenses, income))
+        self.assertIsNone(cache.get_processed("a", "t1"))
+        self.assertIsNotNone(cache.get_processed("a", "t2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import sys
+import pathlib
+import unittest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from TagIndex import TagIndex
+
+
+class TestTagIndex(unittest.TestCase):
+    def test_set_updates_inverted_index(self):
+        index = TagIndex()
+        index.set("tx1", ["food", "work"])
+        index.set("tx2", ["food"])
+        self.assertEqual(index.tags, ["food", "work"])
+        self.assertEqual(index.tx_ids_with("food"), {"tx1", "tx2"})
+        self.assertEqual(index.count("food"), 2)
+
+        index.set("tx1", ["food"])
+        self.assertEqual(index.tags, ["food"])
+        self.assertEqual(index.tx_ids_with_any(["work", "food"]), {"tx1", "tx2"})
+        index.set("tx2", [])
+        self.assertNotIn("tx2", index)
+        self.assertEqual(index.get("tx2"), [])
+
+    def test_from_dict_merges_legacy_file_layout(self):
+        index = TagIndex.from_dict({
+            "jan.csv": {"tx1": ["food"], "tx2": ["rent"]},
+            "copy.csv": {"tx1": ["work"]},
+        })
+        self.assertEqual(index.get("tx1"), ["food", "work"])
+        self.assertEqual(index.to_dict(), {"tx1": ["food", "work"], "tx2": ["rent"]})
+        self.assertEqual(TagIndex.from_dict(index.to_dict()).to_dict(), index.to_dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import sys
+import pathlib
+import datetime
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from tx_ids import TxIdStream, make_tx_ids
+
+
+class TestTxIds(unittest.TestCase):
+    def make_df(self):
+        return pd.DataFrame([
+            {"Date": datetime.date(2025, 1, 1), "Amount": 5.0, "Details": "Coffee"},
+            {"Date": datetime.date(2025, 1, 1), "Amount": 5.0, "Details": "Coffee"},
+            {"Date": datetime.date(2025, 1, 2), "Amount": 12.5, "Details": "Lunch"},
+        ], index=[7, 8, 9])
+
+    def test_ids_are_hex_and_aligned(self):
+        ids = make_tx_ids(self.make_df())
+        self.assertEqual(ids.index.tolist(), [7, 8, 9])
+        for tx_id in ids:
+            self.assertEqual(len(tx_id), 16)
+            int(tx_id, 16)
+
+    def test_identical_rows_get_distinct_ids(self):
+        ids = make_tx_ids(self.make_df())
+        self.assertTrue(ids.is_unique)
+
+    def test_ids_are_stable_across_date_representations(self):
+        df = self.make_df()
+        as_strings = df.assign(Date=df["Date"].astype(str), Amount=df["Amount"].astype(str))
+        as_timestamps = df.assign(Date=pd.to_datetime(df["Date"]))
+        self.assertEqual(make_tx_ids(df).tolist(), make_tx_ids(as_strings).tolist())
+        self.assertEqual(make_tx_ids(df).tolist(), make_tx_ids(as_timestamps).tolist())
+
+    def test_first_occurrence_keeps_its_id(self):
+        df = self.make_df()
+        single = make_tx_ids(df.iloc[[0, 2]])
+        full = make_tx_ids(df)
+        self.assertEqual(single.loc[7], full.loc[7])
+        self.assertEqual(single.loc[9], full.loc[9])
+
+    def test_stream_matches_whole_frame_when_a_repeat_skips_a_chunk(self):
+        df = pd.DataFrame({
+            "Date": ["2025-01-01"] * 4 + ["2025-01-02"],
+            "Amount": [5.0, 7.0, 7.0, 5.0, 5.0],
+            "Details": ["A", "B", "B", "A", "A"],
+        })
+        stream = TxIdStream()
+        streamed = pd.concat([stream(df.iloc[[i]]) for i in range(len(df))])
+        self.assertEqual(streamed.tolist(), make_tx_ids(df).tolist())
+
+    def test_stream_matches_whole_frame_for_unsorted_rows(self):
+        df = pd.DataFrame({
+            "Date": ["2025-01-02", "2025-01-01", "2025-01-02", "2025-01-03", "2025-01-02"],
+            "Amount": [5.0, 5.0, 5.0, 1.0, 5.0],
+            "Details": ["A", "A", "A", "B", "A"],
+        })
+        stream = TxIdStream()
+        streamed = pd.concat([stream(df.iloc[i:i + 2]) for i in range(0, len(df), 2)])
+        self.assertEqual(streamed.tolist(), make_tx_ids(df).tolist())
+        self.assertTrue(streamed.is_unique)
+
+    def test_empty_frame(self):
+        self.assertTrue(make_tx_ids(pd.DataFrame(columns=["Date", "Amount", "Details"])).empty)
+
+
+if __name__ == "__main__":
+    unittest.main()